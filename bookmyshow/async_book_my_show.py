@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+from enums.city import City
+from booking import Booking
+from catalogue_snapshot import CataloguePublisher
+from idempotency_cache import IdempotencyCache
+from payment_gateway import SimulatedPaymentGateway
+from payment_processor import PaymentProcessor
+from show import Show
+from typing import Iterable
+
+class AsyncBookMyShow:
+    """
+    Asyncio front-end for the booking flow.
+
+    This class exposes searching, holding, confirming and cancelling as
+    coroutines on top of the catalogue snapshots of a CataloguePublisher and
+    the Show seat structures, so a single event loop can keep thousands of
+    bookings in flight while their payments are pending.
+
+    Seat changes run synchronously under the show's own seat lock, which
+    never waits on I/O, so they need no asyncio lock of their own. Payment
+    runs while the seats are held, so a slow payment never blocks other
+    users of the same show.
+
+    Confirming is idempotent: a retried confirm with the same idempotency
+    key returns the first confirm's booking and never charges twice.
+
+    Attributes:
+        _catalogue (CataloguePublisher): Catalogue whose latest snapshot is searched
+        _payment_processor (PaymentProcessor): Payment stage used to pay for holds
+        _booking_cache (IdempotencyCache): Bookings of recent confirms by idempotency key
+    """
+
+    _catalogue: CataloguePublisher
+    _payment_processor: PaymentProcessor
+    _booking_cache: IdempotencyCache
+
+    def __init__(self, catalogue: CataloguePublisher, payment_latency_seconds: float = 0.05,
+                 payment_processor: PaymentProcessor = None):
+        """
+        Initialize the async front-end over an existing catalogue.
+
+        Args:
+            catalogue (CataloguePublisher): Catalogue whose latest snapshot is searched
+            payment_latency_seconds (float): Latency of the simulated gateway used when
+                                             no payment processor is given
+            payment_processor (PaymentProcessor): Payment stage to use
+        """
+        self._catalogue = catalogue
+        if payment_processor is None:
+            payment_processor = PaymentProcessor(SimulatedPaymentGateway(payment_latency_seconds))
+        self._payment_processor = payment_processor
+        self._booking_cache = IdempotencyCache()
+
+    async def search_shows(self, city: City, movie_name: str, show_date: datetime.date = None):
+        """
+        Find all shows of a movie in a city on one date.
+
+        Args:
+            city (City): The city to search in
+            movie_name (str): Name of the movie
+            show_date (datetime.date): The date of the shows, today if not given
+
+        Returns:
+            Mapping[Theatre, Tuple[Show, ...]]: Read-only mapping of theatres to their
+                                                shows of the movie, empty if the movie
+                                                is not found
+        """
+        catalogue = self._catalogue.get_snapshot()
+        movie = catalogue.get_movie_in_city(movie_name, city)
+        if movie is None:
+            return {}
+        return catalogue.get_all_show(movie, city, show_date)
+
+    async def hold_seats(self, show: Show, seat_ids: Iterable[int]):
+        """
+        Hold seats on a show until the booking is confirmed or cancelled.
+
+        Args:
+            show (Show): The show to hold seats on
+            seat_ids (Iterable[int]): Ids of the seats to hold
+
+        Returns:
+            int: Id of the hold, or None if any seat is not available
+        """
+        return show.get_seat_lock_manager().hold_seats(seat_ids)
+
+    async def confirm_booking(self, show: Show, hold_id: int, amount: float = 0.0, idempotency_key: str = None):
+        """
+        Pay for a hold and turn it into a booking.
+
+        Retrying with the same idempotency key, also while the first confirm
+        is still running, returns the same booking without charging again.
+        If the payment is declined the hold is released, and if the hold
+        expired while the payment was running the payment is refunded.
+
+        Args:
+            show (Show): The show the seats are held on
+            hold_id (int): Id of the hold to confirm
+            amount (float): The amount to charge
+            idempotency_key (str): Key identifying this confirm, derived from the hold if not given
+
+        Returns:
+            Booking: The confirmed booking, or None if the payment was declined or
+                     the hold expired before payment completed
+        """
+        if idempotency_key is None:
+            idempotency_key = "show-{}-hold-{}".format(id(show), hold_id)
+        future, is_owner = self._booking_cache.get_or_start(idempotency_key)
+        if not is_owner:
+            return await asyncio.wrap_future(future)
+        try:
+            booking = await self._pay_and_confirm(show, hold_id, amount, idempotency_key)
+        except BaseException as error:
+            self._booking_cache.fail(idempotency_key, future, error)
+            raise
+        self._booking_cache.complete(idempotency_key, future, booking, booking is not None)
+        return booking
+
+    async def _pay_and_confirm(self, show: Show, hold_id: int, amount: float, idempotency_key: str):
+        payment = await self._payment_processor.pay_async(idempotency_key, amount)
+        if payment is None:
+            show.get_seat_lock_manager().release_hold(hold_id)
+            return None
+        seat_ids = show.get_seat_lock_manager().confirm_hold(hold_id)
+        if seat_ids is None:
+            await self._payment_processor.refund_async(idempotency_key, payment)
+            return None
+        return Booking(show, show.get_screen().get_seats_by_ids(seat_ids), payment)
+
+    async def cancel(self, show: Show, hold_id: int):
+        """
+        Cancel a pending hold and make its seats available again.
+
+        Args:
+            show (Show): The show the seats are held on
+            hold_id (int): Id of the hold to cancel
+
+        Returns:
+            bool: True if the hold was cancelled, False if it expired or is unknown
+        """
+        return show.get_seat_lock_manager().release_hold(hold_id)
@@ -0,0 +1,305 @@
+"""
+Load-generation benchmark of the BookMyShow booking path.
+
+Synthesizes a catalogue of movies, theatres, screens and shows in every City
+with the same builders main.py uses, then drives a mix of search, hold,
+book and cancel operations from a pool of threads or processes and reports
+throughput, latency percentiles per operation and memory per show.
+
+- search: get_movie_in_city + get_all_show for today on the latest
+          catalogue snapshot
+- hold:   hold a few seats on a show, then release the hold
+- book:   BookMyShow.create_cart_booking for a few seats on one show,
+          paid through a simulated gateway with --payment-latency
+- cancel: BookMyShow.cancel_booking of a booking this worker made earlier
+
+Threads share one catalogue and contend on the show locks; every process
+builds its own identical catalogue, so process runs show the throughput
+of a sharded deployment. Every worker draws from its own random generator
+seeded from --seed, so runs with the same arguments issue the same
+operations and can be compared before and after a change.
+
+Run from the bookmyshow directory:
+    python bench/booking_load_bench.py
+    python bench/booking_load_bench.py --pool process --workers 4 --ops 50000
+    python bench/booking_load_bench.py --json > before.json
+    python bench/booking_load_bench.py --days 31
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums.city import City
+from instrumentation import Instrumentation
+from main import INSTRUMENTATION_HOOKS, BookMyShow
+from movie import Movie
+from payment_gateway import SimulatedPaymentGateway
+from screen import Screen
+from show_calendar import FORWARD_DAYS
+from theatre import Theatre
+
+OPERATIONS = ("search", "hold", "book", "cancel")
+PERCENTILES = (50, 90, 99, 99.9)
+# hours between show starts on a screen; longer than any movie plus cleaning buffer
+SHOW_SPACING_HOURS = 3
+
+
+def build_catalogue(num_movies, theatres_per_city, screens_per_theatre, shows_per_screen, payment_latency=0.0,
+                    days=1):
+    """
+    Build a BookMyShow with a synthetic catalogue.
+
+    Every movie runs in every city, shows are spread over the movies round
+    robin and every screen uses the shared 100-seat layout from main.py.
+    Every screen runs the same slots on each of days dates from today on.
+
+    Returns:
+        Tuple[BookMyShow, List[Show]]: The application and every show created
+    """
+    book_my_show = BookMyShow(SimulatedPaymentGateway(latency_seconds=payment_latency))
+    movies = []
+    for movie_id in range(1, num_movies + 1):
+        movie = Movie()
+        movie.set_movie_id(movie_id)
+        movie.set_movie_name("MOVIE {}".format(movie_id))
+        movie.set_movie_duration(90 + movie_id % 4 * 20)
+        movies.append(movie)
+        for city in City:
+            book_my_show.movie_controller.add_movie(movie, city)
+
+    shows = []
+    theatre_id = 0
+    for city in City:
+        for _ in range(theatres_per_city):
+            theatre_id += 1
+            theatre = Theatre()
+            theatre.set_theatre_id(theatre_id)
+            theatre.set_city(city)
+            screens = []
+            theatre_shows = []
+            for screen_id in range(1, screens_per_theatre + 1):
+                screen = Screen()
+                screen.set_screen_id(screen_id)
+                screen.set_layout(book_my_show.create_seat_layout())
+                screens.append(screen)
+                for day in range(days):
+                    show_date = datetime.date.today() + datetime.timedelta(days=day)
+                    for slot in range(shows_per_screen):
+                        movie = movies[len(shows) % len(movies)]
+                        show = book_my_show.create_shows(len(shows) + 1, screen, movie, slot * SHOW_SPACING_HOURS,
+                                                         show_date)
+                        theatre_shows.append(show)
+                        shows.append(show)
+            theatre.set_screens(screens)
+            theatre.set_shows(theatre_shows)
+            book_my_show.theatre_controller.add_theatre(theatre, city)
+    book_my_show.catalogue.refresh()
+    return book_my_show, shows
+
+
+def measure_memory_per_show(config):
+    """
+    Measure the memory the catalogue takes per show.
+
+    Returns:
+        Tuple[float, float]: Bytes per show as built, and after every show's
+                             allocator, availability counts and waitlist exist
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    book_my_show, shows = build_catalogue(*config)
+    built = tracemalloc.get_traced_memory()[0]
+    for show in shows:
+        show.get_seat_allocator()
+        show.get_availability()
+        show.get_waitlist()
+    warmed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (built - before) / len(shows), (warmed - before) / len(shows)
+
+
+def run_worker(worker_index, config, catalogue, ops, mix, seed, start_time):
+    """
+    Run one worker's share of the operations.
+
+    Returns:
+        Tuple[Dict[str, List[float]], Dict[str, int], float, float]: Latencies
+            in seconds per operation, rejected operations per operation, and
+            the wall-clock start and end of the run
+    """
+    if catalogue is None:
+        # a worker process: build its own catalogue and drop the booking messages
+        catalogue = build_catalogue(*config)
+        sys.stdout = open(os.devnull, "w")
+    book_my_show, shows = catalogue
+    generator = random.Random(seed * 1000003 + worker_index)
+    cities = list(City)
+    num_movies = config[0]
+    operation_choices = generator.choices(OPERATIONS, weights=mix, k=ops)
+    latencies = {operation: [] for operation in OPERATIONS}
+    rejected = {operation: 0 for operation in OPERATIONS}
+    bookings = []
+    clock = time.perf_counter
+
+    # processes start together so their run windows overlap
+    while time.time() < start_time:
+        time.sleep(0.001)
+    run_start = time.time()
+    for operation in operation_choices:
+        if operation == "search":
+            city = cities[generator.randrange(len(cities))]
+            movie_name = "MOVIE {}".format(generator.randint(1, num_movies))
+            began = clock()
+            catalogue = book_my_show.catalogue.get_snapshot()
+            movie = catalogue.get_movie_in_city(movie_name, city)
+            found = catalogue.get_all_show(movie, city)
+            latencies[operation].append(clock() - began)
+            if not found:
+                rejected[operation] += 1
+
+        elif operation == "hold":
+            show = shows[generator.randrange(len(shows))]
+            first_seat_id = generator.randrange(97)
+            seat_ids = range(first_seat_id, first_seat_id + generator.randint(1, 4))
+            seat_lock_manager = show.get_seat_lock_manager()
+            began = clock()
+            hold_id = seat_lock_manager.hold_seats(seat_ids)
+            if hold_id is not None:
+                seat_lock_manager.release_hold(hold_id)
+            latencies[operation].append(clock() - began)
+            if hold_id is None:
+                rejected[operation] += 1
+
+        elif operation == "book":
+            show = shows[generator.randrange(len(shows))]
+            first_seat_id = generator.randrange(97)
+            seat_ids = list(range(first_seat_id, first_seat_id + generator.randint(1, 4)))
+            began = clock()
+            booked = book_my_show.create_cart_booking({show: seat_ids})
+            latencies[operation].append(clock() - began)
+            if booked is None:
+                rejected[operation] += 1
+            else:
+                bookings.extend(booked)
+
+        elif bookings:
+            booking = bookings.pop(generator.randrange(len(bookings)))
+            began = clock()
+            cancelled = book_my_show.cancel_booking(booking)
+            latencies[operation].append(clock() - began)
+            if not cancelled:
+                rejected[operation] += 1
+    return latencies, rejected, run_start, time.time()
+
+
+def percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=20000, help="operations per worker")
+    parser.add_argument("--movies", type=int, default=20)
+    parser.add_argument("--theatres", type=int, default=25, help="theatres per city")
+    parser.add_argument("--screens", type=int, default=4, help="screens per theatre")
+    parser.add_argument("--shows", type=int, default=6, help="shows per screen per day, at most 8")
+    parser.add_argument("--days", type=int, default=1, help="days of shows from today, at most 31")
+    parser.add_argument("--mix", type=int, nargs=4, default=(70, 10, 15, 5),
+                        metavar=("SEARCH", "HOLD", "BOOK", "CANCEL"), help="operation weights")
+    parser.add_argument("--payment-latency", type=float, default=0.0, help="simulated gateway latency in seconds")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time the hooked calls and report their histograms (thread pool only)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+    if args.instrument and args.pool != "thread":
+        parser.error("--instrument needs --pool thread")
+
+    config = (args.movies, args.theatres, args.screens, min(args.shows, 24 // SHOW_SPACING_HOURS),
+              args.payment_latency, max(1, min(args.days, FORWARD_DAYS + 1)))
+    num_shows = len(City) * args.theatres * args.screens * config[3] * config[5]
+    memory_built, memory_warmed = measure_memory_per_show(config)
+
+    instrumentation = Instrumentation(INSTRUMENTATION_HOOKS)
+    if args.pool == "thread":
+        catalogue = build_catalogue(*config)
+        if args.instrument:
+            instrumentation.enable()
+        executor = concurrent.futures.ThreadPoolExecutor(args.workers)
+        start_delay = 0.0
+    else:
+        catalogue = None
+        executor = concurrent.futures.ProcessPoolExecutor(args.workers)
+        # leave every process time to build its catalogue before the run starts
+        start_delay = 0.5 + num_shows / 1000
+    # booking messages printed by BookMyShow would dominate the timings
+    with executor, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.time() + start_delay
+        futures = [executor.submit(run_worker, worker_index, config, catalogue, args.ops,
+                                   args.mix, args.seed, start_time)
+                   for worker_index in range(args.workers)]
+        results = [future.result() for future in futures]
+    instrumentation.disable()
+
+    elapsed = max(result[3] for result in results) - min(result[2] for result in results)
+    total_ops = sum(len(values) for result in results for values in result[0].values())
+    report = {
+        "python": platform.python_version(),
+        "pool": args.pool,
+        "workers": args.workers,
+        "cities": len(City),
+        "shows": num_shows,
+        "seed": args.seed,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_ops_per_second": round(total_ops / elapsed, 1),
+        "memory_bytes_per_show": round(memory_built),
+        "memory_bytes_per_show_warmed": round(memory_warmed),
+        "operations": {},
+    }
+    for operation in OPERATIONS:
+        values = sorted(value for result in results for value in result[0][operation])
+        if not values:
+            continue
+        stats = {"count": len(values), "rejected": sum(result[1][operation] for result in results)}
+        for percent in PERCENTILES:
+            stats["p{}_us".format(percent)] = round(percentile(values, percent) * 1e6, 2)
+        stats["max_us"] = round(values[-1] * 1e6, 2)
+        report["operations"][operation] = stats
+    if args.instrument:
+        report["instrumentation"] = instrumentation.scrape()["histograms"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("{} {} workers, {} cities, {} shows, seed {}, Python {}".format(
+        args.workers, args.pool, report["cities"], num_shows, args.seed, report["python"]))
+    print("throughput: {:,.0f} ops/s over {:.2f} s".format(report["throughput_ops_per_second"], elapsed))
+    print("memory per show: {:,} bytes built, {:,} bytes with allocator, availability and waitlist".format(
+        report["memory_bytes_per_show"], report["memory_bytes_per_show_warmed"]))
+    header = ["operation", "count", "rejected"] + ["p{} (us)".format(percent) for percent in PERCENTILES] + ["max (us)"]
+    print(("{:>12}" * len(header)).format(*header))
+    for operation, stats in report["operations"].items():
+        row = [operation, stats["count"], stats["rejected"]] + \
+              [stats["p{}_us".format(percent)] for percent in PERCENTILES] + [stats["max_us"]]
+        print(("{:>12}" * 3 + "{:>12.2f}" * (len(row) - 3)).format(*row))
+    for name, summary in report.get("instrumentation", {}).items():
+        print("{}: {}".format(name, ", ".join("{} {}".format(key, value) for key, value in summary.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark of the bulk catalogue loader.
+
+Writes a synthetic catalogue of layouts, movies, theatres, screens and shows
+in every City to CSV or JSONL files in a temporary directory, loads it with
+CatalogueLoader and reports the load rate. For comparison, the same shows are
+then added one at a time with CataloguePublisher.add_show to a second
+application, as they were before the bulk loader.
+
+Run from the bookmyshow directory:
+    python bench/catalogue_load_bench.py
+    python bench/catalogue_load_bench.py --format jsonl --theatres 100 --days 7
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue_loader import CatalogueLoader
+from enums.city import City
+from main import BookMyShow
+from show import Show
+
+# hours between show starts on a screen; longer than any movie plus cleaning buffer
+SHOW_SPACING_HOURS = 3
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+parser.add_argument("--movies", type=int, default=200)
+parser.add_argument("--theatres", type=int, default=100, help="theatres per city")
+parser.add_argument("--screens", type=int, default=6, help="screens per theatre")
+parser.add_argument("--shows", type=int, default=6, help="shows per screen per day, at most 8")
+parser.add_argument("--days", type=int, default=5, help="days of shows from today")
+
+
+def generate_records(args):
+    """
+    Build the records of a synthetic catalogue.
+
+    Returns:
+        Dict[str, List[Dict]]: Records of every kind
+    """
+    records = {"layouts": [], "movies": [], "theatres": [], "screens": [], "shows": []}
+    for seat_id in range(1, 101):
+        category = "SILVER" if seat_id <= 40 else "GOLD" if seat_id <= 70 else "PLATINUM"
+        records["layouts"].append({"layout": "standard", "seat_id": seat_id, "row": (seat_id - 1) // 10,
+                                   "seat_category": category})
+    city_names = [city.name for city in City]
+    for movie_id in range(1, args.movies + 1):
+        records["movies"].append({"movie_id": movie_id, "movie_name": "MOVIE {}".format(movie_id),
+                                  "movie_duration": 90 + movie_id % 4 * 20, "cities": city_names})
+    theatre_id = 0
+    today = datetime.date.today()
+    for city_index, city_name in enumerate(city_names):
+        for index in range(args.theatres):
+            theatre_id += 1
+            records["theatres"].append({"theatre_id": theatre_id, "address": "ADDRESS {}".format(theatre_id),
+                                        "city": city_name, "latitude": 12.9 + city_index * 15 + index % 10 * 0.01,
+                                        "longitude": 77.5 + index // 10 * 0.01})
+            for screen_id in range(1, args.screens + 1):
+                records["screens"].append({"theatre_id": theatre_id, "screen_id": screen_id, "layout": "standard"})
+                for day in range(args.days):
+                    for slot in range(min(args.shows, 24 // SHOW_SPACING_HOURS)):
+                        show_id = len(records["shows"]) + 1
+                        records["shows"].append({
+                            "show_id": show_id, "theatre_id": theatre_id, "screen_id": screen_id,
+                            "movie_id": show_id % args.movies + 1,
+                            "show_date": (today + datetime.timedelta(days=day)).isoformat(),
+                            "show_start_time": slot * SHOW_SPACING_HOURS})
+    return records
+
+
+def write_records(directory, file_format, records):
+    for kind, kind_records in records.items():
+        path = os.path.join(directory, kind + "." + file_format)
+        with open(path, "w", newline="") as file:
+            if file_format == "jsonl":
+                for record in kind_records:
+                    file.write(json.dumps(record) + "\n")
+                continue
+            writer = csv.DictWriter(file, fieldnames=list(kind_records[0]))
+            writer.writeheader()
+            for record in kind_records:
+                if isinstance(record.get("cities"), list):
+                    record = dict(record, cities=";".join(record["cities"]))
+                writer.writerow(record)
+
+
+def add_one_at_a_time(directory, file_format, shows):
+    """
+    Load everything but the shows into a new application, then add the shows
+    one at a time the way they were added before the bulk loader.
+
+    Returns:
+        Tuple[int, float]: Number of shows added and seconds taken to add them
+    """
+    book_my_show = BookMyShow()
+    paths = {kind: os.path.join(directory, kind + "." + file_format)
+             for kind in ("layouts", "movies", "theatres", "screens")}
+    CatalogueLoader(book_my_show).load(**paths)
+    movie_id_vs_movie = {}
+    theatre_id_vs_theatre = {}
+    for city in City:
+        for movie in book_my_show.movie_controller.get_movies_by_city(city) or ():
+            movie_id_vs_movie[movie.get_movie_id()] = movie
+        for theatre in book_my_show.theatre_controller.get_theatres_by_city(city):
+            theatre_id_vs_theatre[theatre.get_theatre_id()] = theatre
+
+    began = time.perf_counter()
+    with book_my_show.catalogue.batch():
+        for record in shows:
+            theatre = theatre_id_vs_theatre[record["theatre_id"]]
+            screen = theatre.get_screens()[record["screen_id"] - 1]
+            show = Show(record["show_id"], movie_id_vs_movie[record["movie_id"]], screen,
+                        record["show_start_time"], datetime.date.fromisoformat(record["show_date"]))
+            book_my_show.catalogue.add_show(theatre, show)
+    return len(shows), time.perf_counter() - began
+
+
+def main():
+    args = parser.parse_args()
+    records = generate_records(args)
+    with tempfile.TemporaryDirectory() as directory:
+        write_records(directory, args.format, records)
+        book_my_show = BookMyShow()
+        report = CatalogueLoader(book_my_show).load_directory(directory)
+        print(report)
+        count, seconds = add_one_at_a_time(directory, args.format, records["shows"])
+    print("adding the same {:,} shows one at a time: {:.2f} s ({:,.0f} shows/s)".format(count, seconds, count / seconds))
+
+
+if __name__ == "__main__":
+    main()
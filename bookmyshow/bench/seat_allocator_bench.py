@@ -0,0 +1,89 @@
+"""
+Benchmark of SeatAllocator against a naive scan of the screen.
+
+Builds a 1,000-seat IMAX layout (25 rows of 40 seats), books 95% of the seats
+at random and times finding a block of N contiguous free seats in GOLD with
+both the free-run segment tree and a linear scan over Screen.get_seats().
+
+Run from the bookmyshow directory:
+    python bench/seat_allocator_bench.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums.seat_category import SeatCategory
+from screen import Screen
+from seat import Seat
+from show import Show
+
+ROWS = 25
+SEATS_PER_ROW = 40
+OCCUPANCY = 0.95
+REPEAT = 2000
+
+
+def create_imax_screen():
+    seats = []
+    for row in range(ROWS):
+        if row < 10:
+            category = SeatCategory.SILVER
+        elif row < 20:
+            category = SeatCategory.GOLD
+        else:
+            category = SeatCategory.PLATINUM
+        for column in range(SEATS_PER_ROW):
+            seat = Seat()
+            seat.set_seat_id(row * SEATS_PER_ROW + column)
+            seat.set_row(row)
+            seat.set_seat_category(category)
+            seats.append(seat)
+    screen = Screen()
+    screen.set_screen_id(1)
+    screen.set_seats(seats)
+    return screen
+
+
+def naive_find_block(show, seat_category, count):
+    inventory = show.get_seat_inventory()
+    run = []
+    previous_row = None
+    for seat in show.get_screen().get_seats():
+        if seat.get_seat_category() != seat_category:
+            continue
+        if seat.get_row() != previous_row or inventory.is_booked(seat.get_seat_id()):
+            run = []
+        previous_row = seat.get_row()
+        if not inventory.is_booked(seat.get_seat_id()):
+            run.append(seat.get_seat_id())
+            if len(run) == count:
+                return run
+    return None
+
+
+def main():
+    random.seed(42)
+    show = Show()
+    show.set_show_id(1)
+    show.set_screen(create_imax_screen())
+    seat_ids = list(range(ROWS * SEATS_PER_ROW))
+    random.shuffle(seat_ids)
+    show.get_seat_inventory().reserve_many(seat_ids[:int(len(seat_ids) * OCCUPANCY)])
+    allocator = show.get_seat_allocator()
+
+    print("1,000-seat IMAX layout at {:.0%} occupancy, GOLD category".format(OCCUPANCY))
+    print("{:>6} {:>14} {:>14} {:>9}".format("seats", "tree (us)", "naive (us)", "speedup"))
+    for count in range(1, 5):
+        assert allocator.find_best_block(SeatCategory.GOLD, count) == naive_find_block(show, SeatCategory.GOLD, count)
+        tree = timeit.timeit(lambda: allocator.find_best_block(SeatCategory.GOLD, count), number=REPEAT)
+        naive = timeit.timeit(lambda: naive_find_block(show, SeatCategory.GOLD, count), number=REPEAT)
+        print("{:>6} {:>14.2f} {:>14.2f} {:>8.1f}x".format(
+            count, tree / REPEAT * 1e6, naive / REPEAT * 1e6, naive / tree))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,29 @@ class Booking:
         _show (Show): The show for which the booking is made
         _booked_seats (List[Seat]): List of seats booked in this booking
         _payment (Payment): Payment information for this booking
+        _cancelled (bool): Whether the booking has been cancelled
     """
 
+    __slots__ = ("_show", "_booked_seats", "_payment", "_cancelled")
+
     _show: Show
     _booked_seats: List[Seat]
     _payment: Payment
+    _cancelled: bool
+
+    def __init__(self, show: Show = None, booked_seats: List[Seat] = None, payment: Payment = None):
+        """
+        Initialize a booking that is not cancelled.
+        
+        Args:
+            show (Show): The show for which the booking is made
+            booked_seats (List[Seat]): Seats booked, none if not given
+            payment (Payment): Payment information for the booking
+        """
+        self._show = show
+        self._booked_seats = booked_seats if booked_seats is not None else []
+        self._payment = payment
+        self._cancelled = False
 
     def get_show(self):
         """
@@ -75,3 +93,21 @@ class Booking:
             payment (Payment): The payment object to assign to the booking
         """
         self._payment = payment
+
+    def is_cancelled(self):
+        """
+        Check whether the booking has been cancelled.
+        
+        Returns:
+            bool: True if the booking was cancelled, False otherwise
+        """
+        return self._cancelled
+
+    def set_cancelled(self, cancelled: bool):
+        """
+        Mark the booking as cancelled or active.
+        
+        Args:
+            cancelled (bool): Whether the booking is cancelled
+        """
+        self._cancelled = cancelled
@@ -0,0 +1,320 @@
+import glob
+import os
+import struct
+import threading
+from enums.seat_event import SeatEvent
+from show import Show
+from typing import BinaryIO, Dict, Iterable, List
+
+# journal record header: event code, show id, hold id, number of seat ids
+_RECORD_HEADER = struct.Struct("<BqIH")
+# snapshot file header: magic, first journal segment to replay after the snapshot
+_SNAPSHOT_HEADER = struct.Struct("<4sQ")
+# per-show snapshot entry: show id, seat capacity, pending hold count
+_SNAPSHOT_SHOW = struct.Struct("<qII")
+# per-hold snapshot entry: hold id, number of seat ids
+_SNAPSHOT_HOLD = struct.Struct("<IH")
+_SNAPSHOT_MAGIC = b"BMSS"
+_SNAPSHOT_FILE = "snapshot.bin"
+
+class _ShowState:
+    """Seat bitmap and pending holds of one show while recovering."""
+
+    def __init__(self, capacity: int, bitmap: bytearray):
+        self.capacity = capacity
+        self.bitmap = bitmap
+        self.holds = {}
+
+    def set_seats(self, seat_ids: Iterable[int], booked: bool):
+        for seat_id in seat_ids:
+            if booked:
+                self.bitmap[seat_id >> 3] |= 1 << (seat_id & 7)
+            else:
+                self.bitmap[seat_id >> 3] &= ~(1 << (seat_id & 7)) & 0xFF
+
+
+class BookingJournal:
+    """
+    Append-only binary journal of seat events with periodic snapshots.
+
+    Every hold, confirm, release, direct booking and cancellation made
+    through an attached show's seat lock manager is appended to the current
+    journal segment as a small fixed-format record. Every snapshot_every
+    events, the seat bitmap and pending holds of all attached shows are
+    written to a compact snapshot and a new journal segment is started, so
+    the journal never has to be replayed from the beginning.
+
+    On startup recover loads the latest snapshot, replays the journal
+    segments written after it, drops holds whose payment never completed,
+    restores every show's seats and compacts everything into a fresh
+    snapshot.
+
+    Attributes:
+        _directory (str): Directory holding the snapshot and journal segments
+        _snapshot_every (int): Number of events between automatic snapshots
+        _sync (bool): Whether every append is fsynced to disk
+        _lock (threading.Lock): Guards the journal file and the attached shows
+        _show_id_vs_show (Dict[int, Show]): Shows whose events are journaled
+        _segment (int): Sequence number of the current journal segment
+        _file (BinaryIO): The current journal segment, open for appending
+        _events_since_snapshot (int): Events appended since the last snapshot
+        _snapshot_pending (bool): Whether an automatic snapshot has been started
+        _snapshot_lock (threading.Lock): Serializes snapshots
+    """
+
+    _directory: str
+    _snapshot_every: int
+    _sync: bool
+    _lock: threading.Lock
+    _show_id_vs_show: Dict[int, Show]
+    _segment: int
+    _file: BinaryIO
+    _events_since_snapshot: int
+    _snapshot_pending: bool
+    _snapshot_lock: threading.Lock
+
+    def __init__(self, directory: str, snapshot_every: int = 100000, sync: bool = False):
+        """
+        Open a journal directory, creating it if needed.
+
+        Args:
+            directory (str): Directory holding the snapshot and journal segments
+            snapshot_every (int): Number of events between automatic snapshots
+            sync (bool): Whether every append is fsynced to disk
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._snapshot_every = snapshot_every
+        self._sync = sync
+        self._lock = threading.Lock()
+        self._show_id_vs_show = {}
+        self._segment = max(self._list_segments(), default=self._read_snapshot_segment())
+        self._file = open(self._segment_path(self._segment), "ab")
+        self._events_since_snapshot = 0
+        self._snapshot_pending = False
+        self._snapshot_lock = threading.Lock()
+
+    def _segment_path(self, segment: int):
+        return os.path.join(self._directory, "journal-{:08d}.bin".format(segment))
+
+    def _list_segments(self):
+        return sorted(int(os.path.basename(path)[8:16])
+                      for path in glob.glob(os.path.join(self._directory, "journal-*.bin")))
+
+    def _read_snapshot_segment(self):
+        path = os.path.join(self._directory, _SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as snapshot_file:
+            magic, segment = _SNAPSHOT_HEADER.unpack(snapshot_file.read(_SNAPSHOT_HEADER.size))
+        return segment
+
+    def attach(self, show: Show):
+        """
+        Start journaling the seat events of a show.
+
+        Attaching a show that is already attached has no effect, so its
+        events are never journaled twice.
+
+        Args:
+            show (Show): The show to journal
+
+        Raises:
+            ValueError: If the show has no id, since events are journaled by show id
+        """
+        show_id = show.get_show_id()
+        if show_id is None:
+            raise ValueError("a show needs an id to be journaled")
+        with self._lock:
+            if self._show_id_vs_show.get(show_id) is show:
+                return
+            self._show_id_vs_show[show_id] = show
+        show.get_seat_lock_manager().add_listener(
+            lambda seat_event, hold_id, seat_ids: self.append(seat_event, show_id, hold_id, seat_ids))
+
+    def append(self, seat_event: SeatEvent, show_id: int, hold_id: int, seat_ids: List[int]):
+        """
+        Append one seat event to the journal.
+
+        Args:
+            seat_event (SeatEvent): The event to record
+            show_id (int): Id of the show the event happened on
+            hold_id (int): Id of the hold involved, 0 if none
+            seat_ids (List[int]): Ids of the seats involved
+        """
+        record = _RECORD_HEADER.pack(seat_event.value, show_id, hold_id, len(seat_ids))
+        record += struct.pack("<{}I".format(len(seat_ids)), *seat_ids)
+        with self._lock:
+            self._file.write(record)
+            self._file.flush()
+            if self._sync:
+                os.fsync(self._file.fileno())
+            self._events_since_snapshot += 1
+            take_snapshot = self._events_since_snapshot >= self._snapshot_every and not self._snapshot_pending
+            if take_snapshot:
+                self._snapshot_pending = True
+        if take_snapshot:
+            # the caller holds its show's lock, so the snapshot, which takes
+            # every show's lock, runs on its own thread
+            threading.Thread(target=self.snapshot, daemon=True).start()
+
+    def snapshot(self):
+        """
+        Write a snapshot of every attached show and start a new journal segment.
+
+        Each show is captured under its own lock. Events that happen on a show
+        after it was captured go to the new segment, and events from before
+        it was captured are already part of the snapshot. Replaying an event
+        that is also in the snapshot is harmless, as every event sets seats
+        and holds to a final value rather than adjusting them.
+        
+        Must not be called while holding a show's lock.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                self._file.close()
+                self._segment += 1
+                self._file = open(self._segment_path(self._segment), "ab")
+                self._events_since_snapshot = 0
+                self._snapshot_pending = False
+                shows = list(self._show_id_vs_show.values())
+                segment = self._segment
+
+            entries = []
+            for show in shows:
+                seat_lock_manager = show.get_seat_lock_manager()
+                with seat_lock_manager.get_lock():
+                    inventory = show.get_seat_inventory()
+                    entries.append((show.get_show_id(), inventory.get_capacity(), inventory.get_bitmap(),
+                                    seat_lock_manager.get_holds()))
+            self._write_snapshot(segment, entries)
+
+            for old_segment in self._list_segments():
+                if old_segment < segment:
+                    os.remove(self._segment_path(old_segment))
+
+    def _write_snapshot(self, segment: int, entries: list):
+        path = os.path.join(self._directory, _SNAPSHOT_FILE)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as snapshot_file:
+            snapshot_file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, segment))
+            for show_id, capacity, bitmap, holds in entries:
+                snapshot_file.write(_SNAPSHOT_SHOW.pack(show_id, capacity, len(holds)))
+                snapshot_file.write(bitmap)
+                for hold_id, seat_ids in holds.items():
+                    snapshot_file.write(_SNAPSHOT_HOLD.pack(hold_id, len(seat_ids)))
+                    snapshot_file.write(struct.pack("<{}I".format(len(seat_ids)), *seat_ids))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, path)
+
+    def _load_snapshot(self):
+        path = os.path.join(self._directory, _SNAPSHOT_FILE)
+        show_id_vs_state = {}
+        if not os.path.exists(path):
+            return 0, show_id_vs_state
+        with open(path, "rb") as snapshot_file:
+            data = snapshot_file.read()
+        magic, segment = _SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError("not a booking journal snapshot: " + path)
+        offset = _SNAPSHOT_HEADER.size
+        while offset < len(data):
+            show_id, capacity, hold_count = _SNAPSHOT_SHOW.unpack_from(data, offset)
+            offset += _SNAPSHOT_SHOW.size
+            bitmap_size = (capacity + 7) // 8
+            state = _ShowState(capacity, bytearray(data[offset:offset + bitmap_size]))
+            offset += bitmap_size
+            for _ in range(hold_count):
+                hold_id, seat_count = _SNAPSHOT_HOLD.unpack_from(data, offset)
+                offset += _SNAPSHOT_HOLD.size
+                state.holds[hold_id] = list(struct.unpack_from("<{}I".format(seat_count), data, offset))
+                offset += 4 * seat_count
+            show_id_vs_state[show_id] = state
+        return segment, show_id_vs_state
+
+    def _replay(self, segment: int, show_id_vs_state: Dict[int, _ShowState], show_id_vs_show: Dict[int, Show]):
+        for replay_segment in self._list_segments():
+            if replay_segment < segment:
+                continue
+            with open(self._segment_path(replay_segment), "rb") as journal_file:
+                data = journal_file.read()
+            offset = 0
+            while offset + _RECORD_HEADER.size <= len(data):
+                code, show_id, hold_id, seat_count = _RECORD_HEADER.unpack_from(data, offset)
+                end = offset + _RECORD_HEADER.size + 4 * seat_count
+                if end > len(data):
+                    # torn write at the end of the journal, the event never completed
+                    break
+                seat_ids = struct.unpack_from("<{}I".format(seat_count), data, offset + _RECORD_HEADER.size)
+                offset = end
+
+                state = show_id_vs_state.get(show_id)
+                if state is None:
+                    show = show_id_vs_show.get(show_id)
+                    if show is None:
+                        continue
+                    capacity = show.get_seat_inventory().get_capacity()
+                    state = show_id_vs_state[show_id] = _ShowState(capacity, bytearray((capacity + 7) // 8))
+
+                seat_event = SeatEvent(code)
+                if seat_event == SeatEvent.HOLD:
+                    state.holds[hold_id] = list(seat_ids)
+                    state.set_seats(seat_ids, True)
+                elif seat_event == SeatEvent.CONFIRM:
+                    state.holds.pop(hold_id, None)
+                elif seat_event == SeatEvent.RELEASE:
+                    state.holds.pop(hold_id, None)
+                    state.set_seats(seat_ids, False)
+                elif seat_event == SeatEvent.BOOK:
+                    state.set_seats(seat_ids, True)
+                elif seat_event == SeatEvent.CANCEL:
+                    state.set_seats(seat_ids, False)
+
+    def recover(self, shows: Iterable[Show]):
+        """
+        Restore the booked seats of shows and start journaling them.
+
+        Loads the latest snapshot, replays the journal written after it and
+        applies the result to the matching shows. Holds that were still
+        pending are dropped, as their payment never completed. The recovered
+        state is then compacted into a new snapshot; journaled state of shows
+        that are not passed in is not carried over.
+
+        Args:
+            shows (Iterable[Show]): The shows to restore, matched by show id
+
+        Returns:
+            int: Number of shows whose state was restored
+        """
+        show_id_vs_show = {show.get_show_id(): show for show in shows}
+        with self._lock:
+            self._file.close()
+            segment, show_id_vs_state = self._load_snapshot()
+            self._replay(segment, show_id_vs_state, show_id_vs_show)
+            self._file = open(self._segment_path(self._segment), "ab")
+
+        restored = 0
+        for show_id, state in show_id_vs_state.items():
+            show = show_id_vs_show.get(show_id)
+            if show is None:
+                continue
+            for seat_ids in state.holds.values():
+                state.set_seats(seat_ids, False)
+            booked_seat_ids = [seat_id for seat_id in range(state.capacity)
+                               if state.bitmap[seat_id >> 3] & (1 << (seat_id & 7))]
+            with show.get_seat_lock_manager().get_lock():
+                show.set_booked_seat_ids(booked_seat_ids)
+            restored += 1
+
+        for show in show_id_vs_show.values():
+            self.attach(show)
+        self.snapshot()
+        return restored
+
+    def close(self):
+        """
+        Flush and close the current journal segment.
+        """
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,305 @@
+import csv
+import datetime
+import gc
+import json
+import os
+import time
+from enums.city import City
+from enums.seat_category import SeatCategory
+from main import BookMyShow
+from movie import Movie
+from screen import Screen
+from seat_layout import SeatLayout
+from show import Show
+from show_calendar import ShowCalendar
+from theatre import Theatre
+from typing import Dict, List, Tuple
+
+# kinds of records in the order they are loaded, each kind in <kind>.csv or <kind>.jsonl
+KINDS = ("layouts", "movies", "theatres", "screens", "shows")
+# separator of the cities of a movie in CSV files
+CITY_SEPARATOR = ";"
+
+class LoadReport:
+    """
+    Number of records of every kind loaded and the time the load took.
+
+    Attributes:
+        _kind_vs_count (Dict[str, int]): Records loaded per kind; layouts are
+            counted once however many seat records they have
+        _seconds (float): Wall-clock duration of the load
+    """
+
+    __slots__ = ("_kind_vs_count", "_seconds")
+
+    _kind_vs_count: Dict[str, int]
+    _seconds: float
+
+    def __init__(self, kind_vs_count: Dict[str, int], seconds: float):
+        self._kind_vs_count = kind_vs_count
+        self._seconds = seconds
+
+    def get_count(self, kind: str):
+        """
+        Get the number of records of a kind that were loaded.
+
+        Args:
+            kind (str): One of KINDS
+
+        Returns:
+            int: The number of records
+        """
+        return self._kind_vs_count.get(kind, 0)
+
+    def get_seconds(self):
+        """
+        Get the duration of the load.
+
+        Returns:
+            float: Seconds from the first record read to the catalogue being published
+        """
+        return self._seconds
+
+    def get_records_per_second(self):
+        """
+        Get the load rate over all kinds of records.
+
+        Returns:
+            float: Records loaded per second
+        """
+        return sum(self._kind_vs_count.values()) / self._seconds if self._seconds else 0.0
+
+    def __str__(self):
+        counts = ", ".join("{:,} {}".format(self.get_count(kind), kind) for kind in KINDS)
+        shows_per_second = self.get_count("shows") / self._seconds if self._seconds else 0.0
+        return "loaded {} in {:.2f} s ({:,.0f} records/s, {:,.0f} shows/s)".format(
+            counts, self._seconds, self.get_records_per_second(), shows_per_second)
+
+
+class CatalogueLoader:
+    """
+    Streaming bulk loader of the catalogue from CSV or JSONL files.
+
+    Files hold one record per row (CSV with a header row) or per line
+    (JSONL), with these fields:
+    - layouts: layout, seat_id, row, seat_category (one record per seat; layout names the plan)
+    - movies: movie_id, movie_name, movie_duration, cities (";"-separated in CSV, a list in JSONL)
+    - theatres: theatre_id, address, city, and optionally latitude and longitude
+    - screens: theatre_id, screen_id, layout
+    - shows: show_id, theatre_id, screen_id, movie_id, show_date (ISO), show_start_time
+
+    Records are read lazily and every record is built and checked before
+    anything is added: shows are attached to their new theatres, and only
+    then are all the theatres added with TheatreController.add_theatres,
+    which merges every screen and city schedule once for the whole load and
+    rejects overlapping shows before changing anything, followed by the
+    movies. All of it runs in one CataloguePublisher batch, so searches keep
+    reading the previous catalogue until the new one is published at the
+    end, and a load that fails publishes nothing. The cyclic garbage
+    collector is paused during the load: the tens of thousands of
+    long-lived objects it creates would otherwise trigger collections that
+    scan all of them over and over, about half the load time.
+
+    Attributes:
+        _book_my_show (BookMyShow): Application the catalogue is loaded into
+    """
+
+    _book_my_show: BookMyShow
+
+    def __init__(self, book_my_show: BookMyShow):
+        """
+        Initialize a loader.
+
+        Args:
+            book_my_show (BookMyShow): Application the catalogue is loaded into
+        """
+        self._book_my_show = book_my_show
+
+    def load_directory(self, directory: str):
+        """
+        Load every <kind>.csv or <kind>.jsonl file found in a directory.
+
+        Args:
+            directory (str): Directory holding the files
+
+        Returns:
+            LoadReport: What was loaded and how fast
+
+        Raises:
+            ValueError: If a record is invalid or refers to an unknown record
+        """
+        paths = {}
+        for kind in KINDS:
+            for extension in (".csv", ".jsonl"):
+                path = os.path.join(directory, kind + extension)
+                if os.path.exists(path):
+                    paths[kind] = path
+        return self.load(**paths)
+
+    def load(self, layouts: str = None, movies: str = None, theatres: str = None, screens: str = None,
+             shows: str = None):
+        """
+        Load the catalogue from files; every file is optional.
+
+        Screens and shows may only refer to layouts, movies, theatres and
+        screens loaded in the same call. The loader only adds: a theatre id
+        that is already registered, or repeated in the file, is rejected
+        rather than replacing the theatre, so reloading the same files fails
+        instead of registering every theatre and show twice. A load stopped
+        by an invalid record, a known theatre id or overlapping shows leaves
+        the catalogue as it was.
+
+        Args:
+            layouts (str): Path of the layouts file
+            movies (str): Path of the movies file
+            theatres (str): Path of the theatres file
+            screens (str): Path of the screens file
+            shows (str): Path of the shows file
+
+        Returns:
+            LoadReport: What was loaded and how fast
+
+        Raises:
+            ValueError: If a record is invalid or refers to an unknown record, a
+                        theatre id is already registered, or two shows overlap
+                        on one screen
+        """
+        began = time.perf_counter()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            kind_vs_count = self._load(layouts, movies, theatres, screens, shows)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return LoadReport(kind_vs_count, time.perf_counter() - began)
+
+    def _load(self, layouts: str, movies: str, theatres: str, screens: str, shows: str):
+        kind_vs_count = dict.fromkeys(KINDS, 0)
+        layout_vs_seat_layout = self._load_layouts(layouts, kind_vs_count) if layouts else {}
+        movie_id_vs_movie, movie_id_vs_cities = self._load_movies(movies, kind_vs_count) if movies else ({}, {})
+        theatre_id_vs_theatre = self._load_theatres(theatres, kind_vs_count) if theatres else {}
+        screen_key_vs_screen = (self._load_screens(screens, layout_vs_seat_layout, theatre_id_vs_theatre,
+                                                   kind_vs_count) if screens else {})
+        if shows:
+            self._load_shows(shows, movie_id_vs_movie, theatre_id_vs_theatre, screen_key_vs_screen, kind_vs_count)
+
+        # nothing reachable from the catalogue was changed so far; the theatres
+        # go first since adding them is the only step that can still fail
+        catalogue = self._book_my_show.catalogue
+        with catalogue.batch():
+            catalogue.add_theatres(list(theatre_id_vs_theatre.values()))
+            for movie_id, movie in movie_id_vs_movie.items():
+                for city in movie_id_vs_cities[movie_id]:
+                    catalogue.add_movie(movie, city)
+        return kind_vs_count
+
+    def _load_layouts(self, path: str, kind_vs_count: Dict[str, int]):
+        layout_vs_seats = {}
+        for line_number, record in _read_records(path):
+            try:
+                layout_vs_seats.setdefault(str(record["layout"]), []).append(
+                    (int(record["seat_id"]), int(record["row"]), SeatCategory[record["seat_category"]]))
+            except (KeyError, ValueError, TypeError) as error:
+                raise _record_error(path, line_number, error) from error
+        kind_vs_count["layouts"] += len(layout_vs_seats)
+        return {layout: SeatLayout.intern(seats) for layout, seats in layout_vs_seats.items()}
+
+    def _load_movies(self, path: str, kind_vs_count: Dict[str, int]):
+        movie_id_vs_movie = {}
+        movie_id_vs_cities: Dict[int, List[City]] = {}
+        for line_number, record in _read_records(path):
+            try:
+                movie = Movie(int(record["movie_id"]), record["movie_name"], int(record["movie_duration"]))
+                cities = record["cities"]
+                if isinstance(cities, str):
+                    cities = cities.split(CITY_SEPARATOR)
+                cities = [City[city] for city in cities]
+            except (KeyError, ValueError, TypeError) as error:
+                raise _record_error(path, line_number, error) from error
+            movie_id_vs_movie[movie.get_movie_id()] = movie
+            movie_id_vs_cities[movie.get_movie_id()] = cities
+            kind_vs_count["movies"] += 1
+        return movie_id_vs_movie, movie_id_vs_cities
+
+    def _load_theatres(self, path: str, kind_vs_count: Dict[str, int]):
+        theatre_controller = self._book_my_show.theatre_controller
+        registered_theatre_ids = {theatre.get_theatre_id() for city in City
+                                  for theatre in theatre_controller.get_theatres_by_city(city)}
+        theatre_id_vs_theatre = {}
+        for line_number, record in _read_records(path):
+            try:
+                theatre_id = int(record["theatre_id"])
+                if theatre_id in registered_theatre_ids:
+                    raise ValueError("theatre " + str(theatre_id) + " is already registered")
+                if theatre_id in theatre_id_vs_theatre:
+                    raise ValueError("theatre " + str(theatre_id) + " appears twice")
+                location = None
+                if record.get("latitude") not in (None, "") and record.get("longitude") not in (None, ""):
+                    location = (float(record["latitude"]), float(record["longitude"]))
+                theatre = Theatre(theatre_id, record.get("address"), City[record["city"]],
+                                  location=location)
+            except (KeyError, ValueError, TypeError) as error:
+                raise _record_error(path, line_number, error) from error
+            theatre_id_vs_theatre[theatre.get_theatre_id()] = theatre
+            kind_vs_count["theatres"] += 1
+        return theatre_id_vs_theatre
+
+    def _load_screens(self, path: str, layout_vs_seat_layout: Dict[str, SeatLayout],
+                      theatre_id_vs_theatre: Dict[int, Theatre], kind_vs_count: Dict[str, int]):
+        screen_key_vs_screen = {}
+        for line_number, record in _read_records(path):
+            try:
+                theatre_id = int(record["theatre_id"])
+                screen = Screen(int(record["screen_id"]), layout=layout_vs_seat_layout[str(record["layout"])])
+                theatre_id_vs_theatre[theatre_id].get_screens().append(screen)
+            except (KeyError, ValueError, TypeError) as error:
+                raise _record_error(path, line_number, error) from error
+            screen_key_vs_screen[(theatre_id, screen.get_screen_id())] = screen
+            kind_vs_count["screens"] += 1
+        return screen_key_vs_screen
+
+    def _load_shows(self, path: str, movie_id_vs_movie: Dict[int, Movie], theatre_id_vs_theatre: Dict[int, Theatre],
+                    screen_key_vs_screen: Dict[Tuple[int, int], Screen], kind_vs_count: Dict[str, int]):
+        # same window as the theatres' calendars, checked here to report the line
+        window = ShowCalendar()
+        theatre_vs_shows = {}
+        for line_number, record in _read_records(path):
+            try:
+                theatre_id = int(record["theatre_id"])
+                show_date = datetime.date.fromisoformat(record["show_date"])
+                if not window.is_in_window(show_date):
+                    raise ValueError("show date " + show_date.isoformat() + " is outside the calendar window")
+                show = Show(int(record["show_id"]), movie_id_vs_movie[int(record["movie_id"])],
+                            screen_key_vs_screen[(theatre_id, int(record["screen_id"]))],
+                            int(record["show_start_time"]), show_date)
+                theatre = theatre_id_vs_theatre[theatre_id]
+            except (KeyError, ValueError, TypeError) as error:
+                raise _record_error(path, line_number, error) from error
+            theatre_vs_shows.setdefault(theatre, []).append(show)
+            kind_vs_count["shows"] += 1
+        # the theatres are not added to the catalogue yet, so this changes nothing visible
+        for theatre, shows in theatre_vs_shows.items():
+            theatre.add_shows(shows)
+
+
+def _read_records(path: str):
+    # yields (line number, record) one record at a time
+    with open(path, newline="") as file:
+        if path.endswith(".jsonl"):
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as error:
+                    raise _record_error(path, line_number, error) from error
+                yield line_number, record
+        else:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def _record_error(path: str, line_number: int, error: Exception):
+    return ValueError("{} line {}: {}: {}".format(path, line_number, type(error).__name__, error))
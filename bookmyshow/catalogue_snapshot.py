@@ -0,0 +1,457 @@
+import contextlib
+import datetime
+import threading
+import types
+from enums.city import City
+from geo_index import GeoIndex
+from movie import Movie
+from movie_controller import MovieController
+from movie_search_index import MovieSearchIndex
+from show import Show
+from show_calendar import HISTORY_DAYS
+from show_schedule import ShowSchedule
+from theatre import Theatre
+from theatre_controller import TheatreController
+from typing import Dict, List, Mapping, Set, Tuple
+
+_EMPTY = types.MappingProxyType({})
+
+class CatalogueSnapshot:
+    """
+    Immutable view of the catalogue at one version, for search traffic.
+
+    Every structure reachable from a snapshot is either a tuple, a
+    read-only mapping or a search index built for this snapshot alone, and
+    none of them is ever changed after the snapshot is published, so any
+    number of threads can read a snapshot without locking while the
+    catalogue keeps changing. Searches must go through a snapshot rather
+    than the controllers, whose indexes change under the reader.
+
+    Attributes:
+        _version (int): Version of the catalogue, increased on every publish
+        _city_vs_movie_name_vs_movie (Dict[City, Mapping[str, Movie]]):
+            Movies of each city by normalized name
+        _city_vs_movies (Dict[City, Tuple[Movie, ...]]): Movies of each city
+        _city_vs_shows (Dict[City, Mapping[Tuple[datetime.date, int], Mapping[Theatre, Tuple[Show, ...]]]]):
+            Shows of each city by (date, movie id), then by theatre
+        _city_vs_search_index (Dict[City, MovieSearchIndex]): Name search over the movies of each city
+        _city_vs_geo_index (Dict[City, GeoIndex]): Theatres with a location in each city
+        _city_vs_schedules (Dict[City, Mapping[datetime.date, ShowSchedule]]):
+            (theatre, show) pairs of each city and date, ordered by start time
+    """
+
+    __slots__ = ("_version", "_city_vs_movie_name_vs_movie", "_city_vs_movies", "_city_vs_shows",
+                 "_city_vs_search_index", "_city_vs_geo_index", "_city_vs_schedules")
+
+    _version: int
+    _city_vs_movie_name_vs_movie: Dict[City, Mapping[str, Movie]]
+    _city_vs_movies: Dict[City, Tuple[Movie, ...]]
+    _city_vs_shows: Dict[City, Mapping[Tuple[datetime.date, int], Mapping[Theatre, Tuple[Show, ...]]]]
+    _city_vs_search_index: Dict[City, MovieSearchIndex]
+    _city_vs_geo_index: Dict[City, GeoIndex]
+    _city_vs_schedules: Dict[City, Mapping[datetime.date, ShowSchedule]]
+
+    def __init__(self, version: int, city_vs_movie_name_vs_movie: Dict[City, Mapping[str, Movie]],
+                 city_vs_movies: Dict[City, Tuple[Movie, ...]],
+                 city_vs_shows: Dict[City, Mapping[Tuple[datetime.date, int], Mapping[Theatre, Tuple[Show, ...]]]],
+                 city_vs_search_index: Dict[City, MovieSearchIndex], city_vs_geo_index: Dict[City, GeoIndex],
+                 city_vs_schedules: Dict[City, Mapping[datetime.date, ShowSchedule]]):
+        self._version = version
+        self._city_vs_movie_name_vs_movie = city_vs_movie_name_vs_movie
+        self._city_vs_movies = city_vs_movies
+        self._city_vs_shows = city_vs_shows
+        self._city_vs_search_index = city_vs_search_index
+        self._city_vs_geo_index = city_vs_geo_index
+        self._city_vs_schedules = city_vs_schedules
+
+    def get_version(self):
+        """
+        Get the version of the catalogue this snapshot shows.
+
+        Returns:
+            int: The version
+        """
+        return self._version
+
+    def get_movie_in_city(self, movie_name: str, city: City):
+        """
+        Get a movie by its name if it is available in a city.
+
+        The lookup ignores case and extra whitespace in the name.
+
+        Args:
+            movie_name (str): The name of the movie to find
+            city (City): The city where the movie should be available
+
+        Returns:
+            Movie: The movie object if found in the city, None otherwise
+        """
+        return self._city_vs_movie_name_vs_movie.get(city, _EMPTY).get(MovieController._normalize_name(movie_name))
+
+    def get_movies_by_city(self, city: City):
+        """
+        Get all movies available in a city.
+
+        Args:
+            city (City): The city to get movies for
+
+        Returns:
+            Tuple[Movie, ...]: Movies available in the city, empty if there are none
+        """
+        return self._city_vs_movies.get(city, ())
+
+    def get_all_show(self, movie: Movie, city: City, show_date: datetime.date = None):
+        """
+        Get all shows of a movie in a city on one date.
+
+        Args:
+            movie (Movie): The movie to find shows for
+            city (City): The city to search in
+            show_date (datetime.date): The date of the shows, today if not given
+
+        Returns:
+            Mapping[Theatre, Tuple[Show, ...]]: Read-only mapping of theatres to their
+                                                shows of the movie, empty if none
+        """
+        show_date = show_date if show_date is not None else datetime.date.today()
+        return self._city_vs_shows.get(city, _EMPTY).get((show_date, movie.get_movie_id()), _EMPTY)
+
+    def search_movies(self, city: City, query: str, limit: int = 10):
+        """
+        Find the movies in a city best matching a query.
+
+        Args:
+            city (City): The city to search in
+            query (str): Full or partial movie name, typos allowed
+            limit (int): Maximum number of movies to return
+
+        Returns:
+            List[Movie]: Matching movies, best match first
+        """
+        search_index = self._city_vs_search_index.get(city)
+        if search_index is None:
+            return []
+        return search_index.search(city, query, limit)
+
+    def get_shows_starting_between(self, city: City, from_hour: int, to_hour: int,
+                                   show_date: datetime.date = None):
+        """
+        Get all shows in a city starting within a time window of one date.
+
+        Args:
+            city (City): The city to search in
+            from_hour (int): Start of the window in 24-hour format, inclusive
+            to_hour (int): End of the window in 24-hour format, inclusive
+            show_date (datetime.date): The date of the shows, today if not given
+
+        Returns:
+            Dict[Theatre, List[Show]]: Mapping of theatres to their shows in the
+                                      window, ordered by start time
+        """
+        show_date = show_date if show_date is not None else datetime.date.today()
+        schedule = self._city_vs_schedules.get(city, _EMPTY).get(show_date)
+        if schedule is None:
+            return {}
+        day_start_minute = show_date.toordinal() * 1440
+        theatre_vs_shows = {}
+        for theatre, show in schedule.get_starting_between(day_start_minute + from_hour * 60,
+                                                           day_start_minute + to_hour * 60):
+            theatre_vs_shows.setdefault(theatre, []).append(show)
+        return theatre_vs_shows
+
+    def get_theatres_nearby(self, city: City, latitude: float, longitude: float, radius_km: float = 5.0):
+        """
+        Get the theatres of a city within a distance of a point.
+
+        Only theatres with a location are found.
+
+        Args:
+            city (City): The city to search in
+            latitude (float): Latitude of the point in degrees
+            longitude (float): Longitude of the point in degrees
+            radius_km (float): Maximum distance in kilometres
+
+        Returns:
+            List[Tuple[float, Theatre]]: (distance in km, theatre) pairs, nearest first
+        """
+        geo_index = self._city_vs_geo_index.get(city)
+        if geo_index is None:
+            return []
+        return geo_index.query_within(latitude, longitude, radius_km)
+
+    def get_shows_nearby(self, movie: Movie, city: City, latitude: float, longitude: float,
+                         radius_km: float = 5.0, show_date: datetime.date = None):
+        """
+        Get the shows of a movie on one date in theatres near a point.
+
+        Args:
+            movie (Movie): The movie to find shows for
+            city (City): The city to search in
+            latitude (float): Latitude of the point in degrees
+            longitude (float): Longitude of the point in degrees
+            radius_km (float): Maximum distance in kilometres
+            show_date (datetime.date): The date of the shows, today if not given
+
+        Returns:
+            List[Tuple[float, Theatre, Show]]: (distance in km, theatre, show) triples
+                                               ordered by distance, then start time
+        """
+        theatre_vs_shows = self.get_all_show(movie, city, show_date)
+        if not theatre_vs_shows:
+            return []
+        nearby_shows = []
+        for distance, theatre in self.get_theatres_nearby(city, latitude, longitude, radius_km):
+            shows = theatre_vs_shows.get(theatre)
+            if shows:
+                for show in sorted(shows, key=Show.get_show_start_minute):
+                    nearby_shows.append((distance, theatre, show))
+        return nearby_shows
+
+
+class CataloguePublisher:
+    """
+    Single writer of the catalogue, publishing a CatalogueSnapshot after every change.
+
+    Catalogue changes go through the publisher, which applies them to the
+    movie and theatre controllers (still the source of truth, including
+    validation such as overlapping shows) and then builds the next snapshot
+    copy-on-write: only the per-city tables touched by the change are
+    copied and rebuilt, everything else is shared with the previous
+    snapshot. The search indexes of a touched city (movie names, theatre
+    locations, shows by start time) are built anew rather than changed in
+    place, since readers of older snapshots may still be using them. The new snapshot is published by replacing a single
+    reference, so readers calling get_snapshot see either the old or the
+    new catalogue, never a half-applied change, and never take a lock.
+
+    Writers are serialized by a lock. Changes made inside batch() are
+    published together when the batch ends, so a bulk refresh copies each
+    touched table once instead of once per change.
+
+    Attributes:
+        _movie_controller (MovieController): Movies being published
+        _theatre_controller (TheatreController): Theatres and shows being published
+        _snapshot (CatalogueSnapshot): The latest published snapshot
+        _lock (threading.RLock): Serializes writers
+        _batch_depth (int): Number of batches currently open
+        _dirty_movie_cities (Set[City]): Cities whose movies changed since the last publish
+        _dirty_theatre_cities (Set[City]): Cities whose theatres changed since the last publish
+        _dirty_show_keys (Set[Tuple[City, datetime.date, int]]): (city, date, movie id)
+            whose shows changed since the last publish
+        _expired (bool): True if past dates were expired since the last publish
+    """
+
+    _movie_controller: MovieController
+    _theatre_controller: TheatreController
+    _snapshot: CatalogueSnapshot
+    _lock: threading.RLock
+    _batch_depth: int
+    _dirty_movie_cities: Set[City]
+    _dirty_theatre_cities: Set[City]
+    _dirty_show_keys: Set[Tuple[City, datetime.date, int]]
+    _expired: bool
+
+    def __init__(self, movie_controller: MovieController, theatre_controller: TheatreController):
+        """
+        Initialize the publisher with a snapshot of the controllers' current catalogue.
+
+        Args:
+            movie_controller (MovieController): Movies to publish
+            theatre_controller (TheatreController): Theatres and shows to publish
+        """
+        self._movie_controller = movie_controller
+        self._theatre_controller = theatre_controller
+        self._snapshot = CatalogueSnapshot(0, {}, {}, {}, {}, {}, {})
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty_movie_cities = set()
+        self._dirty_theatre_cities = set()
+        self._dirty_show_keys = set()
+        self._expired = False
+        self.refresh()
+
+    def get_snapshot(self):
+        """
+        Get the latest published catalogue without locking.
+
+        Returns:
+            CatalogueSnapshot: The current snapshot
+        """
+        return self._snapshot
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Publish every change made inside the with block as one new snapshot.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._publish()
+
+    def refresh(self):
+        """
+        Republish the whole catalogue from the controllers.
+
+        Needed only after the controllers were changed directly rather than
+        through the publisher.
+        """
+        with self.batch():
+            # shows published before but gone from the controllers are dropped
+            for city, shows in self._snapshot._city_vs_shows.items():
+                self._dirty_show_keys.update((city, show_date, movie_id) for show_date, movie_id in shows)
+            for city in City:
+                self._dirty_movie_cities.add(city)
+                self._dirty_theatre_cities.add(city)
+                for theatre in self._theatre_controller.get_theatres_by_city(city):
+                    for show in theatre.get_shows():
+                        self._dirty_show_keys.add((city, show.get_show_date(), show.get_movie().get_movie_id()))
+
+    def add_movie(self, movie: Movie, city: City):
+        """Same as MovieController.add_movie, then publish."""
+        with self.batch():
+            self._movie_controller.add_movie(movie, city)
+            self._dirty_movie_cities.add(city)
+
+    def remove_movie_from_city(self, movie: Movie, city: City):
+        """Same as MovieController.remove_movie_from_city, then publish."""
+        with self.batch():
+            self._movie_controller.remove_movie_from_city(movie, city)
+            self._dirty_movie_cities.add(city)
+
+    def update_movie_in_city(self, movie: Movie, city: City):
+        """Same as MovieController.update_movie_in_city, then publish."""
+        with self.batch():
+            self._movie_controller.update_movie_in_city(movie, city)
+            # a renamed movie is indexed under its new name in every city
+            self._dirty_movie_cities.update(City)
+
+    def add_theatre(self, theatre: Theatre, city: City):
+        """Same as TheatreController.add_theatre, then publish."""
+        with self.batch():
+            self._theatre_controller.add_theatre(theatre, city)
+            self._dirty_theatre_cities.add(city)
+            for show in theatre.get_shows():
+                self._dirty_show_keys.add((city, show.get_show_date(), show.get_movie().get_movie_id()))
+
+    def add_theatres(self, theatres: List[Theatre]):
+        """Same as TheatreController.add_theatres, then publish."""
+        with self.batch():
+            self._theatre_controller.add_theatres(theatres)
+            for theatre in theatres:
+                city = theatre.get_city()
+                self._dirty_theatre_cities.add(city)
+                self._dirty_show_keys.update((city, show.get_show_date(), show.get_movie().get_movie_id())
+                                             for show in theatre.get_shows())
+
+    def add_show(self, theatre: Theatre, show: Show):
+        """Same as TheatreController.add_show, then publish."""
+        with self.batch():
+            self._theatre_controller.add_show(theatre, show)
+            self._dirty_show_keys.add((theatre.get_city(), show.get_show_date(), show.get_movie().get_movie_id()))
+
+    def add_shows(self, theatre: Theatre, shows: List[Show]):
+        """Same as TheatreController.add_shows, then publish."""
+        with self.batch():
+            self._theatre_controller.add_shows(theatre, shows)
+            city = theatre.get_city()
+            self._dirty_show_keys.update((city, show.get_show_date(), show.get_movie().get_movie_id())
+                                         for show in shows)
+
+    def remove_show(self, theatre: Theatre, show: Show):
+        """Same as TheatreController.remove_show, then publish."""
+        with self.batch():
+            self._theatre_controller.remove_show(theatre, show)
+            self._dirty_show_keys.add((theatre.get_city(), show.get_show_date(), show.get_movie().get_movie_id()))
+
+    def expire_shows(self):
+        """Same as TheatreController.expire_shows, then publish."""
+        with self.batch():
+            dropped = self._theatre_controller.expire_shows()
+            if dropped:
+                self._expired = True
+            return dropped
+
+    def _publish(self):
+        if not (self._dirty_movie_cities or self._dirty_theatre_cities or self._dirty_show_keys
+                or self._expired):
+            return
+        previous = self._snapshot
+        city_vs_movie_name_vs_movie = dict(previous._city_vs_movie_name_vs_movie)
+        city_vs_movies = dict(previous._city_vs_movies)
+        city_vs_search_index = dict(previous._city_vs_search_index)
+        for city in self._dirty_movie_cities:
+            movies = tuple(self._movie_controller.get_movies_by_city(city) or ())
+            city_vs_movies[city] = movies
+            city_vs_movie_name_vs_movie[city] = types.MappingProxyType(
+                {MovieController._normalize_name(movie.get_movie_name()): movie for movie in movies})
+            search_index = MovieSearchIndex()
+            for movie in movies:
+                search_index.add_movie(movie, city)
+            city_vs_search_index[city] = search_index
+
+        city_vs_geo_index = dict(previous._city_vs_geo_index)
+        for city in self._dirty_theatre_cities:
+            geo_index = GeoIndex()
+            for theatre in self._theatre_controller.get_theatres_by_city(city):
+                if theatre.get_location() is not None:
+                    latitude, longitude = theatre.get_location()
+                    geo_index.add(theatre, latitude, longitude)
+            city_vs_geo_index[city] = geo_index
+
+        city_vs_shows = dict(previous._city_vs_shows)
+        city_vs_changed_shows = {}
+        city_vs_changed_dates = {}
+        for city, show_date, movie_id in self._dirty_show_keys:
+            shows = city_vs_changed_shows.get(city)
+            if shows is None:
+                shows = city_vs_changed_shows[city] = dict(city_vs_shows.get(city, _EMPTY))
+            city_vs_changed_dates.setdefault(city, set()).add(show_date)
+            movie = self._movie_controller.get_movie_by_id(movie_id)
+            theatre_vs_shows = self._theatre_controller.get_all_show(movie, city, show_date) if movie else {}
+            if theatre_vs_shows:
+                shows[(show_date, movie_id)] = types.MappingProxyType(
+                    {theatre: tuple(theatre_shows) for theatre, theatre_shows in theatre_vs_shows.items()})
+            else:
+                shows.pop((show_date, movie_id), None)
+        if self._expired:
+            first_date = datetime.date.today() - datetime.timedelta(days=HISTORY_DAYS)
+            for city, shows in city_vs_shows.items():
+                if city not in city_vs_changed_shows and any(key[0] < first_date for key in shows):
+                    city_vs_changed_shows[city] = dict(shows)
+            for city, shows in city_vs_changed_shows.items():
+                for key in [key for key in shows if key[0] < first_date]:
+                    del shows[key]
+                    city_vs_changed_dates.setdefault(city, set()).add(key[0])
+        for city, shows in city_vs_changed_shows.items():
+            city_vs_shows[city] = types.MappingProxyType(shows)
+
+        # the schedules of every changed date are rebuilt from its published shows
+        city_vs_schedules = dict(previous._city_vs_schedules)
+        for city, show_dates in city_vs_changed_dates.items():
+            date_vs_entries = {show_date: [] for show_date in show_dates}
+            for (show_date, _), theatre_vs_shows in city_vs_shows[city].items():
+                entries = date_vs_entries.get(show_date)
+                if entries is not None:
+                    for theatre, shows in theatre_vs_shows.items():
+                        entries.extend((show.get_show_start_minute(), show.get_show_end_minute(), (theatre, show))
+                                       for show in shows)
+            schedules = dict(city_vs_schedules.get(city, _EMPTY))
+            for show_date, entries in date_vs_entries.items():
+                if entries:
+                    schedule = schedules[show_date] = ShowSchedule()
+                    schedule.add_many(entries, allow_overlap=True)
+                else:
+                    schedules.pop(show_date, None)
+            city_vs_schedules[city] = types.MappingProxyType(schedules)
+
+        self._dirty_movie_cities.clear()
+        self._dirty_theatre_cities.clear()
+        self._dirty_show_keys.clear()
+        self._expired = False
+        self._snapshot = CatalogueSnapshot(previous.get_version() + 1, city_vs_movie_name_vs_movie,
+                                           city_vs_movies, city_vs_shows, city_vs_search_index,
+                                           city_vs_geo_index, city_vs_schedules)
@@ -0,0 +1,350 @@
+import datetime
+import multiprocessing
+import threading
+from enums.city import City
+from movie import Movie
+from movie_controller import MovieController
+from show import Show
+from theatre import Theatre
+from theatre_controller import TheatreController
+from typing import Callable, Dict, List
+
+class _CityShard:
+    """
+    Controllers owned by one worker process.
+
+    Objects arrive in the worker as pickled copies, so theatres, screens and
+    shows passed in by the router are resolved to the worker's own instances
+    by id before they reach the controllers.
+    """
+
+    def __init__(self):
+        self.movie_controller = MovieController()
+        self.theatre_controller = TheatreController()
+        self.theatre_id_vs_theatre = {}
+
+    def add_theatre(self, theatre: Theatre, city: City):
+        self.theatre_controller.add_theatre(theatre, city)
+        self.theatre_id_vs_theatre[theatre.get_theatre_id()] = theatre
+
+    def add_theatres(self, theatres: List[Theatre]):
+        self.theatre_controller.add_theatres(theatres)
+        for theatre in theatres:
+            self.theatre_id_vs_theatre[theatre.get_theatre_id()] = theatre
+
+    def add_show(self, theatre: Theatre, show: Show):
+        theatre = self.theatre_id_vs_theatre[theatre.get_theatre_id()]
+        self._resolve_screen(theatre, show)
+        self.theatre_controller.add_show(theatre, show)
+
+    def add_shows(self, theatre: Theatre, shows: List[Show]):
+        theatre = self.theatre_id_vs_theatre[theatre.get_theatre_id()]
+        for show in shows:
+            self._resolve_screen(theatre, show)
+        self.theatre_controller.add_shows(theatre, shows)
+
+    @staticmethod
+    def _resolve_screen(theatre: Theatre, show: Show):
+        screen_id = show.get_screen().get_screen_id()
+        for screen in theatre.get_screens():
+            if screen.get_screen_id() == screen_id:
+                show.set_screen(screen)
+                return
+        raise ValueError("screen " + str(screen_id) + " is not in theatre " + str(theatre.get_theatre_id()))
+
+    def remove_show(self, theatre: Theatre, show: Show):
+        theatre = self.theatre_id_vs_theatre[theatre.get_theatre_id()]
+        for theatre_show in theatre.get_shows_on(show.get_show_date()):
+            if theatre_show.get_show_id() == show.get_show_id():
+                self.theatre_controller.remove_show(theatre, theatre_show)
+                return
+
+
+def _serve_shard(connection):
+    shard = _CityShard()
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        target, method_name, args = request
+        try:
+            if target == "movie":
+                result = getattr(shard.movie_controller, method_name)(*args)
+            elif target == "theatre" and hasattr(shard, method_name):
+                result = getattr(shard, method_name)(*args)
+            elif target == "theatre":
+                result = getattr(shard.theatre_controller, method_name)(*args)
+            else:
+                function, function_args = args
+                result = function(shard.movie_controller, shard.theatre_controller, *function_args)
+            connection.send((True, result))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+
+class CityShardRouter:
+    """
+    Routes controller calls to worker processes partitioned by City.
+
+    Each worker process owns a MovieController and a TheatreController for
+    the cities assigned to it, so traffic for different cities runs on
+    different cores instead of contending on one interpreter lock. The
+    router's movie_controller and theatre_controller attributes expose the
+    same methods as the in-process controllers and can be used in their
+    place.
+
+    Arguments and results cross the process boundary as pickled copies.
+    Changing a returned object does not change the worker's state; work
+    that must mutate shard state, such as booking seats on a show, should
+    be sent to the shard with run_in_shard.
+
+    Attributes:
+        movie_controller (ShardedMovieController): Drop-in MovieController replacement
+        theatre_controller (ShardedTheatreController): Drop-in TheatreController replacement
+        _connections (List): Pipe to each worker process
+        _connection_locks (List[threading.Lock]): Serializes calls to each worker
+        _processes (List[multiprocessing.Process]): The worker processes
+        _city_vs_shard (Dict[City, int]): Worker index of each city
+    """
+
+    movie_controller: "ShardedMovieController"
+    theatre_controller: "ShardedTheatreController"
+    _connections: List
+    _connection_locks: List[threading.Lock]
+    _processes: List[multiprocessing.Process]
+    _city_vs_shard: Dict[City, int]
+
+    def __init__(self, num_shards: int = None):
+        """
+        Start the worker processes.
+
+        Args:
+            num_shards (int): Number of worker processes, one per city if not given
+        """
+        cities = list(City)
+        if num_shards is None:
+            num_shards = len(cities)
+        num_shards = max(1, min(num_shards, len(cities)))
+
+        self._city_vs_shard = {city: index % num_shards for index, city in enumerate(cities)}
+        self._connections = []
+        self._connection_locks = []
+        self._processes = []
+        for _ in range(num_shards):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve_shard, args=(child_connection,), daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._connection_locks.append(threading.Lock())
+            self._processes.append(process)
+
+        self.movie_controller = ShardedMovieController(self)
+        self.theatre_controller = ShardedTheatreController(self)
+
+    def get_shard(self, city: City):
+        """
+        Get the index of the worker process owning a city.
+
+        Args:
+            city (City): The city to look up
+
+        Returns:
+            int: Index of the worker process
+        """
+        return self._city_vs_shard[city]
+
+    def call(self, shard: int, target: str, method_name: str, *args):
+        """
+        Call a controller method in a worker process.
+
+        Args:
+            shard (int): Index of the worker process
+            target (str): "movie" or "theatre"
+            method_name (str): Name of the controller method
+            *args: Arguments of the method
+
+        Returns:
+            Any: Copy of the method's result
+
+        Raises:
+            Exception: Whatever the method raised in the worker
+        """
+        with self._connection_locks[shard]:
+            self._connections[shard].send((target, method_name, args))
+            ok, result = self._connections[shard].recv()
+        if not ok:
+            raise result
+        return result
+
+    def call_all(self, target: str, method_name: str, *args):
+        """
+        Call a controller method in every worker process.
+
+        Args:
+            target (str): "movie" or "theatre"
+            method_name (str): Name of the controller method
+            *args: Arguments of the method
+
+        Returns:
+            List[Any]: Result of each worker process
+        """
+        return [self.call(shard, target, method_name, *args) for shard in range(len(self._connections))]
+
+    def run_in_shard(self, city: City, function: Callable, *args):
+        """
+        Run a function inside the worker process owning a city.
+
+        The function must be defined at module level so it can be pickled.
+        It is called as function(movie_controller, theatre_controller, *args)
+        with the worker's own controllers.
+
+        Args:
+            city (City): The city whose worker runs the function
+            function (Callable): The function to run
+            *args: Extra arguments for the function
+
+        Returns:
+            Any: Copy of the function's result
+        """
+        return self.call(self.get_shard(city), "call", "", function, args)
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        for connection, lock in zip(self._connections, self._connection_locks):
+            with lock:
+                connection.send(None)
+                connection.close()
+        for process in self._processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ShardedMovieController:
+    """
+    MovieController interface backed by city shards.
+
+    City-scoped calls go to the shard owning the city; lookups by name or id
+    ask every shard and return the first match.
+    """
+
+    def __init__(self, router: CityShardRouter):
+        self._router = router
+
+    def _call_city(self, city: City, method_name: str, *args):
+        return self._router.call(self._router.get_shard(city), "movie", method_name, *args)
+
+    def add_movie(self, movie: Movie, city: City):
+        """Same as MovieController.add_movie, run in the shard owning the city."""
+        return self._call_city(city, "add_movie", movie, city)
+
+    def get_movie_by_name(self, movie_name: str):
+        """Same as MovieController.get_movie_by_name, asking every shard."""
+        for movie in self._router.call_all("movie", "get_movie_by_name", movie_name):
+            if movie is not None:
+                return movie
+        return None
+
+    def get_movie_in_city(self, movie_name: str, city: City):
+        """Same as MovieController.get_movie_in_city, run in the shard owning the city."""
+        return self._call_city(city, "get_movie_in_city", movie_name, city)
+
+    def get_movies_by_city(self, city: City):
+        """Same as MovieController.get_movies_by_city, run in the shard owning the city."""
+        return self._call_city(city, "get_movies_by_city", city)
+
+    def remove_movie_from_city(self, movie: Movie, city: City):
+        """Same as MovieController.remove_movie_from_city, run in the shard owning the city."""
+        return self._call_city(city, "remove_movie_from_city", movie, city)
+
+    def update_movie_in_city(self, movie: Movie, city: City):
+        """Same as MovieController.update_movie_in_city, run in the shard owning the city."""
+        return self._call_city(city, "update_movie_in_city", movie, city)
+
+    def search_movies(self, city: City, query: str, limit: int = 10):
+        """Same as MovieController.search_movies, run in the shard owning the city."""
+        return self._call_city(city, "search_movies", city, query, limit)
+
+    def get_movie_by_id(self, movie_id: int):
+        """Same as MovieController.get_movie_by_id, asking every shard."""
+        for movie in self._router.call_all("movie", "get_movie_by_id", movie_id):
+            if movie is not None:
+                return movie
+        return None
+
+
+class ShardedTheatreController:
+    """
+    TheatreController interface backed by city shards.
+
+    Every call goes to the shard owning the theatre's city.
+    """
+
+    def __init__(self, router: CityShardRouter):
+        self._router = router
+
+    def _call_city(self, city: City, method_name: str, *args):
+        return self._router.call(self._router.get_shard(city), "theatre", method_name, *args)
+
+    def add_theatre(self, theatre: Theatre, city: City):
+        """Same as TheatreController.add_theatre, run in the shard owning the city."""
+        return self._call_city(city, "add_theatre", theatre, city)
+
+    def add_theatres(self, theatres: List[Theatre]):
+        """
+        Same as TheatreController.add_theatres, run in the shards owning the cities.
+
+        The theatres of each shard are added together, so a conflict leaves
+        that shard unchanged, but shards called before it keep their theatres.
+        """
+        shard_vs_theatres = {}
+        for theatre in theatres:
+            shard_vs_theatres.setdefault(self._router.get_shard(theatre.get_city()), []).append(theatre)
+        for shard, shard_theatres in shard_vs_theatres.items():
+            self._router.call(shard, "theatre", "add_theatres", shard_theatres)
+
+    def add_show(self, theatre: Theatre, show: Show):
+        """Same as TheatreController.add_show, run in the shard owning the city."""
+        return self._call_city(theatre.get_city(), "add_show", theatre, show)
+
+    def add_shows(self, theatre: Theatre, shows: List[Show]):
+        """Same as TheatreController.add_shows, run in the shard owning the city."""
+        return self._call_city(theatre.get_city(), "add_shows", theatre, shows)
+
+    def remove_show(self, theatre: Theatre, show: Show):
+        """Same as TheatreController.remove_show, run in the shard owning the city."""
+        return self._call_city(theatre.get_city(), "remove_show", theatre, show)
+
+    def expire_shows(self):
+        """Same as TheatreController.expire_shows, run in every shard."""
+        return sum(self._router.call_all("theatre", "expire_shows"))
+
+    def get_theatres_by_city(self, city: City):
+        """Same as TheatreController.get_theatres_by_city, run in the shard owning the city."""
+        return self._call_city(city, "get_theatres_by_city", city)
+
+    def get_all_show(self, movie: Movie, city: City, show_date: datetime.date = None):
+        """Same as TheatreController.get_all_show, run in the shard owning the city."""
+        return self._call_city(city, "get_all_show", movie, city, show_date)
+
+    def get_shows_starting_between(self, city: City, from_hour: int, to_hour: int,
+                                   show_date: datetime.date = None):
+        """Same as TheatreController.get_shows_starting_between, run in the shard owning the city."""
+        return self._call_city(city, "get_shows_starting_between", city, from_hour, to_hour, show_date)
+
+    def get_theatres_nearby(self, city: City, latitude: float, longitude: float, radius_km: float = 5.0):
+        """Same as TheatreController.get_theatres_nearby, run in the shard owning the city."""
+        return self._call_city(city, "get_theatres_nearby", city, latitude, longitude, radius_km)
+
+    def get_shows_nearby(self, movie: Movie, city: City, latitude: float, longitude: float,
+                         radius_km: float = 5.0, show_date: datetime.date = None):
+        """Same as TheatreController.get_shows_nearby, run in the shard owning the city."""
+        return self._call_city(city, "get_shows_nearby", movie, city, latitude, longitude, radius_km, show_date)
@@ -0,0 +1,21 @@
+from enum import Enum
+
+class SeatEvent(Enum):
+    """
+    Enumeration of seat changes made through a show's seat lock manager.
+    
+    These events are reported to seat lock manager listeners and recorded
+    in the booking journal.
+    
+    Values:
+        HOLD: Seats were held while payment runs
+        CONFIRM: A hold was confirmed and its seats are booked
+        RELEASE: A hold was released or expired and its seats are free again
+        BOOK: Seats were booked directly without a hold
+        CANCEL: Booked seats were cancelled and are free again
+    """
+    HOLD = 1
+    CONFIRM = 2
+    RELEASE = 3
+    BOOK = 4
+    CANCEL = 5
@@ -0,0 +1,134 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+# length of one degree of latitude
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+def distance_km(latitude: float, longitude: float, other_latitude: float, other_longitude: float):
+    """
+    Get the great-circle distance between two points.
+
+    Args:
+        latitude (float): Latitude of the first point in degrees
+        longitude (float): Longitude of the first point in degrees
+        other_latitude (float): Latitude of the second point in degrees
+        other_longitude (float): Longitude of the second point in degrees
+
+    Returns:
+        float: The haversine distance in kilometres
+    """
+    phi = math.radians(latitude)
+    other_phi = math.radians(other_latitude)
+    half_chord = (math.sin((other_phi - phi) / 2) ** 2
+                  + math.cos(phi) * math.cos(other_phi) * math.sin(math.radians(other_longitude - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+class GeoIndex:
+    """
+    Grid index of items by location, for radius queries.
+
+    Items are bucketed into cells of cell_km by cell_km along latitude (and
+    the same number of degrees along longitude). A radius query only visits
+    the cells overlapping the bounding box of the circle, so its cost
+    depends on how many items are nearby rather than on how many are
+    indexed; only the candidates from those cells have their exact distance
+    computed and sorted.
+
+    Attributes:
+        _cell_degrees (float): Size of a cell in degrees
+        _cell_vs_items (Dict[Tuple[int, int], List[Tuple[Any, float, float]]]):
+            (item, latitude, longitude) of the items in every non-empty cell
+        _item_vs_cell (Dict[Any, Tuple[int, int]]): Cell of every indexed item
+    """
+
+    _cell_degrees: float
+    _cell_vs_items: Dict[Tuple[int, int], List[Tuple[Any, float, float]]]
+    _item_vs_cell: Dict[Any, Tuple[int, int]]
+
+    def __init__(self, cell_km: float = 2.0):
+        """
+        Initialize an empty index.
+
+        Args:
+            cell_km (float): Size of a grid cell along latitude; about the radius of typical queries
+        """
+        self._cell_degrees = cell_km / KM_PER_DEGREE
+        self._cell_vs_items = {}
+        self._item_vs_cell = {}
+
+    def _cell_of(self, latitude: float, longitude: float):
+        return math.floor(latitude / self._cell_degrees), math.floor(longitude / self._cell_degrees)
+
+    def add(self, item: Any, latitude: float, longitude: float):
+        """
+        Index an item at a location, moving it if it is already indexed.
+
+        Args:
+            item (Any): The item to index
+            latitude (float): Latitude in degrees
+            longitude (float): Longitude in degrees
+        """
+        self.remove(item)
+        cell = self._cell_of(latitude, longitude)
+        self._cell_vs_items.setdefault(cell, []).append((item, latitude, longitude))
+        self._item_vs_cell[item] = cell
+
+    def remove(self, item: Any):
+        """
+        Remove an item from the index.
+
+        Args:
+            item (Any): The item to remove
+
+        Returns:
+            bool: True if the item was indexed
+        """
+        cell = self._item_vs_cell.pop(item, None)
+        if cell is None:
+            return False
+        items = self._cell_vs_items[cell]
+        items[:] = [entry for entry in items if entry[0] is not item]
+        if not items:
+            del self._cell_vs_items[cell]
+        return True
+
+    def query_within(self, latitude: float, longitude: float, radius_km: float):
+        """
+        Get the items within a distance of a point, nearest first.
+
+        Args:
+            latitude (float): Latitude of the point in degrees
+            longitude (float): Longitude of the point in degrees
+            radius_km (float): Maximum distance in kilometres
+
+        Returns:
+            List[Tuple[float, Any]]: (distance in km, item) pairs ordered by distance
+        """
+        latitude_span = radius_km / KM_PER_DEGREE
+        # a degree of longitude shrinks with the cosine of the latitude; near
+        # the poles the box simply covers every longitude
+        cosine = math.cos(math.radians(min(89.0, abs(latitude) + latitude_span)))
+        longitude_span = min(180.0, latitude_span / cosine)
+        low_row, low_column = self._cell_of(latitude - latitude_span, longitude - longitude_span)
+        high_row, high_column = self._cell_of(latitude + latitude_span, longitude + longitude_span)
+
+        found = []
+        if (high_row - low_row + 1) * (high_column - low_column + 1) > len(self._cell_vs_items):
+            # the box covers more cells than are occupied, walk the occupied ones
+            cells = [items for (row, column), items in self._cell_vs_items.items()
+                     if low_row <= row <= high_row and low_column <= column <= high_column]
+        else:
+            cells = [self._cell_vs_items.get((row, column), ())
+                     for row in range(low_row, high_row + 1) for column in range(low_column, high_column + 1)]
+        for items in cells:
+            for item, item_latitude, item_longitude in items:
+                distance = distance_km(latitude, longitude, item_latitude, item_longitude)
+                if distance <= radius_km:
+                    found.append((distance, item))
+        found.sort(key=lambda entry: entry[0])
+        return found
+
+    def __len__(self):
+        return len(self._item_vs_cell)
@@ -0,0 +1,154 @@
+import concurrent.futures
+import threading
+import time
+from timer_wheel import TimerWheel
+from typing import Callable, Dict, Hashable
+
+class IdempotencyCache:
+    """
+    Results of idempotent operations, deduplicated by key, expiring after a TTL.
+
+    The first caller with a key starts the operation and later callers with
+    the same key, including ones arriving while it is still running, get the
+    same future and therefore the same result. Entries are kept for a fixed
+    time after they are created and are expired through a timer wheel, swept
+    at most once per wheel tick so lookups stay O(1); an entry may outlive
+    its TTL by up to one tick (1/32 of the TTL). An operation that raises is
+    forgotten so it can be retried.
+
+    The cache can be shared by threads and coroutines: futures are
+    concurrent.futures.Future objects, which coroutines can await through
+    asyncio.wrap_future.
+
+    Attributes:
+        _ttl_seconds (float): How long a result is kept
+        _clock (Callable[[], float]): Source of the current time
+        _key_vs_future (Dict[Hashable, concurrent.futures.Future]): Result of every live key
+        _expiry_wheel (TimerWheel): Timer wheel tracking key expiry
+        _sweep_interval (float): Time between sweeps of the timer wheel
+        _next_sweep (float): Time of the next sweep
+        _lock (threading.Lock): Guards the cache
+    """
+
+    _ttl_seconds: float
+    _clock: Callable[[], float]
+    _key_vs_future: Dict[Hashable, concurrent.futures.Future]
+    _expiry_wheel: TimerWheel
+    _sweep_interval: float
+    _next_sweep: float
+    _lock: threading.Lock
+
+    def __init__(self, ttl_seconds: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl_seconds (float): How long a result is kept
+            clock (Callable[[], float]): Source of the current time
+        """
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._key_vs_future = {}
+        # expiries fall half a revolution ahead, never in the slot being swept
+        self._sweep_interval = max(ttl_seconds / 32, 0.001)
+        self._expiry_wheel = TimerWheel(tick_seconds=self._sweep_interval, start_time=clock())
+        self._next_sweep = clock() + self._sweep_interval
+        self._lock = threading.Lock()
+
+    def get_or_start(self, key: Hashable):
+        """
+        Get the future of a key, registering a new one if the key is unknown.
+
+        When a new future is returned the caller owns the operation and must
+        complete it with complete or fail.
+
+        Args:
+            key (Hashable): The idempotency key
+
+        Returns:
+            Tuple[concurrent.futures.Future, bool]: The key's future, and True if
+                                                    the caller has to run the operation
+        """
+        with self._lock:
+            now = self._clock()
+            if now >= self._next_sweep:
+                for expired_key in self._expiry_wheel.advance(now):
+                    del self._key_vs_future[expired_key]
+                self._next_sweep = now + self._sweep_interval
+            future = self._key_vs_future.get(key)
+            if future is not None:
+                return future, False
+            future = self._key_vs_future[key] = concurrent.futures.Future()
+            self._expiry_wheel.schedule(key, now + self._ttl_seconds)
+            return future, True
+
+    def complete(self, key: Hashable, future: concurrent.futures.Future, result, keep: bool = True):
+        """
+        Publish the result of an operation started with get_or_start.
+
+        Args:
+            key (Hashable): The idempotency key
+            future (concurrent.futures.Future): The future returned by get_or_start
+            result (Any): The result of the operation
+            keep (bool): False to forget the key so the next call runs the operation again
+        """
+        if not keep:
+            self.discard(key, future)
+        future.set_result(result)
+
+    def fail(self, key: Hashable, future: concurrent.futures.Future, error: BaseException):
+        """
+        Publish the error of an operation started with get_or_start and forget the key.
+
+        Args:
+            key (Hashable): The idempotency key
+            future (concurrent.futures.Future): The future returned by get_or_start
+            error (BaseException): The error the operation raised
+        """
+        self.discard(key, future)
+        future.set_exception(error)
+
+    def discard(self, key: Hashable, future: concurrent.futures.Future = None):
+        """
+        Forget a key.
+
+        Args:
+            key (Hashable): The idempotency key
+            future (concurrent.futures.Future): Only forget the key if it still maps to this future
+        """
+        with self._lock:
+            if future is not None and self._key_vs_future.get(key) is not future:
+                return
+            if self._key_vs_future.pop(key, None) is not None:
+                self._expiry_wheel.cancel(key)
+
+    def run(self, key: Hashable, function: Callable, *args, keep: Callable[[object], bool] = None):
+        """
+        Run an operation once per key and return its result.
+
+        Args:
+            key (Hashable): The idempotency key
+            function (Callable): The operation, called as function(*args)
+            *args: Arguments of the operation
+            keep (Callable[[Any], bool]): Decides whether a result is kept, all are if not given
+
+        Returns:
+            Any: The result of the first run of the operation for this key
+
+        Raises:
+            Exception: Whatever the operation raised
+        """
+        future, is_owner = self.get_or_start(key)
+        if not is_owner:
+            return future.result()
+        try:
+            result = function(*args)
+        except BaseException as error:
+            self.fail(key, future, error)
+            raise
+        self.complete(key, future, result, keep is None or keep(result))
+        return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._key_vs_future)
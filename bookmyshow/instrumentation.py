@@ -0,0 +1,320 @@
+import functools
+import threading
+import time
+from catalogue_snapshot import CatalogueSnapshot
+from enums.city import City
+from movie_controller import MovieController
+from theatre_controller import TheatreController
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# values below 2 ** (SUB_BUCKET_BITS + 1) get a bucket each; above that every
+# power of two is split into 2 ** SUB_BUCKET_BITS buckets, so a recorded
+# latency is off by at most 1 / 2 ** SUB_BUCKET_BITS (about 3%)
+SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKETS << 1
+
+# (class, method name, metric name) of every call timed by default; the
+# application adds its own entry points, see main.INSTRUMENTATION_HOOKS
+DEFAULT_HOOKS = (
+    (MovieController, "get_movie_in_city", "movie_controller.get_movie_in_city"),
+    (MovieController, "get_movies_by_city", "movie_controller.get_movies_by_city"),
+    (MovieController, "search_movies", "movie_controller.search_movies"),
+    (TheatreController, "get_all_show", "theatre_controller.get_all_show"),
+    (CatalogueSnapshot, "get_movie_in_city", "catalogue_snapshot.get_movie_in_city"),
+    (CatalogueSnapshot, "get_all_show", "catalogue_snapshot.get_all_show"),
+    (CatalogueSnapshot, "search_movies", "catalogue_snapshot.search_movies"),
+)
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _bucket_of(nanoseconds: int):
+    if nanoseconds < _LINEAR_LIMIT:
+        return nanoseconds
+    shift = nanoseconds.bit_length() - SUB_BUCKET_BITS - 1
+    return _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKETS + (nanoseconds >> shift) - _SUB_BUCKETS
+
+
+def _bucket_value(bucket: int):
+    # midpoint of the values recorded in the bucket
+    if bucket < _LINEAR_LIMIT:
+        return bucket
+    shift = (bucket - _LINEAR_LIMIT) // _SUB_BUCKETS + 1
+    low = ((bucket - _LINEAR_LIMIT) % _SUB_BUCKETS + _SUB_BUCKETS) << shift
+    return low + (1 << shift) // 2
+
+
+class _ThreadMetrics:
+    """Counters and histogram buckets written by one thread only."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class Instrumentation:
+    """
+    Call counters, latency histograms and per-show occupancy gauges.
+
+    enable() wraps the hooked methods so every call is counted, and
+    disable() puts the original methods back, so nothing is measured and
+    nothing is paid while instrumentation is off.
+
+    Reading the clock is the most expensive part of timing a call, so only
+    one call in sample_every is timed; every call is still counted.
+    Latencies are recorded in HDR-style histograms: log-linear buckets in
+    nanoseconds with about 3% precision. Every thread writes to its own
+    counters and histograms, so recording never takes a lock; scrape()
+    merges the threads' data. Occupancy is not tracked on the hot path at
+    all: the gauges are read at scrape time from the booked-seat counter and
+    the screen size of today's shows of every watched TheatreController,
+    so a scrape never builds per-show structures.
+
+    DEFAULT_HOOKS only covers the controllers and the catalogue; the
+    application's booking entry points are in main.INSTRUMENTATION_HOOKS.
+
+    Only one Instrumentation should be enabled at a time, since the hooks
+    are installed on the classes.
+
+    Attributes:
+        _hooks (Tuple[Tuple[type, str, str], ...]): (class, method name, metric name) to time
+        _sample_mask (int): A call is timed when its count has none of these bits set
+        _originals (Dict[Tuple[type, str], Callable]): Methods replaced while enabled
+        _local (threading.local): The calling thread's metrics
+        _thread_metrics (List[_ThreadMetrics]): Metrics of every thread that recorded
+        _theatre_controllers (List[TheatreController]): Controllers whose shows get gauges
+        _lock (threading.Lock): Guards registration of threads and controllers
+    """
+
+    _hooks: Tuple[Tuple[type, str, str], ...]
+    _sample_mask: int
+    _originals: Dict[Tuple[type, str], Callable]
+    _local: threading.local
+    _thread_metrics: List[_ThreadMetrics]
+    _theatre_controllers: List[TheatreController]
+    _lock: threading.Lock
+
+    def __init__(self, hooks: Sequence[Tuple[type, str, str]] = DEFAULT_HOOKS, sample_every: int = 16):
+        """
+        Initialize disabled instrumentation.
+
+        Args:
+            hooks (Sequence[Tuple[type, str, str]]): (class, method name, metric name)
+                of every method to time
+            sample_every (int): Time one call in this many, rounded up to a power of two
+
+        Raises:
+            ValueError: If sample_every is less than 1
+        """
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        self._hooks = tuple(hooks)
+        self._sample_mask = (1 << (sample_every - 1).bit_length()) - 1
+        self._originals = {}
+        self._local = threading.local()
+        self._thread_metrics = []
+        self._theatre_controllers = []
+        self._lock = threading.Lock()
+
+    def is_enabled(self):
+        """
+        Check whether the hooks are installed.
+
+        Returns:
+            bool: True if calls are being timed
+        """
+        return bool(self._originals)
+
+    def enable(self):
+        """
+        Install the hooks, timing every call of the hooked methods from now on.
+        """
+        for cls, method_name, metric_name in self._hooks:
+            if (cls, method_name) in self._originals:
+                continue
+            original = cls.__dict__[method_name]
+            self._originals[(cls, method_name)] = original
+            setattr(cls, method_name, self._timed(original, metric_name))
+
+    def disable(self):
+        """
+        Remove the hooks, restoring the original methods. Recorded data is kept.
+        """
+        for (cls, method_name), original in self._originals.items():
+            setattr(cls, method_name, original)
+        self._originals.clear()
+
+    def _timed(self, function: Callable, metric_name: str):
+        # recording is inlined here rather than calling record, since this
+        # wrapper runs on every hooked call
+        clock = time.perf_counter_ns
+        local = self._local
+        metrics_of_thread = self._metrics
+        sample_mask = self._sample_mask
+        calls_name = metric_name + ".calls"
+        error_name = metric_name + ".errors"
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            try:
+                metrics = local.metrics
+            except AttributeError:
+                metrics = metrics_of_thread()
+            counters = metrics.counters
+            calls = counters.get(calls_name, 0) + 1
+            counters[calls_name] = calls
+            if calls & sample_mask:
+                try:
+                    return function(*args, **kwargs)
+                except BaseException:
+                    counters[error_name] = counters.get(error_name, 0) + 1
+                    raise
+
+            began = clock()
+            try:
+                return function(*args, **kwargs)
+            except BaseException:
+                counters[error_name] = counters.get(error_name, 0) + 1
+                raise
+            finally:
+                elapsed = clock() - began
+                buckets = metrics.histograms.get(metric_name)
+                if buckets is None:
+                    buckets = metrics.histograms[metric_name] = {}
+                if elapsed >= _LINEAR_LIMIT:
+                    shift = elapsed.bit_length() - SUB_BUCKET_BITS - 1
+                    elapsed = _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKETS + (elapsed >> shift) - _SUB_BUCKETS
+                buckets[elapsed] = buckets.get(elapsed, 0) + 1
+        return timed
+
+    def _metrics(self):
+        try:
+            return self._local.metrics
+        except AttributeError:
+            metrics = self._local.metrics = _ThreadMetrics()
+            with self._lock:
+                self._thread_metrics.append(metrics)
+            return metrics
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Name of the counter
+            amount (int): Amount to add
+        """
+        counters = self._metrics().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def record(self, name: str, nanoseconds: int):
+        """
+        Record a latency in a histogram.
+
+        Args:
+            name (str): Name of the histogram
+            nanoseconds (int): The latency in nanoseconds
+        """
+        histograms = self._metrics().histograms
+        buckets = histograms.get(name)
+        if buckets is None:
+            buckets = histograms[name] = {}
+        bucket = _bucket_of(nanoseconds)
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    def watch_occupancy(self, theatre_controller: TheatreController):
+        """
+        Report occupancy gauges for today's shows of a theatre controller.
+
+        Args:
+            theatre_controller (TheatreController): Controller whose shows are reported
+        """
+        with self._lock:
+            self._theatre_controllers.append(theatre_controller)
+
+    def scrape(self):
+        """
+        Merge the metrics of every thread and read the occupancy gauges.
+
+        Returns:
+            Dict[str, Dict]: "counters" maps counter names to values, including
+                "<hook>.calls" and "<hook>.errors" of every hooked method;
+                "histograms" maps histogram names to the number of timed calls
+                and their mean, percentiles and maximum in microseconds; "gauges"
+                maps "show.occupancy{show_id=...}" of every show running today
+                to the fraction of the show's seats that are taken
+        """
+        with self._lock:
+            thread_metrics = list(self._thread_metrics)
+            theatre_controllers = list(self._theatre_controllers)
+
+        counters = {}
+        name_vs_buckets = {}
+        for metrics in thread_metrics:
+            # copies are taken in one step each, so a recording thread never
+            # changes a dictionary while it is being merged
+            for name, value in metrics.counters.copy().items():
+                counters[name] = counters.get(name, 0) + value
+            for name, buckets in metrics.histograms.copy().items():
+                merged = name_vs_buckets.setdefault(name, {})
+                for bucket, count in buckets.copy().items():
+                    merged[bucket] = merged.get(bucket, 0) + count
+
+        histograms = {name: self._summarize(buckets) for name, buckets in sorted(name_vs_buckets.items())}
+        return {"counters": dict(sorted(counters.items())), "histograms": histograms,
+                "gauges": self._occupancy_gauges(theatre_controllers)}
+
+    @staticmethod
+    def _summarize(buckets: Dict[int, int]):
+        count = sum(buckets.values())
+        ordered = sorted(buckets.items())
+        summary = {"count": count,
+                   "mean_us": round(sum(_bucket_value(bucket) * hits for bucket, hits in ordered) / count / 1000, 3)}
+        for percent in PERCENTILES:
+            rank = count * percent / 100
+            seen = 0
+            for bucket, hits in ordered:
+                seen += hits
+                if seen >= rank:
+                    break
+            summary["p{}_us".format(percent)] = round(_bucket_value(bucket) / 1000, 3)
+        summary["max_us"] = round(_bucket_value(ordered[-1][0]) / 1000, 3)
+        return summary
+
+    @staticmethod
+    def _occupancy_gauges(theatre_controllers: List[TheatreController]):
+        gauges = {}
+        for theatre_controller in theatre_controllers:
+            for city in City:
+                for shows in theatre_controller.get_shows_starting_between(city, 0, 24).values():
+                    for show in shows:
+                        # plain counters only: a scrape never builds per-show structures
+                        screen = show.get_screen()
+                        layout = screen.get_layout()
+                        capacity = len(layout) if layout is not None else len(screen.get_seats())
+                        if capacity:
+                            # held and booked seats are both set in the inventory
+                            taken = show.get_seat_inventory().get_booked_count()
+                            gauges["show.occupancy{{show_id={}}}".format(show.get_show_id())] = round(
+                                taken / capacity, 4)
+        return gauges
+
+    def dump_text(self):
+        """
+        Render the current metrics as text, one metric per line.
+
+        Returns:
+            str: The metrics in "name value" lines
+        """
+        scraped = self.scrape()
+        lines = []
+        for name, value in scraped["counters"].items():
+            lines.append("{} {}".format(name, value))
+        for name, summary in scraped["histograms"].items():
+            for statistic, value in summary.items():
+                lines.append("{}.{} {}".format(name, statistic, value))
+        for name, value in scraped["gauges"].items():
+            lines.append("{} {}".format(name, value))
+        return "\n".join(lines) + "\n"
@@ -1,13 +1,23 @@
+import itertools
 from enums.city import City
 from enums.seat_category import SeatCategory
 from movie_controller import MovieController
 from theatre_controller import TheatreController
+from catalogue_snapshot import CataloguePublisher
 from seat import Seat
+from seat_layout import SeatLayout
 from booking import Booking
 from theatre import Theatre
 from screen import Screen
 from show import Show
 from movie import Movie
+from seat_lock_manager import SeatLockManager
+from idempotency_cache import IdempotencyCache
+from payment_gateway import PaymentGateway, SimulatedPaymentGateway
+from payment_processor import PaymentProcessor
+from pricing_engine import PricingEngine
+from instrumentation import DEFAULT_HOOKS
+from typing import Callable, Dict, Iterator, List
 
 
 class BookMyShow:
@@ -17,6 +27,7 @@ class BookMyShow:
     This class orchestrates the entire movie booking process including:
     - Movie management through MovieController
     - Theatre management through TheatreController
+    - Lock-free catalogue snapshots for searches through CataloguePublisher
     - Booking creation and seat selection
     - System initialization with sample data
     
@@ -30,18 +41,36 @@ class BookMyShow:
 
     movie_controller: MovieController
     theatre_controller: TheatreController
+    catalogue: CataloguePublisher
+    pricing_engine: PricingEngine
+    payment_processor: PaymentProcessor
+    _booking_cache: IdempotencyCache
+    _booking_keys: Iterator[int]
 
-    def __init__(self):
+    def __init__(self, payment_gateway: PaymentGateway = None):
         """
         Initialize the BookMyShow application.
         
         Creates instances of MovieController and TheatreController to manage
-        movies and theatres respectively.
+        movies and theatres respectively, the CataloguePublisher through which
+        the catalogue is changed and searched, the PricingEngine used to price
+        bookings and the PaymentProcessor used to pay for them.
+        
+        Args:
+            payment_gateway (PaymentGateway): Gateway bookings are charged through,
+                                              an instant simulated gateway if not given
         """
         self.movie_controller = MovieController()
         self.theatre_controller = TheatreController()
-
-    def create_booking(self, user_city: City, movie_name: str):
+        self.catalogue = CataloguePublisher(self.movie_controller, self.theatre_controller)
+        self.pricing_engine = PricingEngine()
+        if payment_gateway is None:
+            payment_gateway = SimulatedPaymentGateway(latency_seconds=0.0)
+        self.payment_processor = PaymentProcessor(payment_gateway)
+        self._booking_cache = IdempotencyCache()
+        self._booking_keys = itertools.count(1)
+
+    def create_booking(self, user_city: City, movie_name: str, seat_ids: List[int] = None):
         """
         Create a movie booking for a user.
         
@@ -53,51 +82,206 @@ class BookMyShow:
         5. Check seat availability and book if available
         6. Create a booking record
         
+        Several seats can be booked in one call. Their availability is
+        checked in one pass and either all of them are booked or none are.
+        
         Args:
             user_city (City): The city where the user wants to book
             movie_name (str): Name of the movie to book
+            seat_ids (List[int]): Ids of the seats to book, seat 30 if not given
+            
+        Returns:
+            Booking: The booking, or None if any seat was already booked
+            
+        Raises:
+            ValueError: If any seat id is not on the show's screen
             
         Note:
             This is a simplified implementation that automatically selects
-            the first available show and seat 30. In a real system, users
-            would choose these interactively.
+            the first available show. In a real system, users would choose
+            it interactively.
         """
-        # 1. search movie by my location
-        movies = self.movie_controller.get_movies_by_city(user_city)
-
+        # 1. search movie by my location, in the latest catalogue snapshot
         # 2. select the movie which you want to see. i want to see Baahubali
-        interested_movie = None
-        for movie in movies:
-            if movie.get_movie_name() == movie_name:
-                interested_movie = movie
+        catalogue = self.catalogue.get_snapshot()
+        interested_movie = catalogue.get_movie_in_city(movie_name, user_city)
 
         # 3. get all show of this movie in Bangalore location
-        shows_theatre_wise = self.theatre_controller.get_all_show(interested_movie, user_city)
+        shows_theatre_wise = catalogue.get_all_show(interested_movie, user_city)
 
         # 4. select the particular show user is interested in
         entry = list(shows_theatre_wise.items())[0]
         running_shows = entry[1]
         interested_show = running_shows[0]
 
-        # 5. select the seat
-        seat_number = 30
-        booked_seats = interested_show.get_booked_seat_ids()
-        if seat_number not in booked_seats:
-            booked_seats.append(seat_number)
-            # start payment
-            booking = Booking()
-            my_booked_seats = []
-            for screen_seat in interested_show.get_screen().get_seats():
-                if screen_seat.get_seat_id() == seat_number:
-                    my_booked_seats.append(screen_seat)
-            booking.set_booked_seats(my_booked_seats)
-            booking.set_show(interested_show)
-        else:
+        # 5. select the seats
+        if seat_ids is None:
+            seat_ids = [30]
+        bookings = self.create_cart_booking({interested_show: seat_ids})
+        if bookings is None:
+            return None
+        return bookings[0]
+
+    def create_cart_booking(self, show_vs_seat_ids: Dict[Show, List[int]], idempotency_key: str = None):
+        """
+        Book seats on one or more shows as a single cart.
+        
+        All seats of every show are held together; if any seat is already
+        taken nothing is booked. The seats' current price is charged through
+        the payment processor while they are held, then the holds are
+        confirmed and one booking is created per show, all sharing the
+        cart's payment. If the payment is declined the holds are released;
+        if a hold expired while the payment was running, the payment is
+        refunded.
+        
+        A retry with the same idempotency key, also one made while the first
+        call is still running, returns the first call's bookings instead of
+        booking and charging again. Failed attempts are not remembered.
+        
+        Args:
+            show_vs_seat_ids (Dict[Show, List[int]]): Ids of the seats to book on each show
+            idempotency_key (str): Key identifying this cart, a new one per call if not given
+            
+        Returns:
+            List[Booking]: One booking per show in the cart, or None if any seat
+                           was already booked or the payment was declined
+                           
+        Raises:
+            ValueError: If any seat id is not on its show's screen; nothing is held
+        """
+        if idempotency_key is None:
+            idempotency_key = "cart-{}".format(next(self._booking_keys))
+        return self._booking_cache.run(idempotency_key, self._book_cart, show_vs_seat_ids, idempotency_key,
+                                       keep=lambda bookings: bookings is not None)
+
+    def _book_cart(self, show_vs_seat_ids: Dict[Show, List[int]], idempotency_key: str):
+        shows = list(show_vs_seat_ids)
+        for show in shows:
+            show.get_seat_lock_manager().check_seat_ids(show_vs_seat_ids[show])
+        # seats are priced at the occupancy before this booking
+        amounts = [self.pricing_engine.quote_seats(show, show_vs_seat_ids[show]) for show in shows]
+        hold_ids = SeatLockManager.hold_seats_across_shows(
+            [(show.get_seat_lock_manager(), show_vs_seat_ids[show]) for show in shows])
+        if hold_ids is None:
             # throw exception
             print("seat already booked, try again")
-            return
+            return None
+
+        # pay while the seats stay held; a retry of this cart reuses the same charge
+        payment = self.payment_processor.charge(idempotency_key, round(sum(amounts), 2))
+        if payment is None:
+            for show, hold_id in zip(shows, hold_ids):
+                show.get_seat_lock_manager().release_hold(hold_id)
+            print("payment declined, try again")
+            return None
+
+        booked_seat_ids = SeatLockManager.confirm_holds_across_shows(
+            [(show.get_seat_lock_manager(), hold_id) for show, hold_id in zip(shows, hold_ids)])
+        if booked_seat_ids is None:
+            # the seats were charged but not booked; a retry of this cart charges again
+            self.payment_processor.refund(idempotency_key, payment)
+            print("seat hold expired, payment refunded, try again")
+            return None
+
+        bookings = []
+        for show, seat_ids in zip(shows, booked_seat_ids):
+            booking = Booking()
+            booking.set_booked_seats(show.get_screen().get_seats_by_ids(seat_ids))
+            booking.set_show(show)
+            booking.set_payment(payment)
+            bookings.append(booking)
 
         print("BOOKING SUCCESSFUL")
+        return bookings
+
+    def cancel_booking(self, booking: Booking):
+        """
+        Cancel a booking and free its seats.
+        
+        Freed seats are handed to the show's waitlist if anyone is waiting.
+        
+        Args:
+            booking (Booking): The booking to cancel
+            
+        Returns:
+            bool: True if the booking was cancelled, False if it already was
+        """
+        return self.cancel_bookings([booking]) == 1
+
+    def cancel_bookings(self, bookings: List[Booking]):
+        """
+        Cancel several bookings at once, e.g. a corporate block release.
+        
+        The seats of all bookings for the same show are freed together, so
+        the show's waitlist reallocates them in a single pass.
+        
+        Args:
+            bookings (List[Booking]): The bookings to cancel
+            
+        Returns:
+            int: Number of bookings that were cancelled
+        """
+        show_vs_seat_ids = {}
+        cancelled = 0
+        for booking in bookings:
+            if booking.is_cancelled():
+                continue
+            booking.set_cancelled(True)
+            cancelled += 1
+            seat_ids = show_vs_seat_ids.setdefault(booking.get_show(), [])
+            seat_ids.extend(seat.get_seat_id() for seat in booking.get_booked_seats())
+
+        for show, seat_ids in show_vs_seat_ids.items():
+            show.get_seat_lock_manager().cancel_seats(seat_ids)
+        return cancelled
+
+    def join_waitlist(self, show: Show, seat_category: SeatCategory, seat_count: int,
+                      on_booked: Callable[[Booking], None]):
+        """
+        Wait for seats on a sold-out show.
+        
+        When enough seats of the category are freed, they are held for the
+        waiting user, priced and charged through the payment processor like
+        a cart, and confirmed. on_booked runs on a payment thread with the
+        new booking, or with None if the payment was declined or the hold
+        expired; the seats then go to the next user waiting.
+        
+        Args:
+            show (Show): The show to wait on
+            seat_category (SeatCategory): The category of seats wanted
+            seat_count (int): Number of seats wanted
+            on_booked (Callable[[Booking], None]): Called with the booking, or None
+                                                  if the seats could not be paid for
+            
+        Returns:
+            int: Id of the waitlist entry
+        """
+        def on_allocated(hold_id, seat_ids):
+            # runs under the show's lock, so the charge is left to the payment pool
+            amount = round(self.pricing_engine.quote_seats(show, seat_ids), 2)
+            idempotency_key = "waitlist-{}".format(next(self._booking_keys))
+            payment = self.payment_processor.pay(idempotency_key, amount)
+            payment.add_done_callback(
+                lambda future: on_booked(self._confirm_waitlist_hold(show, hold_id, idempotency_key, future)))
+
+        return show.get_waitlist().join(seat_category, seat_count, on_allocated)
+
+    def _confirm_waitlist_hold(self, show: Show, hold_id: int, idempotency_key: str, future):
+        seat_lock_manager = show.get_seat_lock_manager()
+        payment = future.result() if future.exception() is None else None
+        if payment is None:
+            # releasing the hold hands the seats to the next user waiting
+            seat_lock_manager.release_hold(hold_id)
+            return None
+        seat_ids = seat_lock_manager.confirm_hold(hold_id)
+        if seat_ids is None:
+            self.payment_processor.refund(idempotency_key, payment)
+            return None
+        booking = Booking()
+        booking.set_booked_seats(show.get_screen().get_seats_by_ids(seat_ids))
+        booking.set_show(show)
+        booking.set_payment(payment)
+        return booking
 
     def initialize(self):
         """
@@ -111,11 +295,13 @@ class BookMyShow:
         
         This is typically called once when the system starts up.
         """
-        # create movies
-        self.create_movies()
+        # the sample catalogue is published as one snapshot
+        with self.catalogue.batch():
+            # create movies
+            self.create_movies()
 
-        # create theater with screens, seats and shows
-        self.create_theatre()
+            # create theater with screens, seats and shows
+            self.create_theatre()
 
     def create_theatre(self):
         """
@@ -136,6 +322,7 @@ class BookMyShow:
         inox_theatre.set_theatre_id(1)
         inox_theatre.set_screens(self.create_screen())
         inox_theatre.set_city(City.Bangalore)
+        inox_theatre.set_location((12.9343, 77.6112))
         inox_shows = []
         inox_morning_show = self.create_shows(1, inox_theatre.get_screens()[0], avenger_movie, 8)
         inox_evening_show = self.create_shows(2, inox_theatre.get_screens()[0], baahubali, 16)
@@ -147,6 +334,7 @@ class BookMyShow:
         pvr_theatre.set_theatre_id(2)
         pvr_theatre.set_screens(self.create_screen())
         pvr_theatre.set_city(City.Delhi)
+        pvr_theatre.set_location((28.5284, 77.2191))
         pvr_shows = []
         pvr_morning_show = self.create_shows(3, pvr_theatre.get_screens()[0], avenger_movie, 13)
         pvr_evening_show = self.create_shows(4, pvr_theatre.get_screens()[0], baahubali, 20)
@@ -154,13 +342,15 @@ class BookMyShow:
         pvr_shows.append(pvr_evening_show)
         pvr_theatre.set_shows(pvr_shows)
 
-        self.theatre_controller.add_theatre(inox_theatre, City.Bangalore)
-        self.theatre_controller.add_theatre(pvr_theatre, City.Delhi)
+        self.catalogue.add_theatre(inox_theatre, City.Bangalore)
+        self.catalogue.add_theatre(pvr_theatre, City.Delhi)
 
     def create_screen(self):
         """
         Create a screen with seats.
         
+        Every screen created here shares the same interned seat layout.
+        
         Returns:
             List[Screen]: A list containing one screen with 100 seats
                          (40 Silver, 30 Gold, 30 Platinum)
@@ -168,12 +358,12 @@ class BookMyShow:
         screens = []
         screen1 = Screen()
         screen1.set_screen_id(1)
-        screen1.set_seats(self.create_seats())
+        screen1.set_layout(self.create_seat_layout())
         screens.append(screen1)
 
         return screens
 
-    def create_shows(self, show_id, screen, movie, show_start_time):
+    def create_shows(self, show_id, screen, movie, show_start_time, show_date=None):
         """
         Create a show for a specific movie on a specific screen.
         
@@ -182,6 +372,7 @@ class BookMyShow:
             screen (Screen): The screen where the show will be displayed
             movie (Movie): The movie to be shown
             show_start_time (int): Start time in 24-hour format (e.g., 8 for 8 AM, 16 for 4 PM)
+            show_date (datetime.date): Date of the show, today if not given
             
         Returns:
             Show: A configured show object
@@ -191,13 +382,42 @@ class BookMyShow:
         show.set_screen(screen)
         show.set_movie(movie)
         show.set_show_start_time(show_start_time)  # 24 hrs time ex: 14 means 2pm and 8 means 8AM
+        if show_date is not None:
+            show.set_show_date(show_date)
         return show
 
+    def create_seat_layout(self):
+        """
+        Create the shared layout of 100 seats with different categories.
+        
+        The seats are in rows of 10, distributed as:
+        - Seats 1-40: SILVER category
+        - Seats 41-70: GOLD category  
+        - Seats 71-100: PLATINUM category
+        
+        The layout is interned, so calling this again returns the same
+        SeatLayout instead of building another copy.
+        
+        Returns:
+            SeatLayout: The shared 100-seat layout
+        """
+        seats = []
+        for i in range(100):
+            if i < 40:
+                seat_category = SeatCategory.SILVER
+            elif i < 70:
+                seat_category = SeatCategory.GOLD
+            else:
+                seat_category = SeatCategory.PLATINUM
+            seats.append((i, i // 10, seat_category))
+
+        return SeatLayout.intern(seats)
+
     def create_seats(self):
         """
         Create 100 seats for a screen with different categories.
         
-        Creates a total of 100 seats distributed as:
+        Creates a total of 100 seats in rows of 10, distributed as:
         - Seats 1-40: SILVER category
         - Seats 41-70: GOLD category  
         - Seats 71-100: PLATINUM category
@@ -212,6 +432,7 @@ class BookMyShow:
         for i in range(40):
             seat = Seat()
             seat.set_seat_id(i)
+            seat.set_row(i // 10)
             seat.set_seat_category(SeatCategory.SILVER)
             seats.append(seat)
 
@@ -219,6 +440,7 @@ class BookMyShow:
         for i in range(40, 70):
             seat = Seat()
             seat.set_seat_id(i)
+            seat.set_row(i // 10)
             seat.set_seat_category(SeatCategory.GOLD)
             seats.append(seat)
 
@@ -226,6 +448,7 @@ class BookMyShow:
         for i in range(70, 100):
             seat = Seat()
             seat.set_seat_id(i)
+            seat.set_row(i // 10)
             seat.set_seat_category(SeatCategory.PLATINUM)
             seats.append(seat)
 
@@ -254,10 +477,16 @@ class BookMyShow:
         baahubali.set_movie_duration(180)
 
         # add movies against the cities
-        self.movie_controller.add_movie(avengers, City.Bangalore)
-        self.movie_controller.add_movie(avengers, City.Delhi)
-        self.movie_controller.add_movie(baahubali, City.Bangalore)
-        self.movie_controller.add_movie(baahubali, City.Delhi)
+        self.catalogue.add_movie(avengers, City.Bangalore)
+        self.catalogue.add_movie(avengers, City.Delhi)
+        self.catalogue.add_movie(baahubali, City.Bangalore)
+        self.catalogue.add_movie(baahubali, City.Delhi)
+
+
+# hooks timing the controllers and the booking entry point, for Instrumentation(INSTRUMENTATION_HOOKS)
+INSTRUMENTATION_HOOKS = DEFAULT_HOOKS + (
+    (BookMyShow, "create_cart_booking", "book_my_show.create_cart_booking"),
+)
 
 
 def main():
@@ -12,11 +12,26 @@ class Movie:
         _movie_duration_in_minutes (int): Duration of the movie in minutes
     """
 
+    __slots__ = ("_movie_id", "_movie_name", "_movie_duration_in_minutes")
+
     _movie_id: int
     _movie_name: str
     _movie_duration_in_minutes: int
     #other details like Genere, Language etc.
 
+    def __init__(self, movie_id: int = None, movie_name: str = None, movie_duration: int = None):
+        """
+        Initialize a movie.
+        
+        Args:
+            movie_id (int): The unique identifier of the movie
+            movie_name (str): The name/title of the movie
+            movie_duration (int): The duration of the movie in minutes
+        """
+        self._movie_id = movie_id
+        self._movie_name = movie_name
+        self._movie_duration_in_minutes = movie_duration
+
     def get_movie_id(self):
         """
         Get the unique identifier of the movie.
@@ -1,6 +1,7 @@
 from movie import Movie
+from movie_search_index import MovieSearchIndex
 from enums.city import City
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 
 class MovieController:
     """
@@ -12,54 +13,134 @@ class MovieController:
     - Removing and updating movies
     - Maintaining city-wise movie mappings
     
-    The controller maintains two data structures:
-    - _city_vs_movies: Maps cities to lists of movies available in that city
+    The controller maintains these data structures:
+    - _city_vs_movies: Maps cities to the movies available there, keyed by movie id
     - _all_movies: Complete list of all movies in the system
+    - _movie_id_vs_position: Position of each movie in _all_movies
+    - _movie_id_vs_movie: Index of all movies by id
+    - _city_name_vs_movie: Index of the movies of each city by normalized name
+    - _name_vs_movie: Index of all movies by normalized name, including movies
+      no longer available in any city
+    - _search_index: Per-city full-text, prefix and typo-tolerant name search
+    
+    The indexes are changed in place, so lookups here must not run while
+    another thread changes the catalogue; concurrent readers search a
+    CatalogueSnapshot instead.
     
     Attributes:
-        _city_vs_movies (Dict[City, List[Movie]]): Mapping of cities to their available movies
+        _city_vs_movies (Dict[City, Dict[int, Movie]]): Mapping of cities to their available movies
         _all_movies (List[Movie]): Complete list of all movies in the system
+        _movie_id_vs_position (Dict[int, int]): Position of each movie id in _all_movies
+        _movie_id_vs_movie (Dict[int, Movie]): Mapping of movie ids to movies
+        _city_name_vs_movie (Dict[Tuple[City, str], Movie]): Mapping of (city, normalized
+            movie name) to movies; movies of different cities may share a name
+        _name_vs_movie (Dict[str, Movie]): Mapping of normalized movie names to the
+            first movie in _all_movies with that name
+        _name_vs_movie_ids (Dict[str, Set[int]]): Ids of every movie with each normalized name
+        _movie_id_vs_name (Dict[int, str]): Normalized name each movie id is indexed under
+        _search_index (MovieSearchIndex): Search index over movie names per city
     """
 
-    _city_vs_movies: Dict[City, List[Movie]]
+    _city_vs_movies: Dict[City, Dict[int, Movie]]
     _all_movies: List[Movie]
+    _movie_id_vs_position: Dict[int, int]
+    _movie_id_vs_movie: Dict[int, Movie]
+    _city_name_vs_movie: Dict[Tuple[City, str], Movie]
+    _name_vs_movie: Dict[str, Movie]
+    _name_vs_movie_ids: Dict[str, Set[int]]
+    _movie_id_vs_name: Dict[int, str]
+    _search_index: MovieSearchIndex
 
     def __init__(self):
         """
         Initialize the MovieController.
         
-        Creates empty data structures for storing movies and city-movie mappings.
+        Creates empty data structures for storing movies, city-movie mappings
+        and the id and name indexes.
         """
         self._city_vs_movies = {}
         self._all_movies = []
+        self._movie_id_vs_position = {}
+        self._movie_id_vs_movie = {}
+        self._city_name_vs_movie = {}
+        self._name_vs_movie = {}
+        self._name_vs_movie_ids = {}
+        self._movie_id_vs_name = {}
+        self._search_index = MovieSearchIndex()
 
 
     def add_movie(self, movie: Movie, city: City):
         """
         Add a movie to a specific city.
         
-        This method adds the movie to both the complete movie list and
-        the city-specific movie list. If the city doesn't exist in the
-        mapping, it creates a new entry.
+        This method adds the movie to the complete movie list and indexes
+        (the first time it is seen) and to the city-specific movie mapping.
+        If the city doesn't exist in the mapping, it creates a new entry.
         
         Args:
             movie (Movie): The movie to add
             city (City): The city where the movie should be available
         """
-        self._all_movies.append(movie)
+        if movie.get_movie_id() not in self._movie_id_vs_position:
+            self._movie_id_vs_position[movie.get_movie_id()] = len(self._all_movies)
+            self._all_movies.append(movie)
 
-        movies = self._city_vs_movies.get(city, [])
-        movies.append(movie)
+        movies = self._city_vs_movies.get(city, {})
+        movies[movie.get_movie_id()] = movie
         self._city_vs_movies[city] = movies
+        self._index_movie(movie)
+        self._search_index.add_movie(movie, city)
+
+    @staticmethod
+    def _normalize_name(movie_name: str):
+        return " ".join(movie_name.split()).casefold()
+
+    def _index_movie(self, movie: Movie):
+        # (re)index the movie's name in every city it is available in, so a
+        # rename moves it to its new name everywhere
+        movie_id = movie.get_movie_id()
+        old_name = self._movie_id_vs_name.get(movie_id)
+        name = self._normalize_name(movie.get_movie_name())
+        self._movie_id_vs_movie[movie_id] = movie
+        self._movie_id_vs_name[movie_id] = name
+        if old_name is not None and old_name != name:
+            self._unindex_global_name(old_name, movie_id)
+        self._name_vs_movie_ids.setdefault(name, set()).add(movie_id)
+        # like a scan of _all_movies, the name finds the first movie holding it
+        indexed = self._name_vs_movie.get(name)
+        if (indexed is None or indexed.get_movie_id() == movie_id
+                or self._movie_id_vs_position[movie_id] < self._movie_id_vs_position[indexed.get_movie_id()]):
+            self._name_vs_movie[name] = movie
+        for city, movies in self._city_vs_movies.items():
+            if movie_id not in movies:
+                continue
+            if old_name is not None and old_name != name:
+                self._unindex_name(city, old_name, movie_id)
+            self._city_name_vs_movie[(city, name)] = movie
 
+    def _unindex_global_name(self, name: str, movie_id: int):
+        movie_ids = self._name_vs_movie_ids[name]
+        movie_ids.discard(movie_id)
+        if not movie_ids:
+            del self._name_vs_movie_ids[name]
+            del self._name_vs_movie[name]
+        elif self._name_vs_movie[name].get_movie_id() == movie_id:
+            first_id = min(movie_ids, key=self._movie_id_vs_position.__getitem__)
+            self._name_vs_movie[name] = self._movie_id_vs_movie[first_id]
 
+    def _unindex_name(self, city: City, name: str, movie_id: int):
+        indexed = self._city_name_vs_movie.get((city, name))
+        if indexed is not None and indexed.get_movie_id() == movie_id:
+            del self._city_name_vs_movie[(city, name)]
 
     def get_movie_by_name(self, movie_name: str):
         """
-        Get a movie by its name.
+        Get a movie by its name from any city.
         
-        Searches through all movies in the system to find a movie with
-        the specified name.
+        The lookup ignores case and extra whitespace in the name and also
+        finds movies that were removed from every city. If several movies
+        share the name, the one added first is returned; use
+        get_movie_in_city to pick the city.
         
         Args:
             movie_name (str): The name of the movie to find
@@ -67,12 +148,20 @@ class MovieController:
         Returns:
             Movie: The movie object if found, None otherwise
         """
-        for movie in self._all_movies:
-            if movie.get_movie_name() == movie_name:
-                return movie
-        return None
-
+        return self._name_vs_movie.get(self._normalize_name(movie_name))
 
+    def get_movie_in_city(self, movie_name: str, city: City):
+        """
+        Get a movie by its name if it is available in a specific city.
+        
+        Args:
+            movie_name (str): The name of the movie to find
+            city (City): The city where the movie should be available
+            
+        Returns:
+            Movie: The movie object if found in the city, None otherwise
+        """
+        return self._city_name_vs_movie.get((city, self._normalize_name(movie_name)))
 
     def get_movies_by_city(self, city: City):
         """
@@ -85,48 +174,76 @@ class MovieController:
             List[Movie]: List of movies available in the specified city,
                         or None if no movies are found for that city
         """
-        return self._city_vs_movies.get(city)
+        movies = self._city_vs_movies.get(city)
+        if movies is None:
+            return None
+        return list(movies.values())
 
     def remove_movie_from_city(self, movie: Movie, city: City):
         """
         Remove a movie from a specific city.
         
-        Removes the movie from the city's movie list but keeps it in
+        Removes the movie from the city's movie mapping but keeps it in
         the overall movie list.
         
         Args:
             movie (Movie): The movie to remove
             city (City): The city from which to remove the movie
         """
-        self._city_vs_movies[city].remove(movie)
+        del self._city_vs_movies[city][movie.get_movie_id()]
+        self._unindex_name(city, self._movie_id_vs_name[movie.get_movie_id()], movie.get_movie_id())
+        self._search_index.remove_movie(movie.get_movie_id(), city)
 
     def update_movie_in_city(self, movie: Movie, city: City):
         """
         Update a movie in a specific city.
         
         This method removes the existing movie entry and adds the updated
-        movie back to the city's movie list.
+        movie back to the city's movie mapping, refreshing the id and name
+        indexes.
         
         Args:
             movie (Movie): The updated movie object
             city (City): The city where the movie should be updated
         """
-        self._city_vs_movies[city].remove(movie)
-        self._city_vs_movies[city].append(movie)
+        movies = self._city_vs_movies[city]
+        del movies[movie.get_movie_id()]
+        movies[movie.get_movie_id()] = movie
+
+        position = self._movie_id_vs_position.get(movie.get_movie_id())
+        if position is None:
+            self._movie_id_vs_position[movie.get_movie_id()] = len(self._all_movies)
+            self._all_movies.append(movie)
+        else:
+            self._all_movies[position] = movie
+        self._index_movie(movie)
+        self._search_index.add_movie(movie, city)
+
+    def search_movies(self, city: City, query: str, limit: int = 10):
+        """
+        Search the movies of a city by name.
+        
+        Matches whole words, word prefixes (for search-as-you-type) and
+        words with one typo, best matches first.
+        
+        Args:
+            city (City): The city to search in
+            query (str): Full or partial movie name
+            limit (int): Maximum number of movies to return
+            
+        Returns:
+            List[Movie]: Matching movies, best match first
+        """
+        return self._search_index.search(city, query, limit)
 
     def get_movie_by_id(self, movie_id: int):
         """
         Get a movie by its unique identifier.
         
-        Searches through all movies in the system to find a movie with
-        the specified ID.
-        
         Args:
             movie_id (int): The unique identifier of the movie to find
             
         Returns:
             Movie: The movie object if found, None otherwise
         """
-        for movie in self._all_movies:
-            if movie.get_movie_id() == movie_id:
-                return movie
+        return self._movie_id_vs_movie.get(movie_id)
@@ -0,0 +1,285 @@
+import bisect
+import heapq
+import re
+from enums.city import City
+from movie import Movie
+from typing import Dict, List, Set, Tuple
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# score of a query token matching a movie token exactly, by prefix, or with one typo
+_EXACT_SCORE = 3
+_PREFIX_SCORE = 2
+_TYPO_SCORE = 1
+# best-ranked movies kept on every trie node, enough for a page of type-ahead results
+_TOP_PER_NODE = 32
+
+def _tokenize(text: str):
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+def _deletes(token: str):
+    # the token with each single character removed; two tokens are within
+    # one edit of each other when their delete sets (plus themselves) meet
+    return {token[:index] + token[index + 1:] for index in range(len(token))}
+
+
+class _TrieNode:
+    """
+    Prefix trie node holding the ids of every movie with a token below it,
+    and the rank keys of the best _TOP_PER_NODE of them in order.
+    """
+
+    __slots__ = ("children", "movie_ids", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.movie_ids = set()
+        self.top = []
+
+    def add(self, movie_id: int, rank_key: Tuple[int, str, int]):
+        if movie_id in self.movie_ids:
+            return
+        self.movie_ids.add(movie_id)
+        if len(self.top) < _TOP_PER_NODE or rank_key < self.top[-1]:
+            bisect.insort(self.top, rank_key)
+            del self.top[_TOP_PER_NODE:]
+
+    def discard(self, movie_id: int, rank_key: Tuple[int, str, int],
+                movie_id_vs_rank_key: Dict[int, Tuple[int, str, int]]):
+        if movie_id not in self.movie_ids:
+            return
+        self.movie_ids.discard(movie_id)
+        index = bisect.bisect_left(self.top, rank_key)
+        if index < len(self.top) and self.top[index] == rank_key:
+            del self.top[index]
+            if len(self.top) < len(self.movie_ids):
+                # a movie that did not fit before moves up
+                self.top = heapq.nsmallest(_TOP_PER_NODE,
+                                           (movie_id_vs_rank_key[other_id] for other_id in self.movie_ids))
+
+
+class _CityIndex:
+    """Search structures for the movies of one city."""
+
+    def __init__(self):
+        self.movie_id_vs_movie = {}
+        self.movie_id_vs_rank_key = {}
+        self.movie_id_vs_tokens = {}
+        self.token_vs_movie_ids = {}
+        self.delete_vs_tokens = {}
+        self.trie = _TrieNode()
+
+    def add(self, movie: Movie):
+        movie_id = movie.get_movie_id()
+        tokens = set(_tokenize(movie.get_movie_name()))
+        # among equally scored matches, shorter names rank first
+        rank_key = (len(movie.get_movie_name()), movie.get_movie_name(), movie_id)
+        self.movie_id_vs_movie[movie_id] = movie
+        self.movie_id_vs_rank_key[movie_id] = rank_key
+        self.movie_id_vs_tokens[movie_id] = tokens
+        for token in tokens:
+            movie_ids = self.token_vs_movie_ids.get(token)
+            if movie_ids is None:
+                movie_ids = self.token_vs_movie_ids[token] = set()
+                for delete in _deletes(token):
+                    self.delete_vs_tokens.setdefault(delete, set()).add(token)
+            movie_ids.add(movie_id)
+
+            node = self.trie
+            node.movie_ids.add(movie_id)
+            for char in token:
+                node = node.children.setdefault(char, _TrieNode())
+                node.add(movie_id, rank_key)
+
+    def remove(self, movie_id: int):
+        tokens = self.movie_id_vs_tokens.pop(movie_id, None)
+        if tokens is None:
+            return
+        del self.movie_id_vs_movie[movie_id]
+        rank_key = self.movie_id_vs_rank_key.pop(movie_id)
+        for token in tokens:
+            movie_ids = self.token_vs_movie_ids[token]
+            movie_ids.discard(movie_id)
+            if not movie_ids:
+                del self.token_vs_movie_ids[token]
+                for delete in _deletes(token):
+                    delete_tokens = self.delete_vs_tokens[delete]
+                    delete_tokens.discard(token)
+                    if not delete_tokens:
+                        del self.delete_vs_tokens[delete]
+
+            node = self.trie
+            node.movie_ids.discard(movie_id)
+            for char in token:
+                child = node.children.get(char)
+                if child is None:
+                    break
+                child.discard(movie_id, rank_key, self.movie_id_vs_rank_key)
+                if not child.movie_ids:
+                    del node.children[char]
+                    break
+                node = child
+
+    def prefix_node(self, prefix: str):
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def prefix_movie_ids(self, prefix: str):
+        node = self.prefix_node(prefix)
+        return node.movie_ids if node is not None else set()
+
+    def typo_movie_ids(self, token: str):
+        candidates = set(self.delete_vs_tokens.get(token, ()))
+        for delete in _deletes(token):
+            if delete in self.token_vs_movie_ids:
+                candidates.add(delete)
+            candidates.update(self.delete_vs_tokens.get(delete, ()))
+        movie_ids = set()
+        for candidate in candidates:
+            movie_ids.update(self.token_vs_movie_ids[candidate])
+        return movie_ids
+
+    def rank_last_token(self, token: str, count: int):
+        # the best count movies for the last query token alone, as (movie id,
+        # score): exact matches, then prefix matches, then typos, each by rank
+        # key. Prefix matches come from the node's top list, so a short prefix
+        # never visits every movie below it, and typos are only looked up
+        # while the prefix matches are not enough.
+        rank_key = self.movie_id_vs_rank_key.__getitem__
+        exact = self.token_vs_movie_ids.get(token, set())
+        ranked = [(movie_id, _EXACT_SCORE) for movie_id in heapq.nsmallest(count, exact, key=rank_key)]
+        node = self.prefix_node(token)
+        if len(ranked) < count and node is not None:
+            for _, _, movie_id in node.top:
+                if movie_id not in exact:
+                    ranked.append((movie_id, _PREFIX_SCORE))
+                    if len(ranked) == count:
+                        break
+            else:
+                if len(node.top) < len(node.movie_ids):
+                    # more prefix matches wanted than the node keeps ranked
+                    del ranked[len(exact):]
+                    ranked.extend((movie_id, _PREFIX_SCORE) for movie_id in heapq.nsmallest(
+                        count - len(ranked), node.movie_ids - exact, key=rank_key))
+        if len(ranked) < count and len(token) > 2 and not exact:
+            matched = node.movie_ids if node is not None else set()
+            ranked.extend((movie_id, _TYPO_SCORE) for movie_id in heapq.nsmallest(
+                count - len(ranked), self.typo_movie_ids(token) - matched, key=rank_key))
+        return ranked
+
+
+class MovieSearchIndex:
+    """
+    In-memory search index over movie names, kept per city.
+
+    Names are split into lowercase tokens. For every city the index keeps an
+    inverted index from token to movies, a prefix trie whose nodes hold the
+    movies below them for autocomplete, and a single-character-delete index
+    that finds tokens within one typo without scanning the vocabulary.
+
+    A query is tokenized the same way. Every token scores a movie for an
+    exact token match, a prefix match or a match within one typo, and the
+    last token is always also matched as a prefix so results appear while
+    the user is still typing. Every trie node also keeps its best-ranked
+    movies in order, so the matches of the last token are read from there
+    and stop at the limit instead of scoring every movie under a short
+    prefix; movies matching earlier tokens are scored in full. The top
+    results are picked with a heap.
+
+    Attributes:
+        _city_vs_index (Dict[City, _CityIndex]): Search structures per city
+    """
+
+    _city_vs_index: Dict[City, _CityIndex]
+
+    def __init__(self):
+        """
+        Initialize an empty search index.
+        """
+        self._city_vs_index = {}
+
+    def add_movie(self, movie: Movie, city: City):
+        """
+        Index a movie in a city, replacing any earlier entry for the same movie id.
+
+        Args:
+            movie (Movie): The movie to index
+            city (City): The city where the movie is available
+        """
+        city_index = self._city_vs_index.setdefault(city, _CityIndex())
+        city_index.remove(movie.get_movie_id())
+        city_index.add(movie)
+
+    def remove_movie(self, movie_id: int, city: City):
+        """
+        Remove a movie from the index of a city.
+
+        Args:
+            movie_id (int): Id of the movie to remove
+            city (City): The city to remove it from
+        """
+        city_index = self._city_vs_index.get(city)
+        if city_index is not None:
+            city_index.remove(movie_id)
+
+    def search(self, city: City, query: str, limit: int = 10):
+        """
+        Find the movies in a city best matching a query.
+
+        Args:
+            city (City): The city to search in
+            query (str): Full or partial movie name, typos allowed
+            limit (int): Maximum number of movies to return
+
+        Returns:
+            List[Movie]: Matching movies, best match first
+        """
+        city_index = self._city_vs_index.get(city)
+        tokens = _tokenize(query)
+        if city_index is None or not tokens:
+            return []
+
+        movie_id_vs_score: Dict[int, int] = {}
+        for token in tokens[:-1]:
+            exact: Set[int] = city_index.token_vs_movie_ids.get(token, set())
+            prefix: Set[int] = city_index.prefix_movie_ids(token) if not exact else set()
+            typo: Set[int] = city_index.typo_movie_ids(token) if len(token) > 2 and not exact else set()
+            for movie_id in exact | prefix | typo:
+                if movie_id in exact:
+                    score = _EXACT_SCORE
+                elif movie_id in prefix:
+                    score = _PREFIX_SCORE
+                else:
+                    score = _TYPO_SCORE
+                movie_id_vs_score[movie_id] = movie_id_vs_score.get(movie_id, 0) + score
+
+        # movies matched by earlier tokens add whatever the last token scores
+        # for them; any other movie scores the last token alone, so only the
+        # best of those can make the results
+        last = tokens[-1]
+        exact = city_index.token_vs_movie_ids.get(last, set())
+        prefix = city_index.prefix_movie_ids(last)
+        typo = None
+        for movie_id in movie_id_vs_score:
+            if movie_id in exact:
+                movie_id_vs_score[movie_id] += _EXACT_SCORE
+            elif movie_id in prefix:
+                movie_id_vs_score[movie_id] += _PREFIX_SCORE
+            elif len(last) > 2 and not exact:
+                if typo is None:
+                    typo = city_index.typo_movie_ids(last)
+                if movie_id in typo:
+                    movie_id_vs_score[movie_id] += _TYPO_SCORE
+        for movie_id, score in city_index.rank_last_token(last, limit + len(movie_id_vs_score)):
+            movie_id_vs_score.setdefault(movie_id, score)
+
+        movie_id_vs_movie = city_index.movie_id_vs_movie
+        best = heapq.nsmallest(
+            limit, movie_id_vs_score.items(),
+            key=lambda item: (-item[1], len(movie_id_vs_movie[item[0]].get_movie_name()),
+                              movie_id_vs_movie[item[0]].get_movie_name()))
+        return [movie_id_vs_movie[movie_id] for movie_id, _ in best]
@@ -3,22 +3,28 @@ class Payment:
     Represents a payment for a booking.
     
     This class encapsulates payment information for a booking. Currently,
-    it only stores a payment ID, but can be extended to include payment
-    method, amount, status, and other payment-related details.
+    it stores a payment ID and amount, but can be extended to include
+    payment method, status, and other payment-related details.
     
     Attributes:
         _payment_id (int): Unique identifier for the payment
+        _amount (float): Amount charged for the booking
     """
+    __slots__ = ("_payment_id", "_amount")
+
     _payment_id: int
+    _amount: float
 
-    def __init__(self, payment_id: int):
+    def __init__(self, payment_id: int, amount: float = 0.0):
         """
         Initialize a payment with a unique identifier.
         
         Args:
             payment_id (int): The unique identifier for the payment
+            amount (float): The amount charged for the booking
         """
         self._payment_id = payment_id
+        self._amount = amount
 
     def get_payment_id(self):
         """
@@ -37,3 +43,21 @@ class Payment:
             payment_id (int): The unique identifier to assign to the payment
         """
         self._payment_id = payment_id
+
+    def get_amount(self):
+        """
+        Get the amount charged for the booking.
+        
+        Returns:
+            float: The payment amount
+        """
+        return self._amount
+
+    def set_amount(self, amount: float):
+        """
+        Set the amount charged for the booking.
+        
+        Args:
+            amount (float): The payment amount
+        """
+        self._amount = amount
@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from payment import Payment
+from typing import Iterator, Set
+
+class PaymentGateway:
+    """
+    Interface of an external payment gateway.
+
+    Implementations charge an amount and return the resulting Payment, and
+    refund a completed payment that could not be turned into a booking. The
+    idempotency key identifies the charge to the gateway, so a gateway that
+    supports idempotent requests never charges the same key twice.
+
+    charge_async and refund_async default to running charge and refund on
+    the event loop's default thread pool; gateways with a native asyncio
+    client should override them.
+    """
+
+    def charge(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount.
+
+        Args:
+            idempotency_key (str): Key identifying this charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+        """
+        raise NotImplementedError
+
+    async def charge_async(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount without blocking the event loop.
+
+        Args:
+            idempotency_key (str): Key identifying this charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.charge, idempotency_key, amount)
+
+    def refund(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a completed payment in full.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True if the payment was refunded, False if the gateway refused
+        """
+        raise NotImplementedError
+
+    async def refund_async(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a completed payment without blocking the event loop.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True if the payment was refunded, False if the gateway refused
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.refund, idempotency_key, payment)
+
+
+class SimulatedPaymentGateway(PaymentGateway):
+    """
+    In-process stand-in for a payment gateway.
+
+    Every charge waits for a fixed latency and is then approved, or declined
+    at random with the configured rate. Payment ids are assigned in order.
+    Refunds wait for the same latency and always succeed.
+
+    Attributes:
+        _latency_seconds (float): Simulated time a charge takes
+        _decline_rate (float): Fraction of charges declined
+        _random (random.Random): Source of declines
+        _payment_ids (Iterator[int]): Source of payment ids
+        _refunded_payment_ids (Set[int]): Ids of the refunded payments
+        _lock (threading.Lock): Guards the random source, payment ids and refunds
+    """
+
+    _latency_seconds: float
+    _decline_rate: float
+    _random: random.Random
+    _payment_ids: Iterator[int]
+    _refunded_payment_ids: Set[int]
+    _lock: threading.Lock
+
+    def __init__(self, latency_seconds: float = 0.05, decline_rate: float = 0.0, seed: int = None):
+        """
+        Initialize the stand-in gateway.
+
+        Args:
+            latency_seconds (float): Simulated time a charge takes
+            decline_rate (float): Fraction of charges declined, between 0 and 1
+            seed (int): Seed for the declines, random if not given
+        """
+        self._latency_seconds = latency_seconds
+        self._decline_rate = decline_rate
+        self._random = random.Random(seed)
+        self._payment_ids = itertools.count(1)
+        self._refunded_payment_ids = set()
+        self._lock = threading.Lock()
+
+    def _complete(self, amount: float):
+        with self._lock:
+            if self._decline_rate and self._random.random() < self._decline_rate:
+                return None
+            return Payment(next(self._payment_ids), amount)
+
+    def _refund(self, payment: Payment):
+        with self._lock:
+            self._refunded_payment_ids.add(payment.get_payment_id())
+            return True
+
+    def is_refunded(self, payment: Payment):
+        """
+        Check whether a payment was refunded.
+
+        Args:
+            payment (Payment): The payment to check
+
+        Returns:
+            bool: True if the payment was refunded
+        """
+        with self._lock:
+            return payment.get_payment_id() in self._refunded_payment_ids
+
+    def charge(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount after the simulated latency.
+
+        Args:
+            idempotency_key (str): Key identifying this charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+        """
+        if self._latency_seconds:
+            time.sleep(self._latency_seconds)
+        return self._complete(amount)
+
+    async def charge_async(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount after the simulated latency, sleeping on the event loop.
+
+        Args:
+            idempotency_key (str): Key identifying this charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+        """
+        if self._latency_seconds:
+            await asyncio.sleep(self._latency_seconds)
+        return self._complete(amount)
+
+    def refund(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a payment after the simulated latency.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True, refunds are never refused
+        """
+        if self._latency_seconds:
+            time.sleep(self._latency_seconds)
+        return self._refund(payment)
+
+    async def refund_async(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a payment after the simulated latency, sleeping on the event loop.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True, refunds are never refused
+        """
+        if self._latency_seconds:
+            await asyncio.sleep(self._latency_seconds)
+        return self._refund(payment)
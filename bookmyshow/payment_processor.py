@@ -0,0 +1,165 @@
+import asyncio
+import concurrent.futures
+from idempotency_cache import IdempotencyCache
+from payment import Payment
+from payment_gateway import PaymentGateway
+
+class PaymentProcessor:
+    """
+    Payment stage of the booking flow.
+
+    Charges run against a pluggable PaymentGateway on the calling thread
+    (charge), on a thread pool (pay) or on the caller's event loop
+    (pay_async), so many payments can be in flight while their seats are
+    held. Every charge carries an
+    idempotency key; a retry with the same key, even one arriving while the
+    first charge is still running, returns the first charge's result
+    instead of charging again. Successful charges are remembered for a
+    configurable TTL; declined charges and charges that raised are
+    forgotten, so they can be retried with the same key.
+
+    A charge whose seats could not be booked after all is refunded with
+    refund or refund_async, which also forgets its key, so a retry charges
+    again rather than reusing the refunded payment.
+
+    Attributes:
+        _gateway (PaymentGateway): The gateway charges are sent to
+        _idempotency_cache (IdempotencyCache): Result of every recent charge by key
+        _executor (concurrent.futures.ThreadPoolExecutor): Pool running blocking charges
+    """
+
+    _gateway: PaymentGateway
+    _idempotency_cache: IdempotencyCache
+    _executor: concurrent.futures.ThreadPoolExecutor
+
+    def __init__(self, gateway: PaymentGateway, idempotency_ttl_seconds: float = 3600.0, max_workers: int = 16):
+        """
+        Initialize the payment stage.
+
+        Args:
+            gateway (PaymentGateway): The gateway charges are sent to
+            idempotency_ttl_seconds (float): How long a charge's result is remembered
+            max_workers (int): Number of threads running blocking charges
+        """
+        self._gateway = gateway
+        self._idempotency_cache = IdempotencyCache(idempotency_ttl_seconds)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="payment")
+
+    def get_gateway(self):
+        """
+        Get the gateway charges are sent to.
+
+        Returns:
+            PaymentGateway: The payment gateway
+        """
+        return self._gateway
+
+    def charge(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount on the calling thread.
+
+        Callers that wait for the payment anyway should use this rather than
+        pay, which would hand the charge to another thread and back.
+
+        Args:
+            idempotency_key (str): Key identifying the charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+
+        Raises:
+            Exception: Whatever the gateway raised
+        """
+        return self._idempotency_cache.run(idempotency_key, self._gateway.charge, idempotency_key, amount,
+                                           keep=lambda payment: payment is not None)
+
+    def pay(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount on the thread pool.
+
+        Args:
+            idempotency_key (str): Key identifying the charge
+            amount (float): The amount to charge
+
+        Returns:
+            concurrent.futures.Future: Resolves to the Payment, or None if declined
+        """
+        future, is_owner = self._idempotency_cache.get_or_start(idempotency_key)
+        if is_owner:
+            self._executor.submit(self._charge, idempotency_key, amount, future)
+        return future
+
+    def _charge(self, idempotency_key: str, amount: float, future: concurrent.futures.Future):
+        try:
+            payment = self._gateway.charge(idempotency_key, amount)
+        except BaseException as error:
+            self._idempotency_cache.fail(idempotency_key, future, error)
+            return
+        self._idempotency_cache.complete(idempotency_key, future, payment, payment is not None)
+
+    async def pay_async(self, idempotency_key: str, amount: float):
+        """
+        Charge an amount on the running event loop.
+
+        Args:
+            idempotency_key (str): Key identifying the charge
+            amount (float): The amount to charge
+
+        Returns:
+            Payment: The completed payment, or None if the charge was declined
+        """
+        future, is_owner = self._idempotency_cache.get_or_start(idempotency_key)
+        if not is_owner:
+            return await asyncio.wrap_future(future)
+        try:
+            payment = await self._gateway.charge_async(idempotency_key, amount)
+        except BaseException as error:
+            self._idempotency_cache.fail(idempotency_key, future, error)
+            raise
+        self._idempotency_cache.complete(idempotency_key, future, payment, payment is not None)
+        return payment
+
+    def refund(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a payment on the calling thread and forget its charge.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True if the payment was refunded, False if the gateway refused
+
+        Raises:
+            Exception: Whatever the gateway raised
+        """
+        refunded = self._gateway.refund(idempotency_key, payment)
+        if refunded:
+            self._idempotency_cache.discard(idempotency_key)
+        return refunded
+
+    async def refund_async(self, idempotency_key: str, payment: Payment):
+        """
+        Refund a payment on the running event loop and forget its charge.
+
+        Args:
+            idempotency_key (str): Key the payment was charged with
+            payment (Payment): The payment to refund
+
+        Returns:
+            bool: True if the payment was refunded, False if the gateway refused
+
+        Raises:
+            Exception: Whatever the gateway raised
+        """
+        refunded = await self._gateway.refund_async(idempotency_key, payment)
+        if refunded:
+            self._idempotency_cache.discard(idempotency_key)
+        return refunded
+
+    def close(self):
+        """
+        Wait for running charges and stop the thread pool.
+        """
+        self._executor.shutdown()
@@ -0,0 +1,243 @@
+import bisect
+import datetime
+import threading
+import time
+from enums.seat_category import SeatCategory
+from show import Show
+from typing import Dict, List, Sequence, Tuple
+
+# number of occupancy buckets quotes are rounded to (10 means steps of 10%)
+OCCUPANCY_BUCKETS = 10
+
+DEFAULT_BASE_PRICES = {
+    SeatCategory.SILVER: 150.0,
+    SeatCategory.GOLD: 250.0,
+    SeatCategory.PLATINUM: 400.0,
+}
+# (occupancy from which the multiplier applies, multiplier), ascending
+DEFAULT_OCCUPANCY_THRESHOLDS = ((0.0, 0.9), (0.5, 1.0), (0.75, 1.2), (0.9, 1.5))
+# (hours to show from which the multiplier applies, multiplier), ascending
+DEFAULT_HOURS_TO_SHOW_THRESHOLDS = ((0, 1.1), (3, 1.0), (24, 0.95))
+# multiplier per day of week, Monday first
+DEFAULT_DAY_OF_WEEK_MULTIPLIERS = (1.0, 1.0, 1.0, 1.0, 1.15, 1.25, 1.25)
+
+class _ShowPrices:
+    """
+    Prices of one show for every category, hours-to-show band and occupancy bucket.
+
+    Everything that depends only on the show's date and start time is
+    resolved here once: the day-of-week column of the price table and the
+    timestamps at which each hours-to-show band begins.
+
+    Attributes:
+        show_date (datetime.date): Date the prices were built for
+        show_start_time (int): Start time the prices were built for
+        band_starts (List[float]): Timestamps at which the hours left until the
+            show fall below each hours-to-show threshold, earliest first
+        category_vs_prices (Dict[SeatCategory, List[List[float]]]): Price per
+            category, position of the quote time among band_starts and occupancy bucket
+    """
+
+    __slots__ = ("show_date", "show_start_time", "band_starts", "category_vs_prices")
+
+    def __init__(self, show_date: datetime.date, show_start_time: int,
+                 price_table: Dict[SeatCategory, List[List[List[float]]]],
+                 hours_to_show_thresholds: Tuple[Tuple[int, float], ...]):
+        self.show_date = show_date
+        self.show_start_time = show_start_time
+        show_start = (datetime.datetime(show_date.year, show_date.month, show_date.day).timestamp()
+                      + show_start_time * 3600)
+        self.band_starts = [show_start - threshold * 3600 for threshold, _ in reversed(hours_to_show_thresholds)]
+        day_of_week = show_date.weekday()
+        # a quote time at position p among band_starts is in hours-to-show
+        # bucket len(band_starts) - p - 1, or bucket 0 once the show has started
+        bands = len(self.band_starts)
+        self.category_vs_prices = {
+            seat_category: [[occupancy_rows[occupancy_bucket][max(0, bands - position - 1)][day_of_week]
+                             for occupancy_bucket in range(len(occupancy_rows))]
+                            for position in range(bands + 1)]
+            for seat_category, occupancy_rows in price_table.items()}
+
+
+class PricingEngine:
+    """
+    Dynamic ticket prices per show and SeatCategory.
+
+    A price is the category's base price scaled by multipliers for the
+    show's occupancy, the hours left until it starts and the day of week it
+    runs on.
+
+    Everything that does not depend on the show is precomputed into a price
+    table indexed by category, occupancy bucket, hours-to-show bucket and day
+    of week; the table is rebuilt only when a threshold or base price
+    changes. The first quote of a show then slices the table for the show's
+    day and works out when each hours-to-show band begins, keyed by show id.
+    Later quotes only compare the clock with those band starts and read the
+    occupancy from the show's lock-free availability snapshot.
+
+    Attributes:
+        _category_vs_base_price (Dict[SeatCategory, float]): Base price per category
+        _occupancy_thresholds (Tuple[Tuple[float, float], ...]): Occupancy multipliers
+        _hours_to_show_thresholds (Tuple[Tuple[int, float], ...]): Hours-to-show multipliers
+        _day_of_week_multipliers (Tuple[float, ...]): Multiplier per day of week
+        _price_table (Dict[SeatCategory, List[List[List[float]]]]): Precomputed prices per
+            category, occupancy bucket, hours-to-show bucket and day of week
+        _show_id_vs_prices (Dict[int, _ShowPrices]): Precomputed prices of recently quoted shows
+        _cache_size (int): Maximum number of shows with precomputed prices
+        _lock (threading.Lock): Guards building precomputed prices and the price table
+    """
+
+    _category_vs_base_price: Dict[SeatCategory, float]
+    _occupancy_thresholds: Tuple[Tuple[float, float], ...]
+    _hours_to_show_thresholds: Tuple[Tuple[int, float], ...]
+    _day_of_week_multipliers: Tuple[float, ...]
+    _price_table: Dict[SeatCategory, List[List[List[float]]]]
+    _show_id_vs_prices: Dict[int, _ShowPrices]
+    _cache_size: int
+    _lock: threading.Lock
+
+    def __init__(self, category_vs_base_price: Dict[SeatCategory, float] = None,
+                 occupancy_thresholds: Sequence[Tuple[float, float]] = DEFAULT_OCCUPANCY_THRESHOLDS,
+                 hours_to_show_thresholds: Sequence[Tuple[int, float]] = DEFAULT_HOURS_TO_SHOW_THRESHOLDS,
+                 day_of_week_multipliers: Sequence[float] = DEFAULT_DAY_OF_WEEK_MULTIPLIERS,
+                 cache_size: int = 65536):
+        """
+        Initialize the engine and build its price table.
+
+        Args:
+            category_vs_base_price (Dict[SeatCategory, float]): Base price per category
+            occupancy_thresholds (Sequence[Tuple[float, float]]): (occupancy, multiplier) pairs
+            hours_to_show_thresholds (Sequence[Tuple[int, float]]): (hours to show, multiplier) pairs
+            day_of_week_multipliers (Sequence[float]): Multiplier per day of week, Monday first
+            cache_size (int): Maximum number of shows with precomputed prices
+        """
+        self._category_vs_base_price = dict(category_vs_base_price or DEFAULT_BASE_PRICES)
+        self._occupancy_thresholds = tuple(occupancy_thresholds)
+        self._hours_to_show_thresholds = tuple(hours_to_show_thresholds)
+        self._day_of_week_multipliers = tuple(day_of_week_multipliers)
+        self._cache_size = cache_size
+        self._show_id_vs_prices = {}
+        self._lock = threading.Lock()
+        self._build_price_table()
+
+    @staticmethod
+    def _multiplier(thresholds: Sequence[Tuple[float, float]], value: float):
+        multiplier = 1.0
+        for threshold, threshold_multiplier in thresholds:
+            if value >= threshold:
+                multiplier = threshold_multiplier
+        return multiplier
+
+    def _build_price_table(self):
+        price_table = {}
+        for seat_category, base_price in self._category_vs_base_price.items():
+            occupancy_rows = []
+            for bucket in range(OCCUPANCY_BUCKETS + 1):
+                occupancy_multiplier = self._multiplier(self._occupancy_thresholds, bucket / OCCUPANCY_BUCKETS)
+                hours_rows = []
+                for hours_threshold, hours_multiplier in self._hours_to_show_thresholds:
+                    hours_rows.append([round(base_price * occupancy_multiplier * hours_multiplier * day_multiplier, 2)
+                                       for day_multiplier in self._day_of_week_multipliers])
+                occupancy_rows.append(hours_rows)
+            price_table[seat_category] = occupancy_rows
+        with self._lock:
+            self._price_table = price_table
+            self._show_id_vs_prices = {}
+
+    def set_base_price(self, seat_category: SeatCategory, base_price: float):
+        """
+        Change the base price of a category and rebuild the price table.
+
+        Args:
+            seat_category (SeatCategory): The category to change
+            base_price (float): The new base price
+        """
+        self._category_vs_base_price[seat_category] = base_price
+        self._build_price_table()
+
+    def set_occupancy_thresholds(self, occupancy_thresholds: Sequence[Tuple[float, float]]):
+        """
+        Change the occupancy multipliers and rebuild the price table.
+
+        Args:
+            occupancy_thresholds (Sequence[Tuple[float, float]]): (occupancy, multiplier)
+                pairs in ascending order of occupancy
+        """
+        self._occupancy_thresholds = tuple(occupancy_thresholds)
+        self._build_price_table()
+
+    def set_hours_to_show_thresholds(self, hours_to_show_thresholds: Sequence[Tuple[int, float]]):
+        """
+        Change the hours-to-show multipliers and rebuild the price table.
+
+        Args:
+            hours_to_show_thresholds (Sequence[Tuple[int, float]]): (hours to show, multiplier)
+                pairs in ascending order of hours
+        """
+        self._hours_to_show_thresholds = tuple(hours_to_show_thresholds)
+        self._build_price_table()
+
+    def _get_show_prices(self, show: Show):
+        # read without the lock; a show is only built under it, and an entry
+        # is never changed once published
+        show_prices = self._show_id_vs_prices.get(show.get_show_id())
+        if (show_prices is not None and show_prices.show_date == show.get_show_date()
+                and show_prices.show_start_time == show.get_show_start_time()):
+            return show_prices
+        with self._lock:
+            show_prices = _ShowPrices(show.get_show_date(), show.get_show_start_time(), self._price_table,
+                                      self._hours_to_show_thresholds)
+            if len(self._show_id_vs_prices) >= self._cache_size:
+                self._show_id_vs_prices = {}
+            self._show_id_vs_prices[show.get_show_id()] = show_prices
+            return show_prices
+
+    @staticmethod
+    def _price(show: Show, show_prices: _ShowPrices, seat_category: SeatCategory, timestamp: float):
+        availability = show.get_availability()
+        capacity = availability.get_capacity(seat_category)
+        if capacity:
+            booked = capacity - availability.get_snapshot().get_seats_left(seat_category)
+            occupancy_bucket = booked * OCCUPANCY_BUCKETS // capacity
+        else:
+            occupancy_bucket = 0
+        position = bisect.bisect_left(show_prices.band_starts, timestamp)
+        return show_prices.category_vs_prices[seat_category][position][occupancy_bucket]
+
+    def quote(self, show: Show, seat_category: SeatCategory, now: datetime.datetime = None):
+        """
+        Get the current price of one seat of a category for a show.
+
+        Args:
+            show (Show): The show to price
+            seat_category (SeatCategory): The category of the seat
+            now (datetime.datetime): Time of the quote, the current time if not given
+
+        Returns:
+            float: The price of one seat
+        """
+        timestamp = time.time() if now is None else now.timestamp()
+        return self._price(show, self._get_show_prices(show), seat_category, timestamp)
+
+    def quote_seats(self, show: Show, seat_ids: Sequence[int], now: datetime.datetime = None):
+        """
+        Get the total price of a group of seats for a show.
+
+        Each category is priced once, however many of its seats are quoted.
+
+        Args:
+            show (Show): The show to price
+            seat_ids (Sequence[int]): Ids of the seats
+            now (datetime.datetime): Time of the quote, the current time if not given
+
+        Returns:
+            float: The total price of the seats
+        """
+        timestamp = time.time() if now is None else now.timestamp()
+        show_prices = self._get_show_prices(show)
+        category_vs_count = {}
+        for seat in show.get_screen().get_seats_by_ids(seat_ids):
+            seat_category = seat.get_seat_category()
+            category_vs_count[seat_category] = category_vs_count.get(seat_category, 0) + 1
+        return round(sum(self._price(show, show_prices, seat_category, timestamp) * count
+                         for seat_category, count in category_vs_count.items()), 2)
@@ -1,5 +1,6 @@
 from seat import Seat
-from typing import List
+from seat_layout import SeatLayout
+from typing import Dict, Iterable, List
 
 class Screen:
     """
@@ -9,13 +10,37 @@ class Screen:
     identifier and the seats available on that screen. Each screen can have
     multiple seats of different categories (Silver, Gold, Platinum).
     
+    Seats are either given as a list of Seat objects or as a shared SeatLayout;
+    screens with the same seating plan should use the same interned layout.
+    
     Attributes:
         _screen_id (int): Unique identifier for the screen
         _seats (List[Seat]): List of seats available on this screen
+        _layout (SeatLayout): Shared seat layout, None when seats are set directly
+        _seat_id_vs_seat (Dict[int, Seat]): Seats set directly, indexed by seat id
     """
 
+    __slots__ = ("_screen_id", "_seats", "_layout", "_seat_id_vs_seat")
+
     _screen_id: int
     _seats: List[Seat]
+    _layout: SeatLayout
+    _seat_id_vs_seat: Dict[int, Seat]
+
+    def __init__(self, screen_id: int = None, seats: List[Seat] = None, layout: SeatLayout = None):
+        """
+        Initialize a screen from a list of seats or a shared seat layout.
+        
+        Args:
+            screen_id (int): The unique identifier of the screen
+            seats (List[Seat]): Seats of the screen, no seats if not given
+            layout (SeatLayout): Shared seat layout, used instead of seats when given
+        """
+        self._screen_id = screen_id
+        if layout is not None:
+            self.set_layout(layout)
+        else:
+            self.set_seats(seats if seats is not None else [])
 
     def get_screen_id(self):
         """
@@ -42,6 +67,8 @@ class Screen:
         Returns:
             List[Seat]: List of all seats on the screen
         """
+        if self._layout is not None:
+            return self._layout.get_seats()
         return self._seats
 
     def set_seats(self, seats: List[Seat]):
@@ -52,3 +79,56 @@ class Screen:
             seats (List[Seat]): List of seats to assign to the screen
         """
         self._seats = seats
+        self._layout = None
+        self._seat_id_vs_seat = {seat.get_seat_id(): seat for seat in seats}
+
+    def get_seats_by_ids(self, seat_ids: Iterable[int]):
+        """
+        Get the seats for a group of seat ids without scanning the screen.
+        
+        Args:
+            seat_ids (Iterable[int]): The seat ids to look up
+            
+        Returns:
+            List[Seat]: Seats in the order of the given ids
+            
+        Raises:
+            KeyError: If any seat id is not on this screen
+        """
+        if self._layout is not None:
+            return self._layout.get_seats_by_ids(seat_ids)
+        return [self._seat_id_vs_seat[seat_id] for seat_id in seat_ids]
+
+    def has_seat(self, seat_id: int):
+        """
+        Check whether a seat id is on this screen.
+        
+        Args:
+            seat_id (int): The seat id to check
+            
+        Returns:
+            bool: True if the screen has the seat
+        """
+        if self._layout is not None:
+            return self._layout.has_seat(seat_id)
+        return seat_id in self._seat_id_vs_seat
+
+    def get_layout(self):
+        """
+        Get the shared seat layout of this screen.
+        
+        Returns:
+            SeatLayout: The seat layout, or None if seats were set directly
+        """
+        return self._layout
+
+    def set_layout(self, layout: SeatLayout):
+        """
+        Set a shared seat layout for this screen.
+        
+        Args:
+            layout (SeatLayout): The interned layout to use
+        """
+        self._layout = layout
+        self._seats = None
+        self._seat_id_vs_seat = None
@@ -13,10 +13,25 @@ class Seat:
         _row (int): Row number where the seat is located
         _seat_category (SeatCategory): Category of the seat (SILVER, GOLD, PLATINUM)
     """
+    __slots__ = ("_seat_id", "_row", "_seat_category")
+
     _seat_id: int
     _row: int
     _seat_category: SeatCategory
 
+    def __init__(self, seat_id: int = None, row: int = None, seat_category: SeatCategory = None):
+        """
+        Initialize a seat.
+        
+        Args:
+            seat_id (int): The unique identifier of the seat
+            row (int): The row number of the seat
+            seat_category (SeatCategory): The seat category (SILVER, GOLD, or PLATINUM)
+        """
+        self._seat_id = seat_id
+        self._row = row
+        self._seat_category = seat_category
+
     def get_seat_id(self):
         """
         Get the unique identifier of the seat.
@@ -0,0 +1,196 @@
+from enums.seat_category import SeatCategory
+from screen import Screen
+from seat_inventory import SeatInventory
+from seat_lock_manager import SeatLockManager
+from typing import Dict, List
+
+class _FreeRunTree:
+    """
+    Segment tree over a line of seat positions tracking runs of free seats.
+
+    Every node stores the length of the free run touching its left edge
+    (prefix), its right edge (suffix) and the longest free run inside it, so
+    the leftmost run of N free positions can be found in O(log n).
+    """
+
+    def __init__(self, free: List[bool]):
+        self._size = len(free)
+        self._prefix = [0] * (4 * max(self._size, 1))
+        self._suffix = [0] * (4 * max(self._size, 1))
+        self._best = [0] * (4 * max(self._size, 1))
+        if self._size:
+            self._build(1, 0, self._size - 1, free)
+
+    def _pull(self, node: int, lo: int, mid: int, hi: int):
+        left, right = 2 * node, 2 * node + 1
+        left_len, right_len = mid - lo + 1, hi - mid
+        self._prefix[node] = self._prefix[left] + (self._prefix[right] if self._prefix[left] == left_len else 0)
+        self._suffix[node] = self._suffix[right] + (self._suffix[left] if self._suffix[right] == right_len else 0)
+        self._best[node] = max(self._best[left], self._best[right], self._suffix[left] + self._prefix[right])
+
+    def _build(self, node: int, lo: int, hi: int, free: List[bool]):
+        if lo == hi:
+            value = 1 if free[lo] else 0
+            self._prefix[node] = self._suffix[node] = self._best[node] = value
+            return
+        mid = (lo + hi) // 2
+        self._build(2 * node, lo, mid, free)
+        self._build(2 * node + 1, mid + 1, hi, free)
+        self._pull(node, lo, mid, hi)
+
+    def update(self, position: int, is_free: bool):
+        node, lo, hi = 1, 0, self._size - 1
+        path = []
+        while lo != hi:
+            mid = (lo + hi) // 2
+            path.append((node, lo, mid, hi))
+            if position <= mid:
+                node, hi = 2 * node, mid
+            else:
+                node, lo = 2 * node + 1, mid + 1
+        value = 1 if is_free else 0
+        self._prefix[node] = self._suffix[node] = self._best[node] = value
+        for node, lo, mid, hi in reversed(path):
+            self._pull(node, lo, mid, hi)
+
+    def longest_run(self):
+        return self._best[1] if self._size else 0
+
+    def find_run(self, length: int):
+        """Return the start position of the leftmost free run of the given length, or -1."""
+        if length <= 0 or self.longest_run() < length:
+            return -1
+        node, lo, hi = 1, 0, self._size - 1
+        while lo != hi:
+            mid = (lo + hi) // 2
+            left, right = 2 * node, 2 * node + 1
+            if self._best[left] >= length:
+                node, hi = left, mid
+            elif self._suffix[left] + self._prefix[right] >= length:
+                return mid - self._suffix[left] + 1
+            else:
+                node, lo = right, mid + 1
+        return lo
+
+
+class SeatAllocator:
+    """
+    Finds blocks of contiguous free seats of a category for a show.
+
+    For every SeatCategory the seats are laid out row by row (ordered by row,
+    then seat id) with a permanently occupied gap between rows, and a free-run
+    segment tree is kept over that line. Finding the best block of N seats
+    together is then O(log n) instead of a rescan of the screen. The best block
+    is the leftmost one in the lowest-numbered row that can fit the group.
+
+    The allocator listens to the show's seat inventory, so bookings and
+    cancellations made through any path keep the trees up to date.
+
+    Attributes:
+        _category_vs_tree (Dict[SeatCategory, _FreeRunTree]): Free-run tree per category
+        _category_vs_positions (Dict[SeatCategory, List[int]]): Seat id at each tree
+            position per category, -1 for the gaps between rows
+        _seat_id_vs_position (Dict[int, tuple]): Category and tree position of each seat id
+    """
+
+    _category_vs_tree: Dict[SeatCategory, _FreeRunTree]
+    _category_vs_positions: Dict[SeatCategory, List[int]]
+    _seat_id_vs_position: Dict[int, tuple]
+
+    def __init__(self, screen: Screen, seat_inventory: SeatInventory):
+        """
+        Build the free-run trees for a show and subscribe to its inventory.
+
+        Args:
+            screen (Screen): The screen whose layout is allocated
+            seat_inventory (SeatInventory): The show's seat inventory
+        """
+        self._category_vs_tree = {}
+        self._category_vs_positions = {}
+        self._seat_id_vs_position = {}
+
+        category_vs_seats = {}
+        for seat in screen.get_seats():
+            category_vs_seats.setdefault(seat.get_seat_category(), []).append(seat)
+
+        for category, seats in category_vs_seats.items():
+            seats.sort(key=lambda seat: (seat.get_row(), seat.get_seat_id()))
+            positions = []
+            free = []
+            previous_row = None
+            for seat in seats:
+                if previous_row is not None and seat.get_row() != previous_row:
+                    positions.append(-1)
+                    free.append(False)
+                previous_row = seat.get_row()
+                self._seat_id_vs_position[seat.get_seat_id()] = (category, len(positions))
+                positions.append(seat.get_seat_id())
+                free.append(not seat_inventory.is_booked(seat.get_seat_id()))
+            self._category_vs_positions[category] = positions
+            self._category_vs_tree[category] = _FreeRunTree(free)
+
+        seat_inventory.add_listener(self._on_seats_changed)
+
+    def _on_seats_changed(self, seat_ids: List[int], booked: bool):
+        for seat_id in seat_ids:
+            position = self._seat_id_vs_position.get(seat_id)
+            if position is not None:
+                category, index = position
+                self._category_vs_tree[category].update(index, not booked)
+
+    def get_longest_block(self, seat_category: SeatCategory):
+        """
+        Get the size of the largest group that can still sit together.
+
+        Args:
+            seat_category (SeatCategory): The category to look in
+
+        Returns:
+            int: Length of the longest run of free seats in one row
+        """
+        tree = self._category_vs_tree.get(seat_category)
+        return tree.longest_run() if tree else 0
+
+    def find_best_block(self, seat_category: SeatCategory, count: int):
+        """
+        Find the best block of contiguous free seats without booking it.
+
+        Args:
+            seat_category (SeatCategory): The category to look in
+            count (int): Number of seats needed together
+
+        Returns:
+            List[int]: Ids of the seats in the block, or None if no block fits
+        """
+        tree = self._category_vs_tree.get(seat_category)
+        if tree is None:
+            return None
+        start = tree.find_run(count)
+        if start < 0:
+            return None
+        return self._category_vs_positions[seat_category][start:start + count]
+
+    def hold_best_block(self, seat_lock_manager: SeatLockManager, seat_category: SeatCategory, count: int):
+        """
+        Find the best block of seats and hold it in one step.
+
+        The search and the hold run under the show's lock, so no other thread
+        can take the seats in between.
+
+        Args:
+            seat_lock_manager (SeatLockManager): The show's seat lock manager
+            seat_category (SeatCategory): The category to look in
+            count (int): Number of seats needed together
+
+        Returns:
+            tuple: (hold id, list of seat ids), or None if no block fits
+        """
+        with seat_lock_manager.get_lock():
+            seat_lock_manager.expire_holds()
+            seat_ids = self.find_best_block(seat_category, count)
+            if seat_ids is None:
+                return None
+            hold_id = seat_lock_manager.hold_seats(seat_ids)
+            if hold_id is None:
+                return None
+            return hold_id, seat_ids
@@ -0,0 +1,253 @@
+from typing import Callable, Iterable, List
+
+# number of set bits for every possible byte value, used for popcount
+_POPCOUNT_TABLE = bytes(bin(i).count("1") for i in range(256))
+
+class SeatInventory:
+    """
+    Tracks seat availability for a single show.
+
+    Seats are stored in a compact bitmap (one bit per seat index) backed by a
+    bytearray, so checking, booking and freeing a seat are all O(1) and a
+    500-seat screen needs only 63 bytes of state per show. Each show owns its
+    own inventory, so bookings never leak between shows.
+
+    Structures derived from the bitmap can subscribe with add_listener to be
+    told about every change instead of rescanning it.
+
+    Attributes:
+        _capacity (int): Number of seat indexes tracked by the inventory
+        _bitmap (bytearray): One bit per seat, set when the seat is booked
+        _booked_count (int): Number of bits currently set
+        _listeners (List[Callable[[List[int], bool], None]]): Callbacks told about
+            changed seat indexes and whether they were booked or freed
+    """
+
+    _capacity: int
+    _bitmap: bytearray
+    _booked_count: int
+    _listeners: List[Callable[[List[int], bool], None]]
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an inventory where every seat is available.
+
+        Args:
+            capacity (int): Number of seat indexes to track (0 to capacity - 1)
+        """
+        self._capacity = capacity
+        self._bitmap = bytearray((capacity + 7) // 8)
+        self._booked_count = 0
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[List[int], bool], None]):
+        """
+        Register a callback for seat changes.
+
+        The callback receives the list of changed seat indexes and True if
+        they were booked or False if they were freed.
+
+        Args:
+            listener (Callable[[List[int], bool], None]): The callback to register
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[int], bool], None]):
+        """
+        Unregister a callback added with add_listener.
+
+        Args:
+            listener (Callable[[List[int], bool], None]): The callback to remove
+        """
+        self._listeners.remove(listener)
+
+    def _notify(self, seat_indexes: List[int], booked: bool):
+        for listener in self._listeners:
+            listener(seat_indexes, booked)
+
+    def get_capacity(self):
+        """
+        Get the number of seats tracked by this inventory.
+
+        Returns:
+            int: The seat capacity
+        """
+        return self._capacity
+
+    def is_booked(self, seat_index: int):
+        """
+        Check whether a seat is booked.
+
+        Args:
+            seat_index (int): Index of the seat to check
+
+        Returns:
+            bool: True if the seat is booked, False otherwise
+        """
+        self._check_index(seat_index)
+        return bool(self._bitmap[seat_index >> 3] & (1 << (seat_index & 7)))
+
+    def reserve(self, seat_index: int):
+        """
+        Book a single seat if it is available.
+
+        Args:
+            seat_index (int): Index of the seat to book
+
+        Returns:
+            bool: True if the seat was booked, False if it was already taken
+        """
+        self._check_index(seat_index)
+        byte_index = seat_index >> 3
+        mask = 1 << (seat_index & 7)
+        if self._bitmap[byte_index] & mask:
+            return False
+        self._bitmap[byte_index] |= mask
+        self._booked_count += 1
+        if self._listeners:
+            self._notify([seat_index], True)
+        return True
+
+    def reserve_many(self, seat_indexes: Iterable[int]):
+        """
+        Book several seats together.
+
+        Either every requested seat is booked or none of them are; if any
+        seat is already taken (or requested twice) the inventory is left
+        untouched.
+
+        Args:
+            seat_indexes (Iterable[int]): Indexes of the seats to book
+
+        Returns:
+            bool: True if all seats were booked, False otherwise
+        """
+        seat_indexes = list(seat_indexes)
+        if len(set(seat_indexes)) != len(seat_indexes):
+            return False
+        for seat_index in seat_indexes:
+            if self.is_booked(seat_index):
+                return False
+        for seat_index in seat_indexes:
+            self._bitmap[seat_index >> 3] |= 1 << (seat_index & 7)
+        self._booked_count += len(seat_indexes)
+        if self._listeners and seat_indexes:
+            self._notify(seat_indexes, True)
+        return True
+
+    def release(self, seat_index: int):
+        """
+        Free a booked seat.
+
+        Args:
+            seat_index (int): Index of the seat to free
+
+        Returns:
+            bool: True if the seat was freed, False if it was not booked
+        """
+        self._check_index(seat_index)
+        byte_index = seat_index >> 3
+        mask = 1 << (seat_index & 7)
+        if not self._bitmap[byte_index] & mask:
+            return False
+        self._bitmap[byte_index] &= ~mask & 0xFF
+        self._booked_count -= 1
+        if self._listeners:
+            self._notify([seat_index], False)
+        return True
+
+    def get_booked_count(self):
+        """
+        Get the number of booked seats.
+
+        Returns:
+            int: The number of booked seats
+        """
+        return self._booked_count
+
+    def get_seats_left(self):
+        """
+        Get the number of seats still available.
+
+        Returns:
+            int: The number of available seats
+        """
+        return self._capacity - self._booked_count
+
+    def count_booked(self):
+        """
+        Count booked seats directly from the bitmap.
+
+        This is a popcount over the whole bitmap and is mainly useful to
+        verify the running counter used by get_booked_count.
+
+        Returns:
+            int: The number of set bits in the bitmap
+        """
+        return sum(_POPCOUNT_TABLE[byte] for byte in self._bitmap)
+
+    def get_booked_seat_indexes(self):
+        """
+        Get the indexes of all booked seats in ascending order.
+
+        Returns:
+            List[int]: Indexes of booked seats
+        """
+        booked: List[int] = []
+        for byte_index, byte in enumerate(self._bitmap):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    booked.append((byte_index << 3) | bit)
+        return booked
+
+    def get_bitmap(self):
+        """
+        Get a copy of the raw seat bitmap.
+
+        Bit i of byte i // 8 is set when seat index i is booked.
+
+        Returns:
+            bytes: The bitmap
+        """
+        return bytes(self._bitmap)
+
+    def write_bitmap_into(self, buffer: bytearray, offset: int = 0):
+        """
+        Copy the raw seat bitmap into a buffer without an intermediate copy.
+
+        Args:
+            buffer (bytearray): Buffer to write to, at least offset + get_bitmap_size() long
+            offset (int): Position in the buffer of the first bitmap byte
+        """
+        buffer[offset:offset + len(self._bitmap)] = self._bitmap
+
+    def get_bitmap_size(self):
+        """
+        Get the size of the raw seat bitmap.
+
+        Returns:
+            int: Number of bytes in the bitmap
+        """
+        return len(self._bitmap)
+
+    def clear(self):
+        """
+        Mark every seat as available.
+        """
+        freed = self.get_booked_seat_indexes() if self._listeners else []
+        self._bitmap = bytearray(len(self._bitmap))
+        self._booked_count = 0
+        if freed:
+            self._notify(freed, False)
+
+    def __getstate__(self):
+        # listeners belong to the structures of this process and are not copied
+        state = self.__dict__.copy()
+        state["_listeners"] = []
+        return state
+
+    def _check_index(self, seat_index: int):
+        if not 0 <= seat_index < self._capacity:
+            raise IndexError("seat index " + str(seat_index) + " out of range")
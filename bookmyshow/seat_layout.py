@@ -0,0 +1,258 @@
+import hashlib
+import sys
+import weakref
+from array import array
+from enums.seat_category import SeatCategory
+from seat import Seat
+from typing import Dict, Iterable, List, Tuple
+
+# SeatCategory members in a fixed order, so each category is stored as a small code
+_CATEGORIES = tuple(SeatCategory)
+_CATEGORY_VS_CODE = {category: code for code, category in enumerate(_CATEGORIES)}
+# bytes of the content hash used as layout id: 48 bits make collisions negligible for
+# any realistic number of layouts and keep the id exact as a JSON number
+_LAYOUT_ID_BYTES = 6
+
+def _content_id(seat_ids: array, rows: array, category_codes: array):
+    # the arrays are hashed little-endian so every process and platform
+    # derives the same id for the same seating plan
+    digest = hashlib.blake2b(digest_size=_LAYOUT_ID_BYTES, person=b"seat-layout")
+    for column in (seat_ids, rows, category_codes):
+        if sys.byteorder == "big" and column.itemsize > 1:
+            column = array(column.typecode, column)
+            column.byteswap()
+        digest.update(column.tobytes())
+    return int.from_bytes(digest.digest(), "little")
+
+class SeatView:
+    """
+    Read-only view of one seat in a SeatLayout.
+
+    Exposes the same getters as Seat, but holds only a reference to the
+    layout and the seat's position in it.
+    """
+
+    __slots__ = ("_layout", "_index")
+
+    def __init__(self, layout: "SeatLayout", index: int):
+        self._layout = layout
+        self._index = index
+
+    def get_seat_id(self):
+        """
+        Get the unique identifier of the seat.
+
+        Returns:
+            int: The seat ID
+        """
+        return self._layout._seat_ids[self._index]
+
+    def get_row(self):
+        """
+        Get the row number where the seat is located.
+
+        Returns:
+            int: The row number
+        """
+        return self._layout._rows[self._index]
+
+    def get_seat_category(self):
+        """
+        Get the category of the seat.
+
+        Returns:
+            SeatCategory: The seat category (SILVER, GOLD, or PLATINUM)
+        """
+        return _CATEGORIES[self._layout._category_codes[self._index]]
+
+
+class SeatLayout:
+    """
+    Immutable, shareable seat layout of a screen.
+
+    A layout stores seat ids, rows and category codes in flat arrays instead
+    of one Seat object per seat. Layouts are interned: building the same
+    layout twice returns the same instance, so every screen with an identical
+    seating plan shares one copy. Seat views are only created the first time
+    get_seats is called and are shared as well. The layout id is a hash of
+    the seats, so the same seating plan has the same id after a restart and
+    in every process.
+
+    Per-show state such as booked seats is never stored here; it lives in each
+    show's SeatInventory.
+
+    Attributes:
+        _layout_id (int): Content hash identifying the seating plan
+        _seat_ids (array): Seat id of each seat
+        _rows (array): Row of each seat
+        _category_codes (array): SeatCategory code of each seat
+        _seats (Tuple[SeatView, ...]): Lazily created seat views
+        _seat_id_vs_index (Dict[int, int]): Position of each seat id in the layout
+        _max_seat_id (int): Largest seat id, -1 for a layout without seats
+    """
+
+    __slots__ = ("_layout_id", "_seat_ids", "_rows", "_category_codes", "_seats", "_seat_id_vs_index",
+                 "_max_seat_id", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __init__(self, layout_id: int, seat_ids: array, rows: array, category_codes: array):
+        """
+        Create a layout from its arrays; use SeatLayout.intern instead.
+
+        Args:
+            layout_id (int): Content hash of the arrays
+            seat_ids (array): Seat id of each seat
+            rows (array): Row of each seat
+            category_codes (array): SeatCategory code of each seat
+        """
+        self._layout_id = layout_id
+        self._seat_ids = seat_ids
+        self._rows = rows
+        self._category_codes = category_codes
+        self._seats = None
+        self._seat_id_vs_index = {seat_id: index for index, seat_id in enumerate(seat_ids)}
+        self._max_seat_id = max(seat_ids, default=-1)
+
+    @classmethod
+    def intern(cls, seats: Iterable[Tuple[int, int, SeatCategory]]):
+        """
+        Get the shared layout for a seating plan, creating it if needed.
+
+        Args:
+            seats (Iterable[Tuple[int, int, SeatCategory]]): (seat id, row, category)
+                of every seat on the screen
+
+        Returns:
+            SeatLayout: The interned layout
+        """
+        seat_ids = array("i")
+        rows = array("i")
+        category_codes = array("b")
+        for seat_id, row, seat_category in seats:
+            seat_ids.append(seat_id)
+            rows.append(row)
+            category_codes.append(_CATEGORY_VS_CODE[seat_category])
+
+        return cls._intern_arrays(seat_ids, rows, category_codes)
+
+    @classmethod
+    def _intern_arrays(cls, seat_ids: array, rows: array, category_codes: array):
+        key = (seat_ids.tobytes(), rows.tobytes(), category_codes.tobytes())
+        layout = cls._interned.get(key)
+        if layout is None:
+            layout = cls(_content_id(seat_ids, rows, category_codes), seat_ids, rows, category_codes)
+            cls._interned[key] = layout
+        return layout
+
+    @classmethod
+    def from_seats(cls, seats: Iterable[Seat]):
+        """
+        Get the shared layout matching a list of Seat objects.
+
+        Args:
+            seats (Iterable[Seat]): The seats of the screen
+
+        Returns:
+            SeatLayout: The interned layout
+        """
+        return cls.intern((seat.get_seat_id(), seat.get_row(), seat.get_seat_category()) for seat in seats)
+
+    def __reduce__(self):
+        # layouts are re-interned when unpickled, so copies sent to another
+        # process are shared there as well
+        return _unpickle_layout, (self._seat_ids, self._rows, self._category_codes)
+
+    def get_layout_id(self):
+        """
+        Get the identifier of the layout.
+
+        The id is derived from the seats alone, so equal layouts built in
+        different processes or runs share it.
+
+        Returns:
+            int: The layout ID, below 2 ** 48
+        """
+        return self._layout_id
+
+    def get_seats(self):
+        """
+        Get read-only views of all seats in the layout.
+
+        Returns:
+            Tuple[SeatView, ...]: Seat views in layout order
+        """
+        if self._seats is None:
+            self._seats = tuple(SeatView(self, index) for index in range(len(self._seat_ids)))
+        return self._seats
+
+    def get_seat_index(self, seat_id: int):
+        """
+        Get the position of a seat id in the layout.
+
+        Args:
+            seat_id (int): The seat id to look up
+
+        Returns:
+            int: Position of the seat in the layout
+
+        Raises:
+            KeyError: If the seat id is not part of the layout
+        """
+        return self._seat_id_vs_index[seat_id]
+
+    def has_seat(self, seat_id: int):
+        """
+        Check whether a seat id is part of the layout.
+
+        Args:
+            seat_id (int): The seat id to check
+
+        Returns:
+            bool: True if the layout has the seat
+        """
+        return seat_id in self._seat_id_vs_index
+
+    def get_seats_by_ids(self, seat_ids: Iterable[int]):
+        """
+        Get the seat views for a group of seat ids.
+
+        Args:
+            seat_ids (Iterable[int]): The seat ids to look up
+
+        Returns:
+            List[SeatView]: Seat views in the order of the given ids
+
+        Raises:
+            KeyError: If any seat id is not part of the layout
+        """
+        seats = self.get_seats()
+        return [seats[self._seat_id_vs_index[seat_id]] for seat_id in seat_ids]
+
+    def get_seat_ids(self):
+        """
+        Get the seat ids of the layout without creating seat views.
+
+        Layouts are shared by every screen with the same seats, so the
+        caller gets its own copy rather than the layout's array.
+
+        Returns:
+            array: Copy of the seat id of each seat in layout order
+        """
+        return self._seat_ids[:]
+
+    def get_max_seat_id(self):
+        """
+        Get the largest seat id of the layout.
+
+        Returns:
+            int: The largest seat id, -1 if the layout has no seats
+        """
+        return self._max_seat_id
+
+    def __len__(self):
+        return len(self._seat_ids)
+
+
+def _unpickle_layout(seat_ids: array, rows: array, category_codes: array):
+    return SeatLayout._intern_arrays(seat_ids, rows, category_codes)
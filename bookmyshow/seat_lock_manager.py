@@ -0,0 +1,346 @@
+import contextlib
+import threading
+import time
+from enums.seat_event import SeatEvent
+from seat_inventory import SeatInventory
+from timer_wheel import TimerWheel
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+class SeatLockManager:
+    """
+    Thread-safe seat holds and bookings for a single show.
+
+    A hold temporarily books seats in the show's seat inventory while payment
+    runs. The hold is either confirmed, which makes the booking permanent, or
+    released; holds that are neither confirmed nor released within their TTL
+    expire automatically through a timer wheel and their seats become
+    available again. Expired holds are swept on every call, so no background
+    thread is needed.
+
+    Listeners registered with add_listener are told about every SeatEvent,
+    for example to record it in the booking journal.
+
+    All operations on one show are serialized by the show's own lock, so
+    different shows can be booked in parallel.
+
+    Attributes:
+        _seat_inventory (SeatInventory): Inventory of the show being guarded
+        _hold_ttl_seconds (float): How long a hold lasts before it expires
+        _clock (Callable[[], float]): Source of the current time
+        _is_seat (Callable[[int], bool]): Tells whether a seat id exists on the show's screen
+        _lock (threading.RLock): Lock guarding this show
+        _holds (Dict[int, List[int]]): Mapping of hold ids to the seats they hold
+        _expiry_wheel (TimerWheel): Timer wheel tracking hold expiry
+        _next_hold_id (int): Id assigned to the next hold
+        _listeners (List[Callable[[SeatEvent, int, List[int]], None]]): Callbacks told
+            about every seat event with its hold id and seat ids
+    """
+
+    _seat_inventory: SeatInventory
+    _hold_ttl_seconds: float
+    _clock: Callable[[], float]
+    _is_seat: Callable[[int], bool]
+    _lock: threading.RLock
+    _holds: Dict[int, List[int]]
+    _expiry_wheel: TimerWheel
+    _next_hold_id: int
+    _listeners: List[Callable[[SeatEvent, int, List[int]], None]]
+
+    def __init__(self, seat_inventory: SeatInventory, hold_ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic, is_seat: Callable[[int], bool] = None):
+        """
+        Initialize a lock manager for a show.
+
+        Args:
+            seat_inventory (SeatInventory): Inventory of the show
+            hold_ttl_seconds (float): How long a hold lasts before it expires
+            clock (Callable[[], float]): Source of the current time
+            is_seat (Callable[[int], bool]): Tells whether a seat id exists on the show's
+                                             screen; any id within the inventory if not given
+        """
+        self._seat_inventory = seat_inventory
+        self._hold_ttl_seconds = hold_ttl_seconds
+        self._clock = clock
+        self._is_seat = is_seat
+        self._lock = threading.RLock()
+        self._holds = {}
+        self._expiry_wheel = TimerWheel(start_time=clock())
+        self._next_hold_id = 1
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[SeatEvent, int, List[int]], None]):
+        """
+        Register a callback for seat events.
+
+        The callback runs under the show's lock and receives the event, the
+        hold id (0 for direct bookings) and the seat ids involved.
+
+        Args:
+            listener (Callable[[SeatEvent, int, List[int]], None]): The callback to register
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, seat_event: SeatEvent, hold_id: int, seat_ids: List[int]):
+        for listener in self._listeners:
+            listener(seat_event, hold_id, seat_ids)
+
+    def get_lock(self):
+        """
+        Get the lock guarding this show.
+
+        Returns:
+            threading.RLock: The lock of this show
+        """
+        return self._lock
+
+    def check_seat_ids(self, seat_ids: Iterable[int]):
+        """
+        Check that every seat id exists on the show's screen.
+
+        Args:
+            seat_ids (Iterable[int]): The seat ids to check
+
+        Raises:
+            ValueError: If any seat id is unknown
+        """
+        if self._is_seat is not None:
+            unknown = [seat_id for seat_id in seat_ids if not self._is_seat(seat_id)]
+        else:
+            capacity = self._seat_inventory.get_capacity()
+            unknown = [seat_id for seat_id in seat_ids if not 0 <= seat_id < capacity]
+        if unknown:
+            raise ValueError("unknown seat ids " + str(unknown))
+
+    def hold_seats(self, seat_ids: Iterable[int]):
+        """
+        Hold seats while payment runs.
+
+        Args:
+            seat_ids (Iterable[int]): Ids of the seats to hold
+
+        Returns:
+            int: Id of the new hold, or None if any seat is not available
+
+        Raises:
+            ValueError: If any seat id is unknown
+        """
+        seat_ids = list(seat_ids)
+        self.check_seat_ids(seat_ids)
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if not self._seat_inventory.reserve_many(seat_ids):
+                return None
+            hold_id = self._next_hold_id
+            self._next_hold_id += 1
+            self._holds[hold_id] = seat_ids
+            self._expiry_wheel.schedule(hold_id, now + self._hold_ttl_seconds)
+            self._notify(SeatEvent.HOLD, hold_id, seat_ids)
+            return hold_id
+
+    @staticmethod
+    def _lock_all(seat_lock_managers: Iterable["SeatLockManager"]):
+        # locks are always taken in the same order, so carts touching the
+        # same shows concurrently cannot deadlock
+        locks = {id(seat_lock_manager.get_lock()): seat_lock_manager.get_lock()
+                 for seat_lock_manager in seat_lock_managers}
+        stack = contextlib.ExitStack()
+        for lock_key in sorted(locks):
+            stack.enter_context(locks[lock_key])
+        return stack
+
+    @staticmethod
+    def hold_seats_across_shows(requests: Sequence[Tuple["SeatLockManager", Iterable[int]]]):
+        """
+        Hold seats on several shows at once, all or nothing.
+
+        Every seat id is checked before any seat is held. If any show cannot
+        hold its seats, holds already taken for the cart are released and
+        nothing stays held.
+
+        Args:
+            requests (Sequence[Tuple[SeatLockManager, Iterable[int]]]): Lock manager
+                of each show with the ids of the seats to hold on it
+
+        Returns:
+            List[int]: Hold id for each request in order, or None if any seat
+                       is not available
+
+        Raises:
+            ValueError: If any seat id is unknown
+        """
+        requests = [(seat_lock_manager, list(seat_ids)) for seat_lock_manager, seat_ids in requests]
+        for seat_lock_manager, seat_ids in requests:
+            seat_lock_manager.check_seat_ids(seat_ids)
+        with SeatLockManager._lock_all(seat_lock_manager for seat_lock_manager, _ in requests):
+            hold_ids = []
+            try:
+                for seat_lock_manager, seat_ids in requests:
+                    hold_id = seat_lock_manager.hold_seats(seat_ids)
+                    if hold_id is None:
+                        break
+                    hold_ids.append(hold_id)
+                else:
+                    return hold_ids
+            except BaseException:
+                for (held_manager, _), held_id in zip(requests, hold_ids):
+                    held_manager.release_hold(held_id)
+                raise
+            for (held_manager, _), held_id in zip(requests, hold_ids):
+                held_manager.release_hold(held_id)
+            return None
+
+    @staticmethod
+    def confirm_holds_across_shows(requests: Sequence[Tuple["SeatLockManager", int]]):
+        """
+        Confirm holds on several shows at once, all or nothing.
+
+        If any hold has expired, the other holds are released instead of
+        confirmed, so a cart is never partially booked.
+
+        Args:
+            requests (Sequence[Tuple[SeatLockManager, int]]): Lock manager of each
+                show with the id of the hold to confirm on it
+
+        Returns:
+            List[List[int]]: Booked seat ids for each request in order, or None
+                             if any hold had expired
+        """
+        with SeatLockManager._lock_all(seat_lock_manager for seat_lock_manager, _ in requests):
+            for seat_lock_manager, hold_id in requests:
+                seat_lock_manager.expire_holds()
+            if any(hold_id not in seat_lock_manager._holds for seat_lock_manager, hold_id in requests):
+                for seat_lock_manager, hold_id in requests:
+                    seat_lock_manager.release_hold(hold_id)
+                return None
+            return [seat_lock_manager.confirm_hold(hold_id) for seat_lock_manager, hold_id in requests]
+
+    def confirm_hold(self, hold_id: int):
+        """
+        Make the seats of a hold permanently booked.
+
+        Args:
+            hold_id (int): Id of the hold to confirm
+
+        Returns:
+            List[int]: Ids of the booked seats, or None if the hold expired or is unknown
+        """
+        with self._lock:
+            self._expire(self._clock())
+            seat_ids = self._holds.pop(hold_id, None)
+            if seat_ids is None:
+                return None
+            self._expiry_wheel.cancel(hold_id)
+            self._notify(SeatEvent.CONFIRM, hold_id, seat_ids)
+            return seat_ids
+
+    def release_hold(self, hold_id: int):
+        """
+        Release a hold and make its seats available again.
+
+        Args:
+            hold_id (int): Id of the hold to release
+
+        Returns:
+            bool: True if the hold was released, False if it expired or is unknown
+        """
+        with self._lock:
+            self._expire(self._clock())
+            seat_ids = self._holds.pop(hold_id, None)
+            if seat_ids is None:
+                return False
+            self._expiry_wheel.cancel(hold_id)
+            for seat_id in seat_ids:
+                self._seat_inventory.release(seat_id)
+            self._notify(SeatEvent.RELEASE, hold_id, seat_ids)
+            return True
+
+    def book_seats(self, seat_ids: Iterable[int]):
+        """
+        Book seats immediately without holding them first.
+
+        Args:
+            seat_ids (Iterable[int]): Ids of the seats to book
+
+        Returns:
+            bool: True if all seats were booked, False otherwise
+
+        Raises:
+            ValueError: If any seat id is unknown
+        """
+        seat_ids = list(seat_ids)
+        self.check_seat_ids(seat_ids)
+        with self._lock:
+            self._expire(self._clock())
+            if not self._seat_inventory.reserve_many(seat_ids):
+                return False
+            self._notify(SeatEvent.BOOK, 0, seat_ids)
+            return True
+
+    def cancel_seats(self, seat_ids: Iterable[int]):
+        """
+        Cancel booked seats and make them available again.
+
+        Seats that are not booked, or only held, are left alone. All seats
+        are reported in a single CANCEL event, so listeners such as the
+        waitlist handle a bulk cancellation in one pass.
+
+        Args:
+            seat_ids (Iterable[int]): Ids of the seats to cancel
+
+        Returns:
+            List[int]: Ids of the seats that were freed
+
+        Raises:
+            ValueError: If any seat id is unknown
+        """
+        seat_ids = list(seat_ids)
+        self.check_seat_ids(seat_ids)
+        with self._lock:
+            self._expire(self._clock())
+            held_seat_ids = {seat_id for held in self._holds.values() for seat_id in held} if self._holds else ()
+            cancelled = [seat_id for seat_id in seat_ids
+                         if seat_id not in held_seat_ids and self._seat_inventory.release(seat_id)]
+            if cancelled:
+                self._notify(SeatEvent.CANCEL, 0, cancelled)
+            return cancelled
+
+    def get_held_seat_ids(self):
+        """
+        Get the ids of all seats currently held but not confirmed.
+
+        Returns:
+            List[int]: Ids of held seats
+        """
+        with self._lock:
+            self._expire(self._clock())
+            return [seat_id for seat_ids in self._holds.values() for seat_id in seat_ids]
+
+    def get_holds(self):
+        """
+        Get every pending hold with its seats.
+
+        Returns:
+            Dict[int, List[int]]: Mapping of hold ids to held seat ids
+        """
+        with self._lock:
+            return {hold_id: list(seat_ids) for hold_id, seat_ids in self._holds.items()}
+
+    def expire_holds(self):
+        """
+        Release every hold whose TTL has passed.
+
+        Returns:
+            int: Number of holds that expired
+        """
+        with self._lock:
+            return self._expire(self._clock())
+
+    def _expire(self, now: float):
+        expired = self._expiry_wheel.advance(now)
+        for hold_id in expired:
+            seat_ids = self._holds.pop(hold_id)
+            for seat_id in seat_ids:
+                self._seat_inventory.release(seat_id)
+            self._notify(SeatEvent.RELEASE, hold_id, seat_ids)
+        return len(expired)
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import struct
+from enums.seat_category import SeatCategory
+from seat_layout import SeatLayout
+from typing import Tuple
+
+SEAT_MAP_MAGIC = b"SMAP"
+SEAT_LAYOUT_MAGIC = b"SLAY"
+FORMAT_VERSION = 2
+# magic, format version, layout id, seat bitmap bits, generation
+_SEAT_MAP_HEADER = struct.Struct("<4sB3xQIQ")
+# magic, format version, layout id, number of seats
+_SEAT_LAYOUT_HEADER = struct.Struct("<4sB3xQI")
+
+class ShowSeatMap:
+    """
+    Seat map of a show for the seat selection UI, encoded once per change.
+
+    The binary encoding is a 28-byte header (magic b"SMAP", format version,
+    layout id, number of bitmap bits and generation, little-endian) followed
+    by the show's seat bitmap as is: bit i of byte i // 8 is set when seat id
+    i is taken. The seats themselves are not repeated; clients fetch the
+    layout once per layout id with encode_layout and keep it, since layouts
+    never change. Building the encoding copies the bitmap into the output
+    buffer directly and allocates nothing per seat.
+
+    Every encoding is tagged with an ETag made of the layout id and a hash
+    of the seat bitmap, so it depends only on which seats are taken: it is
+    the same after a restart and in every process serving the show. The
+    hash and the encodings are kept until the generation of the show's
+    availability counts moves, which happens on every seat change, so
+    repeated fetches of an unchanged map return the cached bytes, and
+    fetches that already hold the current ETag get nothing at all. The
+    binary encoding and its ETag are cached as one tuple, so export_binary
+    always returns an ETag that matches the bytes returned with it. The
+    JSON encoding is a fallback for clients that cannot decode the binary
+    one and lists every seat with its row, category and status.
+
+    Attributes:
+        _show (Show): The show whose seats are mapped
+        _layout (SeatLayout): Layout of the show's screen
+        _etag (Tuple[int, str]): Generation and ETag of the latest hashed seat bitmap
+        _binary (Tuple[int, str, bytes]): Generation, ETag and bytes of the latest
+            binary encoding, generation -1 if none
+        _json (str): The latest JSON encoding
+        _json_generation (int): Generation of the JSON encoding, -1 if none
+    """
+
+    _show: "Show"
+    _layout: SeatLayout
+    _etag: Tuple[int, str]
+    _binary: Tuple[int, str, bytes]
+    _json: str
+    _json_generation: int
+
+    def __init__(self, show: "Show"):
+        """
+        Initialize the seat map of a show.
+
+        Args:
+            show (Show): The show whose seats are mapped
+        """
+        self._show = show
+        screen = show.get_screen()
+        layout = screen.get_layout()
+        self._layout = layout if layout is not None else SeatLayout.from_seats(screen.get_seats())
+        self._etag = (-1, None)
+        self._binary = (-1, None, None)
+        self._json = None
+        self._json_generation = -1
+
+    def get_etag(self):
+        """
+        Get the ETag of the current seat map.
+
+        Returns:
+            str: The quoted ETag
+        """
+        generation, etag = self._etag
+        if generation == self._show.get_availability().get_snapshot().get_generation():
+            return etag
+        with self._show.get_seat_lock_manager().get_lock():
+            return self._etag_locked()
+
+    def _etag_locked(self):
+        # the bitmap is hashed under the show's lock, at most once per generation
+        generation = self._show.get_availability().get_snapshot().get_generation()
+        if self._etag[0] != generation:
+            digest = hashlib.blake2b(self._show.get_seat_inventory().get_bitmap(), digest_size=12)
+            self._etag = (generation, '"{:x}-{}"'.format(self._layout.get_layout_id(), digest.hexdigest()))
+        return self._etag[1]
+
+    def export_binary(self, if_none_match: str = None):
+        """
+        Get the binary seat map.
+
+        Args:
+            if_none_match (str): ETag the client already holds
+
+        Returns:
+            Tuple[str, Optional[memoryview]]: ETag of the encoding and a read-only
+                view of it, or None instead of the view if if_none_match is that ETag
+        """
+        binary = self._binary
+        if binary[0] != self._show.get_availability().get_snapshot().get_generation():
+            binary = self._encode_binary()
+        _, etag, encoded = binary
+        if if_none_match is not None and if_none_match == etag:
+            return etag, None
+        return etag, memoryview(encoded)
+
+    def export_json(self, if_none_match: str = None):
+        """
+        Get the seat map as JSON.
+
+        Args:
+            if_none_match (str): ETag the client already holds
+
+        Returns:
+            Optional[str]: The JSON document, or None if if_none_match is the current ETag
+        """
+        if if_none_match is not None and if_none_match == self.get_etag():
+            return None
+        if self._json_generation != self._show.get_availability().get_snapshot().get_generation():
+            self._encode_json()
+        return self._json
+
+    def _encode_binary(self):
+        # the generation, the ETag and the bitmap are read under the show's
+        # lock so they always match, and published together as one tuple
+        seat_inventory = self._show.get_seat_inventory()
+        with self._show.get_seat_lock_manager().get_lock():
+            generation = self._show.get_availability().get_snapshot().get_generation()
+            if self._binary[0] == generation:
+                return self._binary
+            encoded = bytearray(_SEAT_MAP_HEADER.size + seat_inventory.get_bitmap_size())
+            _SEAT_MAP_HEADER.pack_into(encoded, 0, SEAT_MAP_MAGIC, FORMAT_VERSION, self._layout.get_layout_id(),
+                                       seat_inventory.get_capacity(), generation)
+            seat_inventory.write_bitmap_into(encoded, _SEAT_MAP_HEADER.size)
+            self._binary = (generation, self._etag_locked(), bytes(encoded))
+            return self._binary
+
+    def _encode_json(self):
+        seat_inventory = self._show.get_seat_inventory()
+        with self._show.get_seat_lock_manager().get_lock():
+            generation = self._show.get_availability().get_snapshot().get_generation()
+            if self._json_generation == generation:
+                return
+            bitmap = seat_inventory.get_bitmap()
+            seats = []
+            for seat in self._layout.get_seats():
+                seat_id = seat.get_seat_id()
+                seats.append([seat_id, seat.get_row(), seat.get_seat_category().name,
+                              bool(bitmap[seat_id >> 3] & (1 << (seat_id & 7)))])
+            self._json = json.dumps({"show_id": self._show.get_show_id(),
+                                     "layout_id": self._layout.get_layout_id(),
+                                     "etag": self._etag_locked(),
+                                     "fields": ["seat_id", "row", "category", "taken"],
+                                     "seats": seats}, separators=(",", ":"))
+            self._json_generation = generation
+
+
+def encode_layout(layout: SeatLayout):
+    """
+    Encode a seat layout for clients of the binary seat map.
+
+    The encoding is a 20-byte header (magic b"SLAY", format version, layout
+    id and number of seats, little-endian) followed by the seat ids and rows
+    as little-endian int32 arrays and the SeatCategory index of every seat
+    as one byte each.
+
+    Args:
+        layout (SeatLayout): The layout to encode
+
+    Returns:
+        bytes: The encoded layout
+    """
+    seats = layout.get_seats()
+    categories = tuple(SeatCategory)
+    column_format = "<{}i".format(len(seats))
+    return b"".join((
+        _SEAT_LAYOUT_HEADER.pack(SEAT_LAYOUT_MAGIC, FORMAT_VERSION, layout.get_layout_id(), len(seats)),
+        struct.pack(column_format, *layout.get_seat_ids()),
+        struct.pack(column_format, *(seat.get_row() for seat in seats)),
+        bytes(categories.index(seat.get_seat_category()) for seat in seats),
+    ))
+
+
+def decode_seat_map(encoded: bytes):
+    """
+    Decode a binary seat map.
+
+    Args:
+        encoded (bytes): An encoding returned by ShowSeatMap.export_binary
+
+    Returns:
+        Tuple[int, int, int, memoryview]: Layout id, number of bitmap bits,
+            generation and a view of the seat bitmap
+
+    Raises:
+        ValueError: If the data is not a seat map of a known format version
+    """
+    view = memoryview(encoded)
+    if len(view) < _SEAT_MAP_HEADER.size:
+        raise ValueError("seat map is truncated")
+    magic, version, layout_id, capacity, generation = _SEAT_MAP_HEADER.unpack_from(view)
+    if magic != SEAT_MAP_MAGIC or version != FORMAT_VERSION:
+        raise ValueError("not a version " + str(FORMAT_VERSION) + " seat map")
+    return layout_id, capacity, generation, view[_SEAT_MAP_HEADER.size:]
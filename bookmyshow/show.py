@@ -1,5 +1,12 @@
+import datetime
 from movie import Movie
 from screen import Screen
+from seat_inventory import SeatInventory
+from seat_lock_manager import SeatLockManager
+from seat_allocator import SeatAllocator
+from show_availability import ShowAvailability
+from seat_map import ShowSeatMap
+from show_waitlist import ShowWaitlist
 from typing import List
 
 class Show:
@@ -7,23 +14,81 @@ class Show:
     Represents a movie show in a theatre.
     
     This class encapsulates information about a show including the movie being
-    shown, the screen where it's displayed, the start time, and the list of
-    booked seats. A show represents a specific screening of a movie at a
-    particular time on a specific screen.
+    shown, the screen where it's displayed, the start time, and the seat
+    inventory tracking which seats are booked. A show represents a specific
+    screening of a movie at a particular time on a specific screen.
     
     Attributes:
         _show_id (int): Unique identifier for the show
         _movie (Movie): The movie being shown
         _screen (Screen): The screen where the show is displayed
+        _show_date (datetime.date): Date of the show
         _show_start_time (int): Start time in 24-hour format (e.g., 8 for 8 AM, 16 for 4 PM)
-        _booked_seat_ids (List[int]): List of seat IDs that are already booked
+        _seat_inventory (SeatInventory): Bitmap of booked seats, owned by this show
+        _seat_lock_manager (SeatLockManager): Thread-safe holds and bookings on the inventory
+        _seat_allocator (SeatAllocator): Contiguous block finder, built on first use
+        _availability (ShowAvailability): Seats-left counts per category, built on first use
+        _waitlist (ShowWaitlist): Waitlist per category, built on first use
+        _seat_map (ShowSeatMap): Encoded seat map for seat selection, built on first use
     """
 
+    __slots__ = ("_show_id", "_movie", "_screen", "_show_date", "_show_start_time", "_seat_inventory",
+                 "_seat_lock_manager", "_seat_allocator", "_availability", "_waitlist", "_seat_map")
+
     _show_id: int
     _movie: Movie
     _screen: Screen
+    _show_date: datetime.date
     _show_start_time: int
-    _booked_seat_ids: List[int] = []
+    _seat_inventory: SeatInventory
+    _seat_lock_manager: SeatLockManager
+    _seat_allocator: SeatAllocator
+    _availability: ShowAvailability
+    _waitlist: ShowWaitlist
+    _seat_map: ShowSeatMap
+
+    def __init__(self, show_id: int = None, movie: Movie = None, screen: Screen = None,
+                 show_start_time: int = None, show_date: datetime.date = None):
+        """
+        Initialize a show with its own seat inventory.
+        
+        Every show owns its inventory, so no booked-seat state is shared
+        between shows. The inventory is sized to fit the screen's seats when
+        the screen is assigned here or via set_screen.
+        
+        Args:
+            show_id (int): The unique identifier of the show
+            movie (Movie): The movie being shown
+            screen (Screen): The screen where the show is displayed
+            show_start_time (int): Start time in 24-hour format
+            show_date (datetime.date): Date of the show, today if not given
+        """
+        self._show_id = show_id
+        self._movie = movie
+        self._show_date = show_date if show_date is not None else datetime.date.today()
+        self._show_start_time = show_start_time
+        self._screen = screen
+        self._set_seat_inventory(SeatInventory(self._capacity_of(screen) if screen is not None else 0))
+
+    def _set_seat_inventory(self, seat_inventory: SeatInventory):
+        self._seat_inventory = seat_inventory
+        self._seat_lock_manager = SeatLockManager(seat_inventory,
+                                                  is_seat=self._screen.has_seat if self._screen is not None else None)
+        self._seat_allocator = None
+        self._availability = None
+        self._waitlist = None
+        self._seat_map = None
+
+    def __getstate__(self):
+        # locks cannot be pickled; the lock manager and the structures built
+        # on the inventory are recreated when the show is unpickled
+        return {"_show_id": self._show_id, "_movie": self._movie, "_screen": self._screen,
+                "_show_date": self._show_date, "_show_start_time": self._show_start_time, "_seat_inventory": self._seat_inventory}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._set_seat_inventory(self._seat_inventory)
 
     def get_show_id(self):
         """
@@ -80,6 +145,33 @@ class Show:
             screen (Screen): The screen to assign to the show
         """
         self._screen = screen
+        self._set_seat_inventory(SeatInventory(self._capacity_of(screen)))
+
+    @staticmethod
+    def _capacity_of(screen: Screen):
+        # seat ids index the inventory bitmap directly
+        layout = screen.get_layout()
+        if layout is not None:
+            return layout.get_max_seat_id() + 1
+        return max((seat.get_seat_id() for seat in screen.get_seats()), default=-1) + 1
+
+    def get_show_date(self):
+        """
+        Get the date of the show.
+        
+        Returns:
+            datetime.date: The show date
+        """
+        return self._show_date
+
+    def set_show_date(self, show_date: datetime.date):
+        """
+        Set the date of the show.
+        
+        Args:
+            show_date (datetime.date): The date to assign to the show
+        """
+        self._show_date = show_date
 
     def get_show_start_time(self):
         """
@@ -99,20 +191,140 @@ class Show:
         """
         self._show_start_time = show_start_time
 
+    def get_show_start_minute(self):
+        """
+        Get the start time of the show in minutes.
+        
+        Minutes are counted from the start of the calendar rather than of
+        the day, so shows on different dates never overlap.
+        
+        Returns:
+            int: Minutes from the start of the calendar to the show start
+        """
+        return self._show_date.toordinal() * 1440 + self._show_start_time * 60
+
+    def get_show_end_minute(self):
+        """
+        Get the end time of the show in minutes, based on the movie duration.
+        
+        Returns:
+            int: Minutes from the start of the calendar to the show end
+        """
+        return self.get_show_start_minute() + self._movie.get_movie_duration()
+
+    def get_seat_inventory(self):
+        """
+        Get the seat inventory tracking booked seats for this show.
+        
+        Returns:
+            SeatInventory: The show's seat inventory
+        """
+        return self._seat_inventory
+
+    def get_seat_lock_manager(self):
+        """
+        Get the lock manager used to hold and book seats concurrently.
+        
+        Concurrent booking paths should go through the lock manager rather
+        than the seat inventory directly.
+        
+        Returns:
+            SeatLockManager: The show's seat lock manager
+        """
+        return self._seat_lock_manager
+
+    def get_seat_allocator(self):
+        """
+        Get the allocator used to find blocks of seats together.
+        
+        The allocator is built the first time it is requested, so shows that
+        never need group allocation do not pay for it.
+        
+        Returns:
+            SeatAllocator: The show's seat allocator
+        """
+        with self._seat_lock_manager.get_lock():
+            if self._seat_allocator is None:
+                self._seat_allocator = SeatAllocator(self._screen, self._seat_inventory)
+            return self._seat_allocator
+
+    def get_availability(self):
+        """
+        Get the seats-left counts per category for listing pages.
+        
+        Once built, reading the availability never takes the show's lock.
+        
+        Returns:
+            ShowAvailability: The show's availability counts
+        """
+        availability = self._availability
+        if availability is not None:
+            return availability
+        with self._seat_lock_manager.get_lock():
+            if self._availability is None:
+                self._availability = ShowAvailability(self._screen, self._seat_inventory)
+            return self._availability
+
+    def get_waitlist(self):
+        """
+        Get the waitlist used to hand out freed seats.
+        
+        Returns:
+            ShowWaitlist: The show's waitlist
+        """
+        with self._seat_lock_manager.get_lock():
+            if self._waitlist is None:
+                self._waitlist = ShowWaitlist(self)
+            return self._waitlist
+
+    def get_seat_map(self):
+        """
+        Get the encoded seat map served to the seat selection UI.
+        
+        Returns:
+            ShowSeatMap: The show's seat map
+        """
+        seat_map = self._seat_map
+        if seat_map is not None:
+            return seat_map
+        self.get_availability()
+        with self._seat_lock_manager.get_lock():
+            if self._seat_map is None:
+                self._seat_map = ShowSeatMap(self)
+            return self._seat_map
+
     def get_booked_seat_ids(self):
         """
         Get the list of seat IDs that are already booked for this show.
         
+        The list is built from the seat inventory; modifying it does not
+        book or free any seat.
+        
         Returns:
             List[int]: List of booked seat IDs
         """
-        return self._booked_seat_ids
+        return self._seat_inventory.get_booked_seat_indexes()
 
     def set_booked_seat_ids(self, booked_seat_ids: List[int]):
         """
         Set the list of booked seat IDs for this show.
         
+        The ids are checked before any seat changes, so on an error the
+        show keeps its booked seats as they were.
+        
         Args:
             booked_seat_ids (List[int]): List of seat IDs that are booked
+            
+        Raises:
+            ValueError: If a seat ID is out of range or listed twice
         """
-        self._booked_seat_ids = booked_seat_ids
+        booked_seat_ids = list(booked_seat_ids)
+        capacity = self._seat_inventory.get_capacity()
+        for seat_id in booked_seat_ids:
+            if not 0 <= seat_id < capacity:
+                raise ValueError("seat " + str(seat_id) + " is not on show " + str(self._show_id))
+        if len(set(booked_seat_ids)) != len(booked_seat_ids):
+            raise ValueError("a seat is listed twice for show " + str(self._show_id))
+        with self._seat_lock_manager.get_lock():
+            self._seat_inventory.clear()
+            self._seat_inventory.reserve_many(booked_seat_ids)
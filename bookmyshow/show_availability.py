@@ -0,0 +1,124 @@
+from enums.seat_category import SeatCategory
+from screen import Screen
+from seat_inventory import SeatInventory
+from typing import Dict, List
+
+class AvailabilitySnapshot:
+    """
+    Immutable seats-left counts of a show at one point in time.
+
+    Attributes:
+        _generation (int): Version of the counts, increased on every change
+        _category_vs_seats_left (Dict[SeatCategory, int]): Free seats per category
+        _seats_left (int): Free seats in total
+    """
+
+    __slots__ = ("_generation", "_category_vs_seats_left", "_seats_left")
+
+    def __init__(self, generation: int, category_vs_seats_left: Dict[SeatCategory, int]):
+        self._generation = generation
+        self._category_vs_seats_left = category_vs_seats_left
+        self._seats_left = sum(category_vs_seats_left.values())
+
+    def get_generation(self):
+        """
+        Get the version of this snapshot.
+
+        Returns:
+            int: The generation counter
+        """
+        return self._generation
+
+    def get_seats_left(self, seat_category: SeatCategory = None):
+        """
+        Get the number of free seats.
+
+        Args:
+            seat_category (SeatCategory): Category to count, all categories if not given
+
+        Returns:
+            int: The number of free seats
+        """
+        if seat_category is None:
+            return self._seats_left
+        return self._category_vs_seats_left.get(seat_category, 0)
+
+    def get_category_vs_seats_left(self):
+        """
+        Get the free seats of every category.
+
+        Returns:
+            Dict[SeatCategory, int]: Free seats per category
+        """
+        return dict(self._category_vs_seats_left)
+
+
+class ShowAvailability:
+    """
+    Read-optimized seats-left counts per SeatCategory for a show.
+
+    The counts are updated incrementally from the show's seat inventory and
+    published as a new immutable AvailabilitySnapshot on every change.
+    Listing pages read the current snapshot with a single attribute access,
+    never take a lock and never touch the per-seat structures. The snapshot
+    generation tells readers whether the counts changed since they last
+    looked.
+
+    Attributes:
+        _screen (Screen): The screen of the show, used to find seat categories
+        _category_vs_capacity (Dict[SeatCategory, int]): Number of seats per category
+        _snapshot (AvailabilitySnapshot): The latest published counts
+    """
+
+    _screen: Screen
+    _category_vs_capacity: Dict[SeatCategory, int]
+    _snapshot: AvailabilitySnapshot
+
+    def __init__(self, screen: Screen, seat_inventory: SeatInventory):
+        """
+        Count the free seats of a show and subscribe to its inventory.
+
+        Args:
+            screen (Screen): The screen of the show
+            seat_inventory (SeatInventory): The show's seat inventory
+        """
+        self._screen = screen
+        self._category_vs_capacity = {}
+        category_vs_seats_left = {}
+        for seat in screen.get_seats():
+            self._category_vs_capacity[seat.get_seat_category()] = \
+                self._category_vs_capacity.get(seat.get_seat_category(), 0) + 1
+            seats_left = category_vs_seats_left.get(seat.get_seat_category(), 0)
+            if not seat_inventory.is_booked(seat.get_seat_id()):
+                seats_left += 1
+            category_vs_seats_left[seat.get_seat_category()] = seats_left
+        self._snapshot = AvailabilitySnapshot(0, category_vs_seats_left)
+        seat_inventory.add_listener(self._on_seats_changed)
+
+    def _on_seats_changed(self, seat_ids: List[int], booked: bool):
+        category_vs_seats_left = self._snapshot.get_category_vs_seats_left()
+        change = -1 if booked else 1
+        for seat in self._screen.get_seats_by_ids(seat_ids):
+            category_vs_seats_left[seat.get_seat_category()] += change
+        self._snapshot = AvailabilitySnapshot(self._snapshot.get_generation() + 1, category_vs_seats_left)
+
+    def get_snapshot(self):
+        """
+        Get the latest seats-left counts without locking.
+
+        Returns:
+            AvailabilitySnapshot: The current snapshot
+        """
+        return self._snapshot
+
+    def get_capacity(self, seat_category: SeatCategory):
+        """
+        Get the number of seats of a category on the show's screen.
+
+        Args:
+            seat_category (SeatCategory): The category to count
+
+        Returns:
+            int: The number of seats of the category
+        """
+        return self._category_vs_capacity.get(seat_category, 0)
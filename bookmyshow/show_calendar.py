@@ -0,0 +1,150 @@
+import datetime
+from typing import Any, Callable, List, Optional
+
+# days of past shows kept before they expire
+HISTORY_DAYS = 7
+# days ahead shows can be scheduled
+FORWARD_DAYS = 30
+
+class ShowCalendar:
+    """
+    Ring of daily buckets covering a window of dates around today.
+
+    The window runs from HISTORY_DAYS before today to FORWARD_DAYS after it,
+    and the ring has one slot per day of the window, so the bucket of a date
+    is found by indexing the ring with the date's ordinal. A day that leaves
+    the window is expired by dropping its bucket as a whole, and its slot is
+    reused by the day that enters the window, so old days never accumulate
+    and never slow down lookups for today.
+
+    What a bucket holds is up to the owner: a theatre keeps a list of shows
+    per day, the theatre controller a per-day show index.
+
+    Attributes:
+        _history_days (int): Days before today kept in the window
+        _forward_days (int): Days after today in the window
+        _dates (List[Optional[datetime.date]]): Date held by each slot, None if empty
+        _buckets (List[Any]): Bucket held by each slot
+        _on_expire (Callable[[datetime.date, Any], None]): Called with every dropped bucket
+    """
+
+    _history_days: int
+    _forward_days: int
+    _dates: List[Optional[datetime.date]]
+    _buckets: List[Any]
+    _on_expire: Callable[[datetime.date, Any], None]
+
+    def __init__(self, history_days: int = HISTORY_DAYS, forward_days: int = FORWARD_DAYS,
+                 on_expire: Callable[[datetime.date, Any], None] = None):
+        """
+        Initialize an empty calendar.
+
+        Args:
+            history_days (int): Days before today kept in the window
+            forward_days (int): Days after today in the window
+            on_expire (Callable[[datetime.date, Any], None]): Called with the date and
+                bucket of every day that is dropped
+        """
+        self._history_days = history_days
+        self._forward_days = forward_days
+        self._dates = [None] * (history_days + forward_days + 1)
+        self._buckets = [None] * len(self._dates)
+        self._on_expire = on_expire
+
+    def get_first_date(self):
+        """
+        Get the oldest date in the window.
+
+        Returns:
+            datetime.date: Today minus the history days
+        """
+        return datetime.date.today() - datetime.timedelta(days=self._history_days)
+
+    def is_in_window(self, show_date: datetime.date):
+        """
+        Check whether a date is inside the window.
+
+        Args:
+            show_date (datetime.date): The date to check
+
+        Returns:
+            bool: True if the date can hold a bucket
+        """
+        today = datetime.date.today()
+        return (today - datetime.timedelta(days=self._history_days) <= show_date
+                <= today + datetime.timedelta(days=self._forward_days))
+
+    def get(self, show_date: datetime.date):
+        """
+        Get the bucket of a date.
+
+        Args:
+            show_date (datetime.date): The date to look up
+
+        Returns:
+            Any: The date's bucket, or None if the date has none
+        """
+        slot = show_date.toordinal() % len(self._dates)
+        if self._dates[slot] != show_date:
+            return None
+        return self._buckets[slot]
+
+    def setdefault(self, show_date: datetime.date, factory: Callable[[], Any]):
+        """
+        Get the bucket of a date, creating it if the date has none.
+
+        A day still occupying the date's slot has left the window and is
+        expired first.
+
+        Args:
+            show_date (datetime.date): The date to look up
+            factory (Callable[[], Any]): Creates the bucket of a new date
+
+        Returns:
+            Any: The date's bucket
+
+        Raises:
+            ValueError: If the date is outside the window
+        """
+        slot = show_date.toordinal() % len(self._dates)
+        if self._dates[slot] == show_date:
+            return self._buckets[slot]
+        if not self.is_in_window(show_date):
+            raise ValueError("show date " + show_date.isoformat() + " is outside the calendar window")
+        if self._dates[slot] is not None:
+            self._drop(slot)
+        self._dates[slot] = show_date
+        self._buckets[slot] = factory()
+        return self._buckets[slot]
+
+    def _drop(self, slot: int):
+        show_date, bucket = self._dates[slot], self._buckets[slot]
+        self._dates[slot] = None
+        self._buckets[slot] = None
+        if self._on_expire is not None:
+            self._on_expire(show_date, bucket)
+
+    def expire(self):
+        """
+        Drop the buckets of every day before the window.
+
+        Returns:
+            int: Number of days dropped
+        """
+        first_date = self.get_first_date()
+        dropped = 0
+        for slot, show_date in enumerate(self._dates):
+            if show_date is not None and show_date < first_date:
+                self._drop(slot)
+                dropped += 1
+        return dropped
+
+    def items(self):
+        """
+        Get the bucket of every date that has one.
+
+        Returns:
+            List[Tuple[datetime.date, Any]]: (date, bucket) pairs ordered by date
+        """
+        return sorted(((show_date, bucket) for show_date, bucket in zip(self._dates, self._buckets)
+                       if show_date is not None), key=lambda item: item[0])
@@ -0,0 +1,217 @@
+import bisect
+import operator
+from typing import Any, Iterable, List, Tuple
+
+# add_many inserts entries one by one when the schedule holds more than this
+# many times as many entries, and rebuilds it with one merge otherwise
+_MERGE_RATIO = 16
+
+class ShowSchedule:
+    """
+    Time-ordered index of shows.
+
+    Entries are kept sorted by start minute in parallel lists, so the
+    position of a new show, its neighbours and the shows starting in a time
+    window are all found with a binary search.
+
+    A schedule is used in two ways: per screen, where shows must not overlap
+    and add rejects conflicts, and per city, where overlaps are expected and
+    only the range queries are used.
+
+    Attributes:
+        _starts (List[int]): Start minute of each entry, ascending
+        _ends (List[int]): End minute of each entry, including the cleaning buffer
+        _items (List[Any]): Item stored for each entry
+    """
+
+    _starts: List[int]
+    _ends: List[int]
+    _items: List[Any]
+
+    def __init__(self):
+        """
+        Initialize an empty schedule.
+        """
+        self._starts = []
+        self._ends = []
+        self._items = []
+
+    def find_conflict(self, start: int, end: int):
+        """
+        Find an entry overlapping the given time range.
+
+        Only the entries just before and just after the insertion point are
+        checked, which is enough as long as the schedule itself has no
+        overlapping entries.
+
+        Args:
+            start (int): Start minute of the range
+            end (int): End minute of the range
+
+        Returns:
+            Any: The item of an overlapping entry, or None if there is none
+        """
+        index = bisect.bisect_left(self._starts, start)
+        if index > 0 and self._ends[index - 1] > start:
+            return self._items[index - 1]
+        if index < len(self._starts) and self._starts[index] < end:
+            return self._items[index]
+        return None
+
+    def add(self, start: int, end: int, item: Any, allow_overlap: bool = False):
+        """
+        Add an entry to the schedule.
+
+        Args:
+            start (int): Start minute of the entry
+            end (int): End minute of the entry
+            item (Any): The item to store
+            allow_overlap (bool): Whether the entry may overlap existing entries
+
+        Returns:
+            Any: None if the entry was added, otherwise the conflicting item
+        """
+        if not allow_overlap:
+            conflict = self.find_conflict(start, end)
+            if conflict is not None:
+                return conflict
+        index = bisect.bisect_right(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._items.insert(index, item)
+        return None
+
+    def add_many(self, entries: Iterable[Tuple[int, int, Any]], allow_overlap: bool = False):
+        """
+        Add many entries to the schedule at once.
+
+        The new entries are sorted once and merged with the schedule in a
+        single pass, instead of a binary search and list insert per entry;
+        only a handful of entries added to a long schedule are inserted one
+        at a time. Either every entry is added or, on a conflict, none is.
+
+        Args:
+            entries (Iterable[Tuple[int, int, Any]]): (start, end, item) of every entry
+            allow_overlap (bool): Whether the entries may overlap each other and existing entries
+
+        Returns:
+            Tuple[Any, Any]: None if the entries were added, otherwise the item
+                             of a new entry and the item it overlaps
+        """
+        entries = sorted(entries, key=operator.itemgetter(0))
+        if not entries:
+            return None
+        if len(entries) * _MERGE_RATIO < len(self._starts):
+            # a few entries into a long schedule: inserting them one by one
+            # is cheaper than rebuilding the lists
+            return self._insert_sorted(entries, allow_overlap)
+        # the sort is stable, so equal starts keep existing entries first, as add does;
+        # the appended entries are one ordered run, which the sort merges in a single pass
+        merged = list(zip(self._starts, self._ends, self._items))
+        merged.extend(entries)
+        merged.sort(key=operator.itemgetter(0))
+        if not allow_overlap:
+            new_items = {id(item) for _, _, item in entries}
+            previous = merged[0]
+            for entry in merged[1:]:
+                if entry[0] < previous[1]:
+                    if id(entry[2]) in new_items:
+                        return entry[2], previous[2]
+                    return previous[2], entry[2]
+                previous = entry
+        self._starts = [entry[0] for entry in merged]
+        self._ends = [entry[1] for entry in merged]
+        self._items = [entry[2] for entry in merged]
+        return None
+
+    def _insert_sorted(self, entries: List[Tuple[int, int, Any]], allow_overlap: bool):
+        if not allow_overlap:
+            previous = None
+            for entry in entries:
+                conflict = self.find_conflict(entry[0], entry[1])
+                if conflict is not None:
+                    return entry[2], conflict
+                if previous is not None and entry[0] < previous[1]:
+                    return entry[2], previous[2]
+                previous = entry
+        for start, end, item in entries:
+            index = bisect.bisect_right(self._starts, start)
+            self._starts.insert(index, start)
+            self._ends.insert(index, end)
+            self._items.insert(index, item)
+        return None
+
+    def remove_many(self, items: Iterable[Any]):
+        """
+        Remove the entries of many items at once.
+
+        Args:
+            items (Iterable[Any]): The items to remove
+        """
+        removed = {id(item) for item in items}
+        kept = [index for index, item in enumerate(self._items) if id(item) not in removed]
+        self._starts = [self._starts[index] for index in kept]
+        self._ends = [self._ends[index] for index in kept]
+        self._items = [self._items[index] for index in kept]
+
+    def remove(self, start: int, item: Any):
+        """
+        Remove an entry from the schedule.
+
+        Items are compared with ==, so an entry stored as a tuple can be
+        removed with an equal tuple rather than the same object.
+
+        Args:
+            start (int): Start minute the entry was added with
+            item (Any): The item to remove
+
+        Returns:
+            bool: True if the entry was removed, False if it was not found
+        """
+        index = bisect.bisect_left(self._starts, start)
+        while index < len(self._starts) and self._starts[index] == start:
+            if self._items[index] == item:
+                del self._starts[index]
+                del self._ends[index]
+                del self._items[index]
+                return True
+            index += 1
+        return False
+
+    def remove_starting_before(self, minute: int):
+        """
+        Remove every entry starting before a minute.
+
+        Entries are kept in start order, so they are cut from the front in
+        one step rather than removed one by one.
+
+        Args:
+            minute (int): Entries starting before this minute are removed
+
+        Returns:
+            List[Any]: Items of the removed entries, ordered by start time
+        """
+        index = bisect.bisect_left(self._starts, minute)
+        removed = self._items[:index]
+        del self._starts[:index]
+        del self._ends[:index]
+        del self._items[:index]
+        return removed
+
+    def get_starting_between(self, from_minute: int, to_minute: int):
+        """
+        Get the items of entries starting in a time window.
+
+        Args:
+            from_minute (int): Start of the window, inclusive
+            to_minute (int): End of the window, inclusive
+
+        Returns:
+            List[Any]: Items ordered by start time
+        """
+        lo = bisect.bisect_left(self._starts, from_minute)
+        hi = bisect.bisect_right(self._starts, to_minute)
+        return self._items[lo:hi]
+
+    def __len__(self):
+        return len(self._starts)
@@ -0,0 +1,159 @@
+from collections import deque
+from enums.seat_category import SeatCategory
+from enums.seat_event import SeatEvent
+from typing import Callable, Deque, Dict, List, Set
+
+class _WaitlistEntry:
+    """One waiting request for a number of seats of a category."""
+
+    __slots__ = ("entry_id", "seat_count", "on_allocated")
+
+    def __init__(self, entry_id: int, seat_count: int, on_allocated: Callable):
+        self.entry_id = entry_id
+        self.seat_count = seat_count
+        self.on_allocated = on_allocated
+
+
+class ShowWaitlist:
+    """
+    First-come, first-served waitlist per SeatCategory for a sold-out show.
+
+    Users who cannot get seats join the queue of a category instead of
+    retrying. Whenever seats are freed on the show (a hold is released or
+    expires, or booked seats are cancelled) the freed seats are added to a
+    pool per category and the queues are served in order: each waiting
+    entry at the head gets its seats held as soon as the pool holds enough
+    of them, and its callback receives the hold, to be paid for and
+    confirmed like any other hold. A hold that is released or expires
+    instead frees its seats for the next entries. A bulk cancellation
+    arrives as a single event, so all of its seats are reallocated in one
+    pass.
+
+    Serving is FIFO: an entry that needs more seats than are free blocks
+    the entries behind it in the same category.
+
+    Attributes:
+        _show (Show): The show being waited on
+        _category_vs_queue (Dict[SeatCategory, Deque[_WaitlistEntry]]): Waiting entries per category
+        _category_vs_free_seat_ids (Dict[SeatCategory, List[int]]): Freed seats not yet reallocated
+        _left_entry_ids (Set[int]): Entries that left the queue, skipped when reached
+        _next_entry_id (int): Id assigned to the next entry
+    """
+
+    _show: "Show"
+    _category_vs_queue: Dict[SeatCategory, Deque[_WaitlistEntry]]
+    _category_vs_free_seat_ids: Dict[SeatCategory, List[int]]
+    _left_entry_ids: Set[int]
+    _next_entry_id: int
+
+    def __init__(self, show: "Show"):
+        """
+        Create an empty waitlist and subscribe to the show's seat events.
+
+        Args:
+            show (Show): The show being waited on
+        """
+        self._show = show
+        self._category_vs_queue = {}
+        self._category_vs_free_seat_ids = {}
+        self._left_entry_ids = set()
+        self._next_entry_id = 1
+        show.get_seat_lock_manager().add_listener(self._on_seat_event)
+
+    def join(self, seat_category: SeatCategory, seat_count: int, on_allocated: Callable[[int, List[int]], None]):
+        """
+        Join the waitlist of a category.
+
+        The callback runs under the show's lock when the seats are held and
+        should return quickly, leaving payment to another thread. Only seats
+        freed from now on are handed out, so callers should try to book
+        directly before joining.
+
+        Args:
+            seat_category (SeatCategory): The category of seats wanted
+            seat_count (int): Number of seats wanted
+            on_allocated (Callable[[int, List[int]], None]): Called with the id of
+                the hold and the ids of the held seats
+
+        Returns:
+            int: Id of the waitlist entry
+        """
+        with self._show.get_seat_lock_manager().get_lock():
+            entry_id = self._next_entry_id
+            self._next_entry_id += 1
+            queue = self._category_vs_queue.setdefault(seat_category, deque())
+            queue.append(_WaitlistEntry(entry_id, seat_count, on_allocated))
+            self._serve(seat_category)
+            return entry_id
+
+    def leave(self, entry_id: int):
+        """
+        Leave the waitlist.
+
+        The entry is skipped when it reaches the head of its queue.
+
+        Args:
+            entry_id (int): Id of the waitlist entry
+        """
+        with self._show.get_seat_lock_manager().get_lock():
+            self._left_entry_ids.add(entry_id)
+
+    def get_waiting_count(self, seat_category: SeatCategory):
+        """
+        Get the number of entries waiting for a category.
+
+        Args:
+            seat_category (SeatCategory): The category to count
+
+        Returns:
+            int: Number of waiting entries, including ones that already left
+        """
+        return len(self._category_vs_queue.get(seat_category, ()))
+
+    def _on_seat_event(self, seat_event: SeatEvent, hold_id: int, seat_ids: List[int]):
+        if seat_event != SeatEvent.RELEASE and seat_event != SeatEvent.CANCEL:
+            return
+        freed_categories = set()
+        for seat in self._show.get_screen().get_seats_by_ids(seat_ids):
+            seat_category = seat.get_seat_category()
+            if self._category_vs_queue.get(seat_category):
+                self._category_vs_free_seat_ids.setdefault(seat_category, []).append(seat.get_seat_id())
+                freed_categories.add(seat_category)
+        for seat_category in freed_categories:
+            self._serve(seat_category)
+
+    def _serve(self, seat_category: SeatCategory):
+        queue = self._category_vs_queue.get(seat_category)
+        free_seat_ids = self._category_vs_free_seat_ids.setdefault(seat_category, [])
+        seat_inventory = self._show.get_seat_inventory()
+        seat_lock_manager = self._show.get_seat_lock_manager()
+        while queue:
+            entry = queue[0]
+            if entry.entry_id in self._left_entry_ids:
+                self._left_entry_ids.discard(entry.entry_id)
+                queue.popleft()
+                continue
+
+            # seats in the pool may have been booked through another path since
+            # they were freed, so they are checked as they are taken
+            seat_ids = []
+            while free_seat_ids and len(seat_ids) < entry.seat_count:
+                seat_id = free_seat_ids.pop()
+                if not seat_inventory.is_booked(seat_id):
+                    seat_ids.append(seat_id)
+            if len(seat_ids) < entry.seat_count:
+                free_seat_ids.extend(seat_ids)
+                return
+
+            seat_ids.sort()
+            hold_id = seat_lock_manager.hold_seats(seat_ids)
+            if hold_id is None:
+                # a seat was taken after all; the others go back to the pool
+                # and the entry is tried again with what is left
+                free_seat_ids.extend(seat_id for seat_id in seat_ids if not seat_inventory.is_booked(seat_id))
+                continue
+            queue.popleft()
+            entry.on_allocated(hold_id, seat_ids)
+
+        # nobody is waiting, so the pool is no longer needed
+        free_seat_ids.clear()
@@ -1,7 +1,9 @@
+import datetime
 from enums.city import City
 from screen import Screen
 from show import Show
-from typing import List
+from show_calendar import ShowCalendar
+from typing import List, Tuple
 
 class Theatre:
     """
@@ -9,21 +11,50 @@ class Theatre:
     
     This class encapsulates all the essential information about a theatre including
     its location, screens, and shows. A theatre can have multiple screens, and
-    each screen can host multiple shows for different movies.
+    each screen can host multiple shows for different movies. Shows are kept
+    in daily buckets, so the shows of one date are found without touching
+    the others and past dates are dropped as a whole.
     
     Attributes:
         _theatre_id (int): Unique identifier for the theatre
         _address (str): Physical address of the theatre
         _city (City): City where the theatre is located
+        _location (Tuple[float, float]): (latitude, longitude) of the theatre, None if unknown
         _screens (List[Screen]): List of screens in the theatre
-        _shows (List[Show]): List of shows running in the theatre
+        _show_calendar (ShowCalendar): Shows running in the theatre, bucketed by date
     """
 
+    __slots__ = ("_theatre_id", "_address", "_city", "_location", "_screens", "_show_calendar")
+
     _theatre_id: int
     _address: str
     _city: City
+    _location: Tuple[float, float]
     _screens: List[Screen]
-    _shows: List[Show]
+    _show_calendar: ShowCalendar
+
+    def __init__(self, theatre_id: int = None, address: str = None, city: City = None,
+                 screens: List[Screen] = None, shows: List[Show] = None, location: Tuple[float, float] = None):
+        """
+        Initialize a theatre.
+        
+        Args:
+            theatre_id (int): The unique identifier of the theatre
+            address (str): The physical address of the theatre
+            city (City): The city where the theatre is located
+            screens (List[Screen]): Screens of the theatre, none if not given
+            shows (List[Show]): Shows running in the theatre, none if not given
+            location (Tuple[float, float]): (latitude, longitude) of the theatre
+            
+        Raises:
+            ValueError: If a show's date is outside the calendar window
+        """
+        self._theatre_id = theatre_id
+        self._address = address
+        self._city = city
+        self._location = location
+        self._screens = screens if screens is not None else []
+        self.set_shows(shows if shows is not None else [])
 
     def get_theatre_id(self):
         """
@@ -83,12 +114,27 @@ class Theatre:
 
     def get_shows(self):
         """
-        Get all shows running in the theatre.
+        Get all shows of the theatre, across every date of its calendar.
         
         Returns:
-            List[Show]: List of all shows in the theatre
+            List[Show]: List of all shows in the theatre, ordered by date
         """
-        return self._shows
+        return [show for _, shows in self._show_calendar.items() for show in shows]
+
+    def get_shows_on(self, show_date: datetime.date):
+        """
+        Get the shows of the theatre on one date.
+        
+        Only that date's bucket is read, however many other dates hold shows.
+        
+        Args:
+            show_date (datetime.date): The date of the shows
+            
+        Returns:
+            List[Show]: List of the shows on that date
+        """
+        shows = self._show_calendar.get(show_date)
+        return list(shows) if shows is not None else []
 
     def set_shows(self, shows: List[Show]):
         """
@@ -96,8 +142,69 @@ class Theatre:
         
         Args:
             shows (List[Show]): List of shows to assign to the theatre
+            
+        Raises:
+            ValueError: If a show's date is outside the calendar window
         """
-        self._shows = shows
+        self._show_calendar = ShowCalendar()
+        for show in shows:
+            self.add_show(show)
+
+    def add_show(self, show: Show):
+        """
+        Add a show to the theatre.
+        
+        Args:
+            show (Show): The show to add
+            
+        Raises:
+            ValueError: If the show's date is outside the calendar window
+        """
+        self._show_calendar.setdefault(show.get_show_date(), list).append(show)
+
+    def add_shows(self, shows: List[Show]):
+        """
+        Add many shows to the theatre, appending to each date's bucket once.
+        
+        Args:
+            shows (List[Show]): The shows to add
+            
+        Raises:
+            ValueError: If a show's date is outside the calendar window; no
+                        show is added then
+        """
+        date_vs_shows = {}
+        for show in shows:
+            date_vs_shows.setdefault(show.get_show_date(), []).append(show)
+        for show_date in date_vs_shows:
+            if not self._show_calendar.is_in_window(show_date):
+                raise ValueError("show date " + show_date.isoformat() + " is outside the calendar window")
+        for show_date, date_shows in date_vs_shows.items():
+            self._show_calendar.setdefault(show_date, list).extend(date_shows)
+
+    def remove_show(self, show: Show):
+        """
+        Remove a show from the theatre.
+        
+        Args:
+            show (Show): The show to remove
+            
+        Raises:
+            ValueError: If the show is not in the theatre
+        """
+        shows = self._show_calendar.get(show.get_show_date())
+        if shows is None:
+            raise ValueError("show " + str(show.get_show_id()) + " is not in the theatre")
+        shows.remove(show)
+
+    def expire_shows(self):
+        """
+        Drop the shows of every date that has left the calendar window.
+        
+        Returns:
+            int: Number of dates dropped
+        """
+        return self._show_calendar.expire()
 
     def get_city(self):
         """
@@ -116,3 +223,24 @@ class Theatre:
             city (City): The city enum value to assign to the theatre
         """
         self._city = city
+
+    def get_location(self):
+        """
+        Get the coordinates of the theatre.
+        
+        Returns:
+            Tuple[float, float]: (latitude, longitude) in degrees, None if unknown
+        """
+        return self._location
+
+    def set_location(self, location: Tuple[float, float]):
+        """
+        Set the coordinates of the theatre.
+        
+        Set the location before registering the theatre with a
+        TheatreController, which indexes theatres by location.
+        
+        Args:
+            location (Tuple[float, float]): (latitude, longitude) in degrees
+        """
+        self._location = location
@@ -1,8 +1,13 @@
+import datetime
 from enums.city import City
+from geo_index import GeoIndex
 from theatre import Theatre
 from show import Show
 from movie import Movie
-from typing import List, Dict
+from screen import Screen
+from show_calendar import ShowCalendar
+from show_schedule import ShowSchedule
+from typing import List, Dict, Tuple
 
 class TheatreController:
     """
@@ -10,29 +15,64 @@ class TheatreController:
     
     This class provides centralized management of theatres including:
     - Adding theatres to cities
+    - Adding and removing shows in theatres
     - Retrieving shows for specific movies in cities
     - Maintaining city-wise theatre mappings
     
-    The controller maintains two data structures:
+    The controller maintains these data structures:
     - _city_vs_theatre: Maps cities to lists of theatres in that city
     - _all_theatre: Complete list of all theatres in the system
+    - _day_indexes: Show indexes per date, in a calendar of daily buckets:
+      shows by (city, movie id) then by theatre, and time-ordered
+      (theatre, show) pairs per city for time-window search
+    - _screen_vs_schedule: Time-ordered shows per screen, used to reject overlaps
+    - _city_vs_geo_index: Grid index of the theatres of each city by location,
+      for nearby searches
+    
+    Searches read the index of a single date, today unless asked otherwise,
+    so the schedule of the coming weeks and the history of past days do not
+    slow them down. expire_shows drops dates that left the calendar window.
+    The indexes are changed in place, so searches here must not run while
+    another thread changes the catalogue; concurrent readers search a
+    CatalogueSnapshot instead.
+    
+    Shows added to a theatre after it was registered must go through
+    add_show/remove_show so the show indexes stay up to date. A show occupies
+    its screen for the movie duration plus a cleaning buffer, and shows that
+    would overlap on one screen are rejected.
     
     Attributes:
         _city_vs_theatre (Dict[City, List[Theatre]]): Mapping of cities to their theatres
         _all_theatre (List[Theatre]): Complete list of all theatres in the system
+        _day_indexes (ShowCalendar): Show indexes of every date with shows
+        _screen_vs_schedule (Dict[Screen, ShowSchedule]): Shows scheduled on each screen
+        _city_vs_geo_index (Dict[City, GeoIndex]): Theatres with a location in each city
+        _cleaning_buffer_minutes (int): Minutes a screen stays busy after each show
     """
 
     _city_vs_theatre: Dict[City, List[Theatre]]
     _all_theatre: List[Theatre]
+    _day_indexes: ShowCalendar
+    _screen_vs_schedule: Dict[Screen, ShowSchedule]
+    _city_vs_geo_index: Dict[City, GeoIndex]
+    _cleaning_buffer_minutes: int
 
-    def __init__(self):
+    def __init__(self, cleaning_buffer_minutes: int = 15):
         """
         Initialize the TheatreController.
         
-        Creates empty data structures for storing theatres and city-theatre mappings.
+        Creates empty data structures for storing theatres, city-theatre mappings
+        and the show indexes.
+        
+        Args:
+            cleaning_buffer_minutes (int): Minutes a screen stays busy after each show
         """
         self._city_vs_theatre = {}
         self._all_theatre = []
+        self._day_indexes = ShowCalendar(on_expire=self._expire_day)
+        self._screen_vs_schedule = {}
+        self._city_vs_geo_index = {}
+        self._cleaning_buffer_minutes = cleaning_buffer_minutes
 
 
     def add_theatre(self, theatre: Theatre, city: City):
@@ -41,49 +81,337 @@ class TheatreController:
         
         This method adds the theatre to both the complete theatre list and
         the city-specific theatre list. If the city doesn't exist in the
-        mapping, it creates a new entry.
+        mapping, it creates a new entry. The theatre's existing shows are
+        added to the show indexes, and the theatre to the city's geo index
+        if it has a location.
         
         Args:
             theatre (Theatre): The theatre to add
             city (City): The city where the theatre is located
+            
+        Raises:
+            ValueError: If two of the theatre's shows overlap on one screen
+        """
+        self._add_theatres([(theatre, city)])
+
+    def add_theatres(self, theatres: List[Theatre]):
+        """
+        Add many theatres, each to its own city, with their shows.
+
+        Every screen and city schedule is merged once for all the theatres
+        rather than once per theatre, which makes this the method to use
+        for bulk loads. Either every theatre is added or none is.
+
+        Args:
+            theatres (List[Theatre]): The theatres to add
+
+        Raises:
+            ValueError: If two shows overlap on one screen
+        """
+        self._add_theatres([(theatre, theatre.get_city()) for theatre in theatres])
+
+    def _add_theatres(self, theatre_cities: List[Tuple[Theatre, City]]):
+        # the theatres' calendars already rejected shows outside the window
+        theatre_shows = [(theatre, theatre.get_shows(), city) for theatre, city in theatre_cities]
+        self._schedule_on_screens([show for _, shows, _ in theatre_shows for show in shows])
+
+        for theatre, city in theatre_cities:
+            self._all_theatre.append(theatre)
+
+            theatres = self._city_vs_theatre.get(city, [])
+            theatres.append(theatre)
+            self._city_vs_theatre[city] = theatres
+
+            if theatre.get_location() is not None:
+                latitude, longitude = theatre.get_location()
+                self._city_vs_geo_index.setdefault(city, GeoIndex()).add(theatre, latitude, longitude)
+
+        self._index_shows(theatre_shows)
+
+    def add_show(self, theatre: Theatre, show: Show):
+        """
+        Add a show to a registered theatre and index it.
+        
+        Args:
+            theatre (Theatre): The theatre running the show
+            show (Show): The show to add
+            
+        Raises:
+            ValueError: If the show's date is outside the calendar window, or the
+                        show overlaps another show on the same screen
+        """
+        if not self._day_indexes.is_in_window(show.get_show_date()):
+            raise ValueError("show " + str(show.get_show_id()) + " on " + show.get_show_date().isoformat()
+                             + " is outside the calendar window")
+        conflict = self._schedule_on_screen(show)
+        if conflict is not None:
+            raise ValueError(self._conflict_message(show, conflict))
+        theatre.add_show(show)
+        self._index_show(theatre, show, theatre.get_city())
+
+    def add_shows(self, theatre: Theatre, shows: List[Show]):
+        """
+        Add many shows to a registered theatre and index them.
+        
+        The shows are merged into the screen and city schedules in one
+        pass per schedule rather than one insert per show, which makes
+        this the method to use for bulk loads. Either every show is added
+        or none is.
+        
+        Args:
+            theatre (Theatre): The theatre running the shows
+            shows (List[Show]): The shows to add
+            
+        Raises:
+            ValueError: If a show's date is outside the calendar window, or a
+                        show overlaps another show on the same screen
+        """
+        for show in shows:
+            if not self._day_indexes.is_in_window(show.get_show_date()):
+                raise ValueError("show " + str(show.get_show_id()) + " on " + show.get_show_date().isoformat()
+                                 + " is outside the calendar window")
+        self._schedule_on_screens(shows)
+        theatre.add_shows(shows)
+        self._index_shows([(theatre, shows, theatre.get_city())])
+
+    def remove_show(self, theatre: Theatre, show: Show):
+        """
+        Remove a show from a registered theatre and from the index.
+        
+        Args:
+            theatre (Theatre): The theatre running the show
+            show (Show): The show to remove
+        """
+        theatre.remove_show(show)
+        self._unschedule_from_screen(show)
+        day_index = self._day_indexes.get(show.get_show_date())
+        if day_index is None:
+            return
+        city_schedule = day_index.city_vs_schedule.get(theatre.get_city())
+        if city_schedule is not None:
+            city_schedule.remove(show.get_show_start_minute(), (theatre, show))
+
+        key = (theatre.get_city(), show.get_movie().get_movie_id())
+        theatre_vs_shows = day_index.city_movie_vs_shows.get(key)
+        if theatre_vs_shows is None or theatre not in theatre_vs_shows:
+            return
+        theatre_vs_shows[theatre].remove(show)
+        if not theatre_vs_shows[theatre]:
+            del theatre_vs_shows[theatre]
+        if not theatre_vs_shows:
+            del day_index.city_movie_vs_shows[key]
+
+    def expire_shows(self):
+        """
+        Drop every show dated before the calendar window.
+        
+        Past dates are dropped a whole day at a time from the show indexes
+        and the theatres, and freed from the screens so their schedules
+        stay short. Meant to be called once a day.
+        
+        Returns:
+            int: Number of dates dropped from the show indexes
         """
-        self._all_theatre.append(theatre)
+        dropped = self._day_indexes.expire()
+        for theatre in self._all_theatre:
+            theatre.expire_shows()
+        return dropped
 
-        theatres = self._city_vs_theatre.get(city, [])
-        theatres.append(theatre)
-        self._city_vs_theatre[city] = theatres
+    def _expire_day(self, show_date: datetime.date, day_index: "_DayIndex"):
+        # older dates were dropped before this one, so everything a screen
+        # has before the end of the date belongs to it
+        screens = {show.get_screen()
+                   for theatre_vs_shows in day_index.city_movie_vs_shows.values()
+                   for shows in theatre_vs_shows.values() for show in shows}
+        day_end_minute = (show_date.toordinal() + 1) * 1440
+        for screen in screens:
+            self._screen_vs_schedule[screen].remove_starting_before(day_end_minute)
 
+    def _index_show(self, theatre: Theatre, show: Show, city: City):
+        day_index = self._day_indexes.setdefault(show.get_show_date(), _DayIndex)
+        key = (city, show.get_movie().get_movie_id())
+        theatre_vs_shows = day_index.city_movie_vs_shows.setdefault(key, {})
+        theatre_vs_shows.setdefault(theatre, []).append(show)
 
+        city_schedule = day_index.city_vs_schedule.setdefault(city, ShowSchedule())
+        city_schedule.add(show.get_show_start_minute(), show.get_show_end_minute(), (theatre, show),
+                          allow_overlap=True)
 
-    def get_all_show(self, movie: Movie, city: City):
+    def _index_shows(self, theatre_shows: List[Tuple[Theatre, List[Show], City]]):
+        # every city schedule of a date gets all its new entries in one merge
+        day_city_vs_entries = {}
+        for theatre, shows, city in theatre_shows:
+            key_vs_shows = {}
+            for show in shows:
+                key_vs_shows.setdefault((show.get_show_date(), show.get_movie().get_movie_id()), []).append(show)
+            for (show_date, movie_id), key_shows in key_vs_shows.items():
+                day_index = self._day_indexes.setdefault(show_date, _DayIndex)
+                theatre_vs_shows = day_index.city_movie_vs_shows.setdefault((city, movie_id), {})
+                theatre_vs_shows.setdefault(theatre, []).extend(key_shows)
+                entries = day_city_vs_entries.setdefault((day_index, city), [])
+                for show in key_shows:
+                    start = show.get_show_start_minute()
+                    entries.append((start, start + show.get_movie().get_movie_duration(), (theatre, show)))
+        for (day_index, city), entries in day_city_vs_entries.items():
+            day_index.city_vs_schedule.setdefault(city, ShowSchedule()).add_many(entries, allow_overlap=True)
+
+    def _schedule_on_screens(self, shows: List[Show]):
+        screen_vs_entries = {}
+        for show in shows:
+            start = show.get_show_start_minute()
+            screen_vs_entries.setdefault(show.get_screen(), []).append(
+                (start, start + show.get_movie().get_movie_duration() + self._cleaning_buffer_minutes, show))
+        scheduled = []
+        for screen, entries in screen_vs_entries.items():
+            schedule = self._screen_vs_schedule.setdefault(screen, ShowSchedule())
+            conflict = schedule.add_many(entries)
+            if conflict is not None:
+                for scheduled_schedule, scheduled_entries in scheduled:
+                    scheduled_schedule.remove_many(entry[2] for entry in scheduled_entries)
+                raise ValueError(self._conflict_message(*conflict))
+            scheduled.append((schedule, entries))
+
+    def _schedule_on_screen(self, show: Show):
+        schedule = self._screen_vs_schedule.setdefault(show.get_screen(), ShowSchedule())
+        return schedule.add(show.get_show_start_minute(),
+                            show.get_show_end_minute() + self._cleaning_buffer_minutes, show)
+
+    def _unschedule_from_screen(self, show: Show):
+        schedule = self._screen_vs_schedule.get(show.get_screen())
+        if schedule is not None:
+            schedule.remove(show.get_show_start_minute(), show)
+
+    @staticmethod
+    def _conflict_message(show: Show, conflict: Show):
+        return ("show " + str(show.get_show_id()) + " overlaps show " + str(conflict.get_show_id())
+                + " on screen " + str(show.get_screen().get_screen_id()))
+
+    def get_theatres_by_city(self, city: City):
+        """
+        Get the theatres registered in a city.
+        
+        Args:
+            city (City): The city to get theatres for
+            
+        Returns:
+            List[Theatre]: Theatres of the city, empty if there are none
         """
-        Get all shows for a specific movie in a specific city.
+        return list(self._city_vs_theatre.get(city, []))
+
+    def get_all_show(self, movie: Movie, city: City, show_date: datetime.date = None):
+        """
+        Get all shows for a specific movie in a specific city on one date.
         
-        This method searches through all theatres in the specified city
-        and finds all shows for the given movie. It returns a mapping
-        of theatres to their shows for that movie.
+        This method looks up the (city, movie) show index of the date and
+        returns a mapping of theatres to their shows for that movie, without
+        scanning the theatres of the city or the shows of other dates.
         
         Args:
             movie (Movie): The movie to find shows for
             city (City): The city to search in
+            show_date (datetime.date): The date of the shows, today if not given
             
         Returns:
             Dict[Theatre, List[Show]]: Mapping of theatres to their shows
                                       for the specified movie, empty dict if no shows found
         """
+        day_index = self._day_indexes.get(show_date if show_date is not None else datetime.date.today())
+        if day_index is None:
+            return {}
+        theatre_vs_shows = day_index.city_movie_vs_shows.get((city, movie.get_movie_id()), {})
+        return {theatre: list(shows) for theatre, shows in theatre_vs_shows.items()}
+
+    def get_shows_starting_between(self, city: City, from_hour: int, to_hour: int,
+                                   show_date: datetime.date = None):
+        """
+        Get all shows in a city starting within a time window of one date.
+        
+        Args:
+            city (City): The city to search in
+            from_hour (int): Start of the window in 24-hour format, inclusive
+            to_hour (int): End of the window in 24-hour format, inclusive
+            show_date (datetime.date): The date of the shows, today if not given
+            
+        Returns:
+            Dict[Theatre, List[Show]]: Mapping of theatres to their shows in the
+                                      window, ordered by start time
+        """
+        show_date = show_date if show_date is not None else datetime.date.today()
+        day_index = self._day_indexes.get(show_date)
+        if day_index is None:
+            return {}
+        city_schedule = day_index.city_vs_schedule.get(city)
+        if city_schedule is None:
+            return {}
+        day_start_minute = show_date.toordinal() * 1440
         theatre_vs_shows = {}
-        theatres = self._city_vs_theatre.get(city, [])
+        for theatre, show in city_schedule.get_starting_between(day_start_minute + from_hour * 60,
+                                                                day_start_minute + to_hour * 60):
+            theatre_vs_shows.setdefault(theatre, []).append(show)
+        return theatre_vs_shows
 
-        for theatre in theatres:
-            given_movie_shows = []
-            shows = theatre.get_shows()
+    def get_theatres_nearby(self, city: City, latitude: float, longitude: float, radius_km: float = 5.0):
+        """
+        Get the theatres of a city within a distance of a point.
+        
+        Only theatres with a location are found.
+        
+        Args:
+            city (City): The city to search in
+            latitude (float): Latitude of the point in degrees
+            longitude (float): Longitude of the point in degrees
+            radius_km (float): Maximum distance in kilometres
+            
+        Returns:
+            List[Tuple[float, Theatre]]: (distance in km, theatre) pairs, nearest first
+        """
+        geo_index = self._city_vs_geo_index.get(city)
+        if geo_index is None:
+            return []
+        return geo_index.query_within(latitude, longitude, radius_km)
 
-            for show in shows:
-                if show.get_movie().get_movie_id() == movie.get_movie_id():
-                    given_movie_shows.append(show)
+    def get_shows_nearby(self, movie: Movie, city: City, latitude: float, longitude: float,
+                         radius_km: float = 5.0, show_date: datetime.date = None):
+        """
+        Get the shows of a movie on one date in theatres near a point.
+        
+        The geo index narrows the search to the theatres within the radius,
+        which are then matched against the movie's shows of the date, so
+        neither the other theatres of the city nor their distances are
+        looked at.
+        
+        Args:
+            movie (Movie): The movie to find shows for
+            city (City): The city to search in
+            latitude (float): Latitude of the point in degrees
+            longitude (float): Longitude of the point in degrees
+            radius_km (float): Maximum distance in kilometres
+            show_date (datetime.date): The date of the shows, today if not given
+            
+        Returns:
+            List[Tuple[float, Theatre, Show]]: (distance in km, theatre, show) triples
+                                               ordered by distance, then start time
+        """
+        day_index = self._day_indexes.get(show_date if show_date is not None else datetime.date.today())
+        if day_index is None:
+            return []
+        theatre_vs_shows = day_index.city_movie_vs_shows.get((city, movie.get_movie_id()))
+        if not theatre_vs_shows:
+            return []
+        nearby_shows = []
+        for distance, theatre in self.get_theatres_nearby(city, latitude, longitude, radius_km):
+            shows = theatre_vs_shows.get(theatre)
+            if shows:
+                for show in sorted(shows, key=Show.get_show_start_minute):
+                    nearby_shows.append((distance, theatre, show))
+        return nearby_shows
 
-            if given_movie_shows:
-                theatre_vs_shows[theatre] = given_movie_shows
 
-        return theatre_vs_shows
+class _DayIndex:
+    """Show indexes of one date."""
 
+    __slots__ = ("city_movie_vs_shows", "city_vs_schedule")
+
+    def __init__(self):
+        self.city_movie_vs_shows = {}
+        self.city_vs_schedule = {}
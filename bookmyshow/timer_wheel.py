@@ -0,0 +1,117 @@
+from typing import Dict, Hashable
+
+class TimerWheel:
+    """
+    Hashed timer wheel used to expire timed entries cheaply.
+
+    Time is split into ticks of a fixed length and every entry is stored in
+    the slot of the tick in which it expires. Advancing the wheel only visits
+    the slots for ticks that have passed since the last advance, so expiring
+    entries costs O(expired + elapsed ticks) instead of a scan over every
+    live entry. Entries that expire more than one revolution ahead simply
+    stay in their slot until their expiry time is reached.
+
+    Only occupied slots are stored, so an idle wheel costs a few empty
+    dictionaries rather than one per slot; every show owns a wheel and most
+    of them hold nothing most of the time.
+
+    Attributes:
+        _tick_seconds (float): Length of one tick in seconds
+        _num_slots (int): Number of slots in one revolution of the wheel
+        _slot_vs_entries (Dict[int, Dict[Hashable, float]]): Mapping of key to expiry
+            time for every occupied slot
+        _key_vs_slot (Dict[Hashable, int]): Slot each scheduled key lives in
+        _current_tick (int): Last tick the wheel was advanced to
+    """
+
+    _tick_seconds: float
+    _num_slots: int
+    _slot_vs_entries: Dict[int, Dict[Hashable, float]]
+    _key_vs_slot: Dict[Hashable, int]
+    _current_tick: int
+
+    def __init__(self, tick_seconds: float = 1.0, num_slots: int = 64, start_time: float = 0.0):
+        """
+        Initialize an empty timer wheel.
+
+        Args:
+            tick_seconds (float): Length of one tick in seconds
+            num_slots (int): Number of slots in one revolution of the wheel
+            start_time (float): Time the wheel starts at
+        """
+        self._tick_seconds = tick_seconds
+        self._num_slots = num_slots
+        self._slot_vs_entries = {}
+        self._key_vs_slot = {}
+        self._current_tick = self._tick_of(start_time)
+
+    def _tick_of(self, timestamp: float):
+        return int(timestamp // self._tick_seconds)
+
+    def schedule(self, key: Hashable, expires_at: float):
+        """
+        Schedule a key to expire at the given time, replacing any earlier schedule.
+
+        Args:
+            key (Hashable): The key to schedule
+            expires_at (float): Time at which the key expires
+        """
+        self.cancel(key)
+        slot = max(self._tick_of(expires_at), self._current_tick) % self._num_slots
+        self._slot_vs_entries.setdefault(slot, {})[key] = expires_at
+        self._key_vs_slot[key] = slot
+
+    def cancel(self, key: Hashable):
+        """
+        Remove a key from the wheel.
+
+        Args:
+            key (Hashable): The key to remove
+
+        Returns:
+            bool: True if the key was scheduled, False otherwise
+        """
+        slot = self._key_vs_slot.pop(key, None)
+        if slot is None:
+            return False
+        entries = self._slot_vs_entries[slot]
+        del entries[key]
+        if not entries:
+            del self._slot_vs_entries[slot]
+        return True
+
+    def advance(self, now: float):
+        """
+        Move the wheel forward to the given time and collect expired keys.
+
+        Args:
+            now (float): The current time
+
+        Returns:
+            List[Hashable]: Keys whose expiry time is at or before now
+        """
+        now_tick = self._tick_of(now)
+        if now_tick < self._current_tick:
+            return []
+
+        ticks = min(now_tick - self._current_tick + 1, self._num_slots)
+        expired = []
+        for tick in range(now_tick - ticks + 1, now_tick + 1):
+            if not self._slot_vs_entries:
+                break
+            slot = tick % self._num_slots
+            entries = self._slot_vs_entries.get(slot)
+            if entries is None:
+                continue
+            for key, expires_at in list(entries.items()):
+                if expires_at <= now:
+                    del entries[key]
+                    del self._key_vs_slot[key]
+                    expired.append(key)
+            if not entries:
+                del self._slot_vs_entries[slot]
+        self._current_tick = now_tick
+        return expired
+
+    def __len__(self):
+        return len(self._key_vs_slot)